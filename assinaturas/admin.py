@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Assinatura, LogPagamento
+from .models import Assinatura, EventoWebhook, LogPagamento
 
 @admin.register(Assinatura)
 class AssinaturaAdmin(admin.ModelAdmin):
@@ -11,4 +11,11 @@ class AssinaturaAdmin(admin.ModelAdmin):
 class LogPagamentoAdmin(admin.ModelAdmin):
     list_display = ['evento', 'assinatura', 'created_at']
     list_filter = ['evento', 'created_at']
-    readonly_fields = ['payload']
\ No newline at end of file
+    readonly_fields = ['payload']
+
+@admin.register(EventoWebhook)
+class EventoWebhookAdmin(admin.ModelAdmin):
+    list_display = ['tipo_notificacao', 'status', 'tentativas', 'proxima_tentativa', 'created_at']
+    list_filter = ['status', 'tipo_notificacao']
+    search_fields = ['purchase_token', 'message_id']
+    readonly_fields = ['payload']
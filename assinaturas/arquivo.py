@@ -0,0 +1,166 @@
+"""
+Arquivo morto do LogPagamento em segmentos JSONL comprimidos, particionados por dia:
+
+    <LOGS_PAGAMENTO_ARQUIVO_DIR>/AAAA/MM/AAAA-MM-DD-N.jsonl.gz
+    <LOGS_PAGAMENTO_ARQUIVO_DIR>/AAAA/MM/indice.json
+
+Cada linha do segmento é um evento (id, evento, created_at, assinatura_id,
+purchase_token, payload). O índice mensal lista os segmentos com data,
+quantidade, faixa de ids e os purchase_tokens presentes, então a busca só
+descomprime os segmentos que podem conter o que foi pedido.
+"""
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import LogPagamento
+from .notificacoes import ler_notificacao
+
+
+def diretorio_arquivo():
+    return Path(settings.LOGS_PAGAMENTO_ARQUIVO_DIR)
+
+
+def pasta_do_mes(dia):
+    return diretorio_arquivo() / f'{dia.year:04d}' / f'{dia.month:02d}'
+
+
+def ler_indice(pasta):
+    try:
+        with open(pasta / 'indice.json', encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {'segmentos': []}
+
+
+def gravar_atomico(caminho, escrever):
+    """Escreve num temporário da mesma pasta, faz fsync e renomeia por cima."""
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(dir=caminho.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            escrever(arquivo)
+            arquivo.flush()
+            os.fsync(arquivo.fileno())
+        os.replace(temporario, caminho)
+    except BaseException:
+        os.unlink(temporario)
+        raise
+
+
+def registro(log):
+    purchase_token = log.assinatura.purchase_token if log.assinatura_id else None
+    return {
+        'id': log.id,
+        'evento': log.evento,
+        'created_at': log.created_at.isoformat(),
+        'assinatura_id': log.assinatura_id,
+        'purchase_token': purchase_token or ler_notificacao(log.payload)['purchase_token'] or None,
+        'payload': log.payload,
+    }
+
+
+def limites_do_dia(dia):
+    inicio = timezone.make_aware(datetime.combine(dia, time.min))
+    return inicio, timezone.make_aware(datetime.combine(dia + timedelta(days=1), time.min))
+
+
+def dias_para_arquivar(limite):
+    return sorted(
+        LogPagamento.objects.filter(created_at__lt=limite)
+        .annotate(dia=TruncDate('created_at'))
+        .values_list('dia', flat=True)
+        .distinct()
+        .order_by()
+    )
+
+
+def arquivar_dia(dia, limite):
+    """
+    Move os logs do dia (anteriores a `limite`) para um segmento novo.
+    Arquivo e índice são gravados antes do DELETE, dentro da mesma transação:
+    se algo falhar, as linhas continuam no banco. Numa queda entre o índice e o
+    commit, a próxima execução arquiva de novo; a leitura descarta ids repetidos.
+    """
+    inicio, fim = limites_do_dia(dia)
+    logs = LogPagamento.objects.filter(created_at__gte=inicio, created_at__lt=min(fim, limite))
+    
+    with transaction.atomic():
+        linhas = [registro(log) for log in logs.select_related('assinatura').order_by('id').iterator(chunk_size=1000)]
+        if not linhas:
+            return 0
+        
+        pasta = pasta_do_mes(dia)
+        indice = ler_indice(pasta)
+        numero = 1 + sum(1 for segmento in indice['segmentos'] if segmento['data'] == dia.isoformat())
+        nome = f'{dia.isoformat()}-{numero}.jsonl.gz'
+        
+        def escrever_segmento(arquivo):
+            with gzip.GzipFile(fileobj=arquivo, mode='wb') as comprimido:
+                for linha in linhas:
+                    comprimido.write(json.dumps(linha, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+                    comprimido.write(b'\n')
+        
+        gravar_atomico(pasta / nome, escrever_segmento)
+        
+        indice['segmentos'].append({
+            'arquivo': nome,
+            'data': dia.isoformat(),
+            'quantidade': len(linhas),
+            'primeiro_id': linhas[0]['id'],
+            'ultimo_id': linhas[-1]['id'],
+            'purchase_tokens': sorted({linha['purchase_token'] for linha in linhas if linha['purchase_token']}),
+        })
+        gravar_atomico(
+            pasta / 'indice.json',
+            lambda arquivo: arquivo.write(json.dumps(indice, ensure_ascii=False, indent=1).encode('utf-8'))
+        )
+        
+        logs.delete()
+    
+    return len(linhas)
+
+
+def arquivar(dias_retencao=None):
+    """Arquiva tudo anterior ao início do dia de hoje - retenção. Retorna {dia: quantidade}."""
+    dias_retencao = settings.LOGS_PAGAMENTO_RETENCAO_DIAS if dias_retencao is None else dias_retencao
+    limite, _ = limites_do_dia(timezone.localdate() - timedelta(days=dias_retencao))
+    return {dia: arquivar_dia(dia, limite) for dia in dias_para_arquivar(limite)}
+
+
+def buscar(purchase_token=None, data=None, limite=None):
+    """
+    Eventos arquivados por purchase_token e/ou data (date), do mais antigo ao mais novo.
+    Com `data`, lê só o índice daquele mês; com token, só abre segmentos que o contêm.
+    """
+    if data is not None:
+        pastas = [pasta_do_mes(data)]
+    else:
+        pastas = sorted(pasta.parent for pasta in diretorio_arquivo().glob('*/*/indice.json'))
+    
+    vistos = set()
+    for pasta in pastas:
+        for segmento in ler_indice(pasta)['segmentos']:
+            if data is not None and segmento['data'] != data.isoformat():
+                continue
+            if purchase_token is not None and purchase_token not in segmento['purchase_tokens']:
+                continue
+            
+            with gzip.open(pasta / segmento['arquivo'], 'rt', encoding='utf-8') as arquivo:
+                for linha in arquivo:
+                    evento = json.loads(linha)
+                    if purchase_token is not None and evento['purchase_token'] != purchase_token:
+                        continue
+                    if evento['id'] in vistos:
+                        continue
+                    
+                    vistos.add(evento['id'])
+                    yield evento
+                    if limite is not None and len(vistos) >= limite:
+                        return
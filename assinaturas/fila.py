@@ -0,0 +1,141 @@
+"""
+Fila persistente (tabela EventoWebhook) das notificações do Google Play.
+O webhook só enfileira; o comando `processar_webhooks` reserva lotes com um
+UPDATE condicional (seguro com vários workers, inclusive no SQLite), aplica
+os eventos agrupados por purchase_token e reagenda falhas com backoff.
+"""
+import logging
+import traceback
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import EventoWebhook
+from .notificacoes import AssinaturaDesconhecida, ProdutoDesconhecido, aplicar_eventos, ler_notificacao
+
+logger = logging.getLogger(__name__)
+
+
+def enfileirar(payload):
+    """Grava a notificação na fila (um INSERT; reentregas do mesmo messageId são descartadas)."""
+    dados = ler_notificacao(payload)
+    EventoWebhook.objects.bulk_create(
+        [EventoWebhook(
+            payload=payload,
+            message_id=dados['message_id'],
+            purchase_token=dados['purchase_token'],
+            tipo_notificacao=dados['tipo_notificacao'],
+            evento_em=dados['evento_em'],
+        )],
+        ignore_conflicts=True
+    )
+
+
+def reservar_lote(tamanho):
+    """Marca até `tamanho` eventos prontos como 'processando' para este worker e os devolve."""
+    agora = timezone.now()
+    prontos = (
+        Q(status='pendente', proxima_tentativa__lte=agora)
+        # Reservas antigas: worker que morreu no meio do lote
+        | Q(status='processando', reservado_em__lt=agora - timedelta(seconds=settings.WEBHOOK_RESERVA_SEGUNDOS))
+    )
+    
+    ids = list(
+        EventoWebhook.objects.filter(prontos)
+        .order_by('proxima_tentativa', 'id')
+        .values_list('id', flat=True)[:tamanho]
+    )
+    if not ids:
+        return []
+    
+    # O filtro se repete no UPDATE: se outro worker reservou antes, a linha não casa mais
+    reserva = uuid.uuid4().hex
+    EventoWebhook.objects.filter(prontos, id__in=ids).update(
+        status='processando',
+        reservado_por=reserva,
+        reservado_em=agora
+    )
+    return list(EventoWebhook.objects.filter(reservado_por=reserva, status='processando'))
+
+
+def processar_lote(tamanho=None):
+    """Processa um lote. Retorna contagens: reservados, concluidos, ignorados, com_erro, falhos."""
+    eventos = reservar_lote(tamanho or settings.WEBHOOK_LOTE)
+    resumo = {'reservados': len(eventos), 'concluidos': 0, 'ignorados': 0, 'com_erro': 0, 'falhos': 0}
+    
+    por_token = defaultdict(list)
+    ignorados = []
+    for evento in eventos:
+        if evento.purchase_token and evento.tipo_notificacao and evento.evento_em:
+            por_token[evento.purchase_token].append(evento)
+        else:
+            ignorados.append(evento.id)
+    
+    concluidos = []
+    for purchase_token, grupo in por_token.items():
+        try:
+            with transaction.atomic():
+                aplicar_eventos(purchase_token, grupo)
+        except AssinaturaDesconhecida as erro:
+            # Caso esperado: compra ainda não verificada, só tenta mais tarde
+            logger.info('Assinatura ainda não encontrada para %s; evento(s) reagendado(s).', purchase_token)
+            reagendar(grupo, erro)
+            resumo['com_erro'] += len(grupo)
+        except ProdutoDesconhecido as erro:
+            # Configuração, não instabilidade: falha já, sem gastar tentativas
+            falhar(grupo, erro)
+            resumo['falhos'] += len(grupo)
+        except Exception as erro:
+            logger.exception('Erro inesperado ao aplicar eventos do purchase_token %s.', purchase_token)
+            reagendar(grupo, erro, detalhe=traceback.format_exc())
+            resumo['com_erro'] += len(grupo)
+        else:
+            concluidos.extend(evento.id for evento in grupo)
+    
+    agora = timezone.now()
+    EventoWebhook.objects.filter(id__in=concluidos).update(
+        status='concluido', processado_em=agora, reservado_por='', erro=''
+    )
+    EventoWebhook.objects.filter(id__in=ignorados).update(
+        status='concluido', processado_em=agora, reservado_por='',
+        erro='Ignorado: notificação sem assinatura (teste ou payload inválido).'
+    )
+    resumo['concluidos'] = len(concluidos)
+    resumo['ignorados'] = len(ignorados)
+    return resumo
+
+
+def falhar(eventos, erro):
+    """Marca os eventos como 'falhou' sem nova tentativa."""
+    EventoWebhook.objects.filter(id__in=[evento.id for evento in eventos]).update(
+        status='falhou',
+        reservado_por='',
+        erro=f"{type(erro).__name__}: {erro}",
+        processado_em=timezone.now()
+    )
+
+
+def reagendar(eventos, erro, detalhe=None):
+    """
+    Nova tentativa em backoff * 2^(n-1) segundos; depois do limite, 'falhou'.
+    `detalhe` (traceback de erro inesperado) é gravado no lugar da mensagem curta.
+    """
+    agora = timezone.now()
+    for evento in eventos:
+        evento.tentativas += 1
+        evento.erro = detalhe or f"{type(erro).__name__}: {erro}"
+        evento.reservado_por = ''
+        if evento.tentativas >= settings.WEBHOOK_TENTATIVAS:
+            evento.status = 'falhou'
+        else:
+            evento.status = 'pendente'
+            evento.proxima_tentativa = agora + timedelta(
+                seconds=settings.WEBHOOK_BACKOFF_SEGUNDOS * 2 ** (evento.tentativas - 1)
+            )
+    
+    EventoWebhook.objects.bulk_update(
+        eventos, ['tentativas', 'erro', 'reservado_por', 'status', 'proxima_tentativa']
+    )
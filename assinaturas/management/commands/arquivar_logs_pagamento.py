@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from assinaturas.arquivo import arquivar, diretorio_arquivo
+
+
+class Command(BaseCommand):
+    """
+    Move LogPagamento mais antigos que a retenção para segmentos .jsonl.gz por dia.
+    Uso: python manage.py arquivar_logs_pagamento [--dias N]
+    Feito para rodar periodicamente (cron); consulta com assinaturas.arquivo.buscar
+    ou GET /api/payment/arquivo/.
+    """
+    help = 'Arquiva logs de pagamento antigos em arquivos comprimidos por dia.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=settings.LOGS_PAGAMENTO_RETENCAO_DIAS,
+            help='Dias mantidos no banco (padrão: LOGS_PAGAMENTO_RETENCAO_DIAS).'
+        )
+    
+    def handle(self, *args, **options):
+        arquivados = arquivar(options['dias'])
+        
+        for dia, quantidade in arquivados.items():
+            self.stdout.write(f"{dia.isoformat()}: {quantidade} log(s)")
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(arquivados.values())} log(s) de {len(arquivados)} dia(s) arquivados em {diretorio_arquivo()}."
+        ))
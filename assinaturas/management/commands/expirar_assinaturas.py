@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+from assinaturas.models import Assinatura
+from core.models import Usuario
+from core.versao import invalidar_dados_usuarios
+
+
+class Command(BaseCommand):
+    """
+    Expira assinaturas vencidas e rebaixa os usuários para o plano gratuito.
+    Uso: python manage.py expirar_assinaturas [--simular]
+    Número fixo de consultas (UPDATEs em conjunto, pelo índice status + data_expiracao),
+    tudo numa transação; feito para rodar periodicamente (cron).
+    """
+    help = 'Marca assinaturas vencidas como expiradas e rebaixa os usuários PRO vencidos.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Só conta o que seria alterado, sem gravar nada.'
+        )
+    
+    def handle(self, *args, **options):
+        agora = timezone.now()
+        
+        vencidas = Assinatura.objects.filter(
+            status__in=['ativa', 'cancelada'],
+            data_expiracao__lte=agora
+        )
+        # Cancelada continua paga até a data de expiração
+        vigentes = Assinatura.objects.filter(
+            usuario=OuterRef('pk'),
+            status__in=['ativa', 'cancelada'],
+            data_expiracao__gt=agora
+        )
+        # PRO vencido pela própria data ou por uma assinatura vencida, sem outra vigente
+        rebaixados = Usuario.objects.filter(
+            Q(data_expiracao_pro__isnull=True)
+            | Q(data_expiracao_pro__lte=agora)
+            | Q(Exists(vencidas.filter(usuario=OuterRef('pk')))),
+            plano='pro'
+        ).exclude(Exists(vigentes))
+        
+        if options['simular']:
+            self.stdout.write(
+                f"{vencidas.count()} assinatura(s) e {rebaixados.count()} usuário(s) seriam alterados."
+            )
+            return
+        
+        with transaction.atomic():
+            # update() não dispara sinais: as versões (ETag/cache) são trocadas à mão
+            # UPDATE pelos ids lidos: os invalidados são exatamente os rebaixados,
+            # mesmo que uma renovação chegue entre as duas consultas
+            usuarios_ids = list(rebaixados.values_list('pk', flat=True))
+            total_usuarios = Usuario.objects.filter(pk__in=usuarios_ids, plano='pro').update(
+                plano='free',
+                updated_at=agora
+            )
+            total_assinaturas = vencidas.update(
+                status='expirada',
+                renovacao_automatica=False,
+                updated_at=agora
+            )
+            invalidar_dados_usuarios(usuarios_ids)
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{total_assinaturas} assinatura(s) expirada(s), "
+            f"{total_usuarios} usuário(s) rebaixado(s) para o plano gratuito."
+        ))
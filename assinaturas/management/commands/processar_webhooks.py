@@ -0,0 +1,61 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from assinaturas.fila import processar_lote
+
+
+class Command(BaseCommand):
+    """
+    Worker da fila de notificações do Google Play (EventoWebhook).
+    Uso: python manage.py processar_webhooks [--lote N] [--continuo [--intervalo S]]
+    Sem --continuo, esvazia o que estiver pronto e sai (bom para cron).
+    Vários workers podem rodar juntos: cada lote é reservado atomicamente.
+    """
+    help = 'Processa a fila de notificações do Google Play em lotes.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=settings.WEBHOOK_LOTE,
+            help='Eventos reservados por lote.'
+        )
+        parser.add_argument(
+            '--continuo',
+            action='store_true',
+            help='Continua rodando e consultando a fila a cada --intervalo segundos.'
+        )
+        parser.add_argument(
+            '--intervalo',
+            type=float,
+            default=2,
+            help='Espera entre consultas quando a fila está vazia (com --continuo).'
+        )
+    
+    def handle(self, *args, **options):
+        totais = {'concluidos': 0, 'ignorados': 0, 'com_erro': 0, 'falhos': 0}
+        
+        try:
+            while True:
+                resumo = processar_lote(options['lote'])
+                for chave in totais:
+                    totais[chave] += resumo[chave]
+                
+                if resumo['reservados']:
+                    self.stdout.write(
+                        f"Lote: {resumo['concluidos']} concluído(s), "
+                        f"{resumo['ignorados']} ignorado(s), {resumo['com_erro']} com erro, "
+                        f"{resumo['falhos']} com falha permanente."
+                    )
+                    continue
+                
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{totais['concluidos']} evento(s) processado(s), {totais['ignorados']} ignorado(s), "
+            f"{totais['com_erro']} reagendado(s), {totais['falhos']} com falha permanente."
+        ))
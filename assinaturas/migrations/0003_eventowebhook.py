@@ -0,0 +1,44 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assinaturas', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assinatura',
+            name='ultimo_evento_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='EventoWebhook',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.CharField(blank=True, max_length=100, null=True, unique=True)),
+                ('purchase_token', models.CharField(blank=True, db_index=True, max_length=500)),
+                ('tipo_notificacao', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('evento_em', models.DateTimeField(blank=True, null=True)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pendente', 'Pendente'), ('processando', 'Processando'), ('concluido', 'Concluído'), ('falhou', 'Falhou')], default='pendente', max_length=15)),
+                ('tentativas', models.PositiveSmallIntegerField(default=0)),
+                ('proxima_tentativa', models.DateTimeField(default=django.utils.timezone.now)),
+                ('reservado_por', models.CharField(blank=True, max_length=32)),
+                ('reservado_em', models.DateTimeField(blank=True, null=True)),
+                ('erro', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processado_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Evento de Webhook',
+                'verbose_name_plural': 'Eventos de Webhook',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'proxima_tentativa'], name='assinaturas_status_767091_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assinaturas', '0003_eventowebhook'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assinatura',
+            index=models.Index(fields=['status', 'data_expiracao'], name='assinaturas_status_c8761b_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assinaturas', '0004_assinatura_status_expiracao_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='logpagamento',
+            index=models.Index(fields=['created_at'], name='assinaturas_created_2fc9bb_idx'),
+        ),
+    ]
@@ -40,6 +40,8 @@ class Assinatura(models.Model):
     
     # Controle
     renovacao_automatica = models.BooleanField(default=True)
+    # eventTimeMillis da última notificação do Google aplicada (ignora repetidas/atrasadas)
+    ultimo_evento_em = models.DateTimeField(null=True, blank=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -48,6 +50,10 @@ class Assinatura(models.Model):
         verbose_name = 'Assinatura'
         verbose_name_plural = 'Assinaturas'
         ordering = ['-created_at']
+        indexes = [
+            # Varredura de expiração: status IN (...) AND data_expiracao <= agora
+            models.Index(fields=['status', 'data_expiracao']),
+        ]
     
     def __str__(self):
         return f"{self.usuario.username} - {self.get_plano_display()} ({self.status})"
@@ -86,6 +92,52 @@ class LogPagamento(models.Model):
         verbose_name = 'Log de Pagamento'
         verbose_name_plural = 'Logs de Pagamento'
         ordering = ['-created_at']
+        indexes = [
+            # Listagem do admin e recorte por data do arquivamento
+            models.Index(fields=['created_at']),
+        ]
     
     def __str__(self):
-        return f"{self.evento} - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
\ No newline at end of file
+        return f"{self.evento} - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
+
+
+class EventoWebhook(models.Model):
+    """
+    Fila persistente das notificações do Google Play (RTDN via Pub/Sub push).
+    O webhook só grava aqui; o comando `processar_webhooks` consome em lotes,
+    com novas tentativas espaçadas (backoff exponencial) em caso de erro.
+    """
+    STATUS_CHOICES = [
+        ('pendente', 'Pendente'),
+        ('processando', 'Processando'),
+        ('concluido', 'Concluído'),
+        ('falhou', 'Falhou'),
+    ]
+    
+    # messageId do Pub/Sub: reentregas da mesma mensagem não viram dois eventos
+    message_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    purchase_token = models.CharField(max_length=500, blank=True, db_index=True)
+    tipo_notificacao = models.PositiveSmallIntegerField(null=True, blank=True)
+    evento_em = models.DateTimeField(null=True, blank=True)
+    payload = models.JSONField()
+    
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='pendente')
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    proxima_tentativa = models.DateTimeField(default=timezone.now)
+    reservado_por = models.CharField(max_length=32, blank=True)
+    reservado_em = models.DateTimeField(null=True, blank=True)
+    erro = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    processado_em = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = 'Evento de Webhook'
+        verbose_name_plural = 'Eventos de Webhook'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa']),
+        ]
+    
+    def __str__(self):
+        return f"{self.tipo_notificacao} - {self.status} ({self.tentativas} tentativa(s))"
@@ -0,0 +1,167 @@
+"""
+Leitura e aplicação das Real-time Developer Notifications (RTDN) do Google Play.
+O Google entrega via Pub/Sub push:
+    {"message": {"data": <base64 do JSON>, "messageId": "...", ...}, "subscription": "..."}
+com `data` = {"eventTimeMillis": ..., "subscriptionNotification":
+{"notificationType": N, "purchaseToken": "...", "subscriptionId": "..."}}.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from .models import Assinatura, LogPagamento
+
+# subscriptionNotification.notificationType
+RECUPERADA = 1
+RENOVADA = 2
+CANCELADA = 3
+COMPRADA = 4
+EM_ESPERA = 5
+EM_CARENCIA = 6
+REINICIADA = 7
+PAUSADA = 10
+REVOGADA = 12
+EXPIRADA = 13
+
+NOMES = {
+    RECUPERADA: 'recuperada',
+    RENOVADA: 'renovada',
+    CANCELADA: 'cancelada',
+    COMPRADA: 'comprada',
+    EM_ESPERA: 'em_espera',
+    EM_CARENCIA: 'em_carencia',
+    REINICIADA: 'reiniciada',
+    PAUSADA: 'pausada',
+    REVOGADA: 'revogada',
+    EXPIRADA: 'expirada',
+}
+
+
+class AssinaturaDesconhecida(Exception):
+    """Token sem Assinatura ainda (a compra pode estar sendo verificada): tentar de novo."""
+
+
+class ProdutoDesconhecido(Exception):
+    """subscriptionId fora de PRO_PRODUCTS: erro permanente, novas tentativas não resolvem."""
+
+
+def ler_notificacao(payload):
+    """
+    Extrai message_id, purchase_token, tipo_notificacao, evento_em e subscription_id.
+    Campos ausentes/ilegíveis ficam vazios: o evento é enfileirado mesmo assim e
+    o worker o descarta (o Google não deve receber erro por isso e reenviar).
+    """
+    mensagem = payload.get('message') if isinstance(payload, dict) else None
+    mensagem = mensagem if isinstance(mensagem, dict) else {}
+    
+    try:
+        dados = json.loads(base64.b64decode(mensagem.get('data', '')))
+    except (binascii.Error, ValueError, TypeError):
+        dados = {}
+    if not isinstance(dados, dict):
+        dados = {}
+    
+    notificacao = dados.get('subscriptionNotification') or {}
+    
+    evento_em = None
+    try:
+        evento_em = datetime.fromtimestamp(int(dados['eventTimeMillis']) / 1000, tz=dt_timezone.utc)
+    except (KeyError, TypeError, ValueError):
+        pass
+    
+    return {
+        'message_id': mensagem.get('messageId') or mensagem.get('message_id') or None,
+        'purchase_token': notificacao.get('purchaseToken', ''),
+        'tipo_notificacao': notificacao.get('notificationType'),
+        'evento_em': evento_em,
+        'subscription_id': notificacao.get('subscriptionId', ''),
+    }
+
+
+def duracao_do_plano(assinatura, subscription_id):
+    for plano, produto in settings.PRO_PRODUCTS.items():
+        if produto['product_id'] == subscription_id:
+            return timedelta(days=produto['duration_days'])
+    
+    # Notificação sem subscriptionId reconhecível: usa o plano da própria assinatura
+    produto = settings.PRO_PRODUCTS.get(assinatura.plano)
+    if produto is None:
+        raise ProdutoDesconhecido(
+            f"Produto {subscription_id!r} não está em PRO_PRODUCTS (plano da assinatura: {assinatura.plano!r})."
+        )
+    return timedelta(days=produto['duration_days'])
+
+
+def aplicar_eventos(purchase_token, eventos):
+    """
+    Aplica, em ordem de evento_em, as notificações de um mesmo purchase_token.
+    Idempotente: eventos com evento_em <= Assinatura.ultimo_evento_em (repetidos
+    ou fora de ordem) são ignorados, e as datas saem do horário do evento, não
+    de "agora", então reprocessar dá o mesmo resultado.
+    Deve rodar dentro de transaction.atomic().
+    """
+    assinatura = (
+        Assinatura.objects.select_for_update()
+        .select_related('usuario')
+        .filter(purchase_token=purchase_token)
+        .first()
+    )
+    if assinatura is None:
+        raise AssinaturaDesconhecida(purchase_token)
+    
+    usuario = assinatura.usuario
+    logs = []
+    
+    for evento in sorted(eventos, key=lambda e: e.evento_em):
+        if assinatura.ultimo_evento_em and evento.evento_em <= assinatura.ultimo_evento_em:
+            continue
+        
+        tipo = evento.tipo_notificacao
+        dados = ler_notificacao(evento.payload)
+        
+        if tipo in (COMPRADA, RENOVADA, RECUPERADA, REINICIADA):
+            assinatura.status = 'ativa'
+            assinatura.renovacao_automatica = True
+            assinatura.data_cancelamento = None
+            assinatura.data_expiracao = evento.evento_em + duracao_do_plano(assinatura, dados['subscription_id'])
+            usuario.plano = 'pro'
+            usuario.data_expiracao_pro = assinatura.data_expiracao
+        
+        elif tipo == EM_CARENCIA:
+            # Pagamento falhou, mas o acesso continua durante a carência
+            carencia = evento.evento_em + timedelta(days=settings.GOOGLE_PLAY_DIAS_CARENCIA)
+            assinatura.status = 'ativa'
+            assinatura.data_expiracao = max(assinatura.data_expiracao, carencia)
+            usuario.plano = 'pro'
+            usuario.data_expiracao_pro = assinatura.data_expiracao
+        
+        elif tipo == CANCELADA:
+            # Não renova mais; o acesso segue até data_expiracao (varredura de expiração)
+            assinatura.status = 'cancelada'
+            assinatura.renovacao_automatica = False
+            assinatura.data_cancelamento = evento.evento_em
+        
+        elif tipo in (EM_ESPERA, PAUSADA):
+            assinatura.status = 'pendente'
+            usuario.plano = 'free'
+        
+        elif tipo in (REVOGADA, EXPIRADA):
+            assinatura.status = 'expirada'
+            assinatura.renovacao_automatica = False
+            assinatura.data_expiracao = min(assinatura.data_expiracao, evento.evento_em)
+            usuario.plano = 'free'
+            usuario.data_expiracao_pro = assinatura.data_expiracao
+        
+        assinatura.ultimo_evento_em = evento.evento_em
+        logs.append(LogPagamento(
+            assinatura=assinatura,
+            evento=f"rtdn_{NOMES.get(tipo, tipo)}",
+            payload=evento.payload
+        ))
+    
+    if logs:
+        assinatura.save()
+        usuario.save(update_fields=['plano', 'data_expiracao_pro', 'updated_at'])
+        LogPagamento.objects.bulk_create(logs)
+    return len(logs)
@@ -1,3 +1,270 @@
-from django.test import TestCase
+import base64
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.models import Usuario
+from .arquivo import buscar
+from .fila import processar_lote
+from .models import Assinatura, EventoWebhook, LogPagamento
+from . import notificacoes
 
-# Create your tests here.
+
+def rtdn(tipo, token='tok-1', quando=None, message_id=None, produto='com.quantogastei.pro.mensal'):
+    quando = quando or datetime(2025, 6, 1, 12, tzinfo=dt_timezone.utc)
+    dados = {
+        'version': '1.0',
+        'packageName': 'com.quantogastei.app',
+        'eventTimeMillis': str(int(quando.timestamp() * 1000)),
+        'subscriptionNotification': {
+            'version': '1.0',
+            'notificationType': tipo,
+            'purchaseToken': token,
+            'subscriptionId': produto,
+        },
+    }
+    return {
+        'message': {
+            'data': base64.b64encode(json.dumps(dados).encode()).decode(),
+            'messageId': message_id or f'{tipo}-{token}-{quando.timestamp()}',
+        },
+        'subscription': 'projects/qg/subscriptions/play',
+    }
+
+
+class FilaWebhookTest(TestCase):
+    
+    def setUp(self):
+        self.usuario = Usuario.objects.create(username='lia', email='lia@exemplo.com')
+        self.assinatura = Assinatura.objects.create(
+            usuario=self.usuario, plano='mensal', purchase_token='tok-1',
+            data_expiracao=datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+        )
+        self.client = APIClient()
+    
+    def enviar(self, payload):
+        return self.client.post('/api/payment/hooks/', payload, format='json')
+    
+    def test_webhook_so_enfileira(self):
+        with self.assertNumQueries(1):
+            resposta = self.enviar(rtdn(notificacoes.RENOVADA))
+        self.assertEqual(resposta.json(), {'received': True})
+        
+        # Reentrega do Pub/Sub (mesmo messageId) não duplica
+        self.enviar(rtdn(notificacoes.RENOVADA))
+        evento = EventoWebhook.objects.get()
+        self.assertEqual((evento.status, evento.purchase_token, evento.tipo_notificacao), ('pendente', 'tok-1', 2))
+        self.assertFalse(LogPagamento.objects.exists())
+    
+    def test_renovacao_e_idempotencia(self):
+        quando = datetime(2025, 6, 1, 12, tzinfo=dt_timezone.utc)
+        self.enviar(rtdn(notificacoes.RENOVADA, quando=quando))
+        self.assertEqual(processar_lote()['concluidos'], 1)
+        
+        self.assinatura.refresh_from_db()
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.assinatura.status, 'ativa')
+        self.assertEqual(self.assinatura.data_expiracao, quando + timedelta(days=30))
+        self.assertEqual((self.usuario.plano, self.usuario.data_expiracao_pro), ('pro', self.assinatura.data_expiracao))
+        
+        # Mesmo evento com outro messageId: processado, mas sem efeito
+        self.enviar(rtdn(notificacoes.RENOVADA, quando=quando, message_id='outro'))
+        self.assertEqual(processar_lote()['concluidos'], 1)
+        self.assertEqual(LogPagamento.objects.filter(assinatura=self.assinatura).count(), 1)
+    
+    def test_eventos_aplicados_em_ordem_do_google(self):
+        inicio = datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+        self.enviar(rtdn(notificacoes.EXPIRADA, quando=inicio + timedelta(days=40)))
+        self.enviar(rtdn(notificacoes.RENOVADA, quando=inicio))
+        processar_lote()
+        
+        # Chegou atrasada, mas a renovação é anterior à expiração
+        self.assinatura.refresh_from_db()
+        self.usuario.refresh_from_db()
+        self.assertEqual(self.assinatura.status, 'expirada')
+        self.assertEqual(self.usuario.plano, 'free')
+        
+        # Atrasada de verdade (lote seguinte): ignorada
+        self.enviar(rtdn(notificacoes.RECUPERADA, quando=inicio + timedelta(days=1)))
+        processar_lote()
+        self.assinatura.refresh_from_db()
+        self.assertEqual(self.assinatura.status, 'expirada')
+    
+    @override_settings(WEBHOOK_TENTATIVAS=2, WEBHOOK_BACKOFF_SEGUNDOS=60)
+    def test_token_desconhecido_tenta_de_novo_com_backoff(self):
+        self.enviar(rtdn(notificacoes.COMPRADA, token='tok-novo'))
+        self.assertEqual(processar_lote()['com_erro'], 1)
+        
+        evento = EventoWebhook.objects.get()
+        self.assertEqual((evento.status, evento.tentativas), ('pendente', 1))
+        self.assertGreater(evento.proxima_tentativa, timezone.now() + timedelta(seconds=50))
+        self.assertIn('AssinaturaDesconhecida', evento.erro)
+        
+        # Ainda não é hora
+        self.assertEqual(processar_lote()['reservados'], 0)
+        
+        EventoWebhook.objects.update(proxima_tentativa=timezone.now())
+        processar_lote()
+        self.assertEqual(EventoWebhook.objects.get().status, 'falhou')
+    
+    def test_erro_inesperado_grava_traceback(self):
+        self.enviar(rtdn(notificacoes.RENOVADA))
+        with mock.patch('assinaturas.fila.aplicar_eventos', side_effect=RuntimeError('quebrou')):
+            with self.assertLogs('assinaturas.fila', level='ERROR') as logs:
+                self.assertEqual(processar_lote()['com_erro'], 1)
+        
+        self.assertIn('Traceback', logs.output[0])
+        evento = EventoWebhook.objects.get()
+        self.assertEqual((evento.status, evento.tentativas), ('pendente', 1))
+        self.assertIn('Traceback', evento.erro)
+        self.assertIn('RuntimeError: quebrou', evento.erro)
+    
+    @override_settings(WEBHOOK_TENTATIVAS=5)
+    def test_produto_desconhecido_falha_sem_novas_tentativas(self):
+        with override_settings(PRO_PRODUCTS={}):
+            self.enviar(rtdn(notificacoes.RENOVADA, produto='com.outro.app.premium'))
+            resumo = processar_lote()
+        
+        self.assertEqual((resumo['falhos'], resumo['com_erro']), (1, 0))
+        evento = EventoWebhook.objects.get()
+        self.assertEqual((evento.status, evento.tentativas), ('falhou', 0))
+        self.assertIn('com.outro.app.premium', evento.erro)
+        self.assertEqual(processar_lote()['reservados'], 0)
+    
+    def test_comando_processa_a_fila(self):
+        self.enviar(rtdn(notificacoes.CANCELADA))
+        self.enviar({'message': {'data': base64.b64encode(b'{"testNotification": {}}').decode(), 'messageId': 't'}})
+        
+        saida = StringIO()
+        call_command('processar_webhooks', '--lote', '1', stdout=saida)
+        self.assertIn('1 evento(s) processado(s), 1 ignorado(s)', saida.getvalue())
+        
+        self.assinatura.refresh_from_db()
+        self.assertEqual(self.assinatura.status, 'cancelada')
+        self.assertFalse(self.assinatura.renovacao_automatica)
+        self.assertFalse(EventoWebhook.objects.exclude(status='concluido').exists())
+
+
+class ExpirarAssinaturasTest(TestCase):
+    
+    def criar(self, nome, dias, status='ativa'):
+        expira = timezone.now() + timedelta(days=dias)
+        usuario = Usuario.objects.create(username=nome, plano='pro', data_expiracao_pro=expira)
+        Assinatura.objects.create(usuario=usuario, plano='mensal', status=status, data_expiracao=expira)
+        return usuario
+    
+    def expirar(self):
+        saida = StringIO()
+        call_command('expirar_assinaturas', stdout=saida)
+        return saida.getvalue()
+    
+    def test_expira_e_rebaixa(self):
+        vencido = self.criar('vencido', -1)
+        cancelado = self.criar('cancelado', -2, status='cancelada')
+        vigente = self.criar('vigente', 10)
+        # PRO sem assinatura, mas com data vencida
+        solto = Usuario.objects.create(username='solto', plano='pro', data_expiracao_pro=timezone.now() - timedelta(days=1))
+        
+        self.assertIn('2 assinatura(s) expirada(s), 3 usuário(s) rebaixado(s)', self.expirar())
+        
+        planos = dict(Usuario.objects.values_list('username', 'plano'))
+        self.assertEqual(planos, {'vencido': 'free', 'cancelado': 'free', 'vigente': 'pro', 'solto': 'free'})
+        self.assertEqual(
+            set(Assinatura.objects.filter(status='expirada').values_list('usuario__username', flat=True)),
+            {'vencido', 'cancelado'}
+        )
+        
+        # Idempotente
+        self.assertIn('0 assinatura(s) expirada(s), 0 usuário(s)', self.expirar())
+    
+    def test_cancelada_ainda_paga_mantem_pro(self):
+        usuario = self.criar('desistente', -3)
+        expira = timezone.now() + timedelta(days=5)
+        Assinatura.objects.create(usuario=usuario, plano='mensal', status='cancelada', data_expiracao=expira)
+        Usuario.objects.filter(pk=usuario.pk).update(data_expiracao_pro=expira)
+        
+        self.assertIn('1 assinatura(s) expirada(s), 0 usuário(s) rebaixado(s)', self.expirar())
+        self.assertEqual(Usuario.objects.get(pk=usuario.pk).plano, 'pro')
+    
+    def test_consultas_constantes(self):
+        # savepoint + ids dos usuários + 2 UPDATEs + versões dos usuários + release
+        self.criar('a0', -1)
+        with self.assertNumQueries(6):
+            self.expirar()
+        
+        for i in range(1, 20):
+            self.criar(f'a{i}', -1)
+        Assinatura.objects.update(status='ativa')
+        Usuario.objects.update(plano='pro')
+        with self.assertNumQueries(6):
+            self.expirar()
+        self.assertFalse(Usuario.objects.filter(plano='pro').exists())
+
+
+class ArquivoLogsPagamentoTest(TestCase):
+    
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        configuracao = override_settings(LOGS_PAGAMENTO_ARQUIVO_DIR=pasta.name)
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        
+        usuario = Usuario.objects.create(username='assinante')
+        self.assinatura = Assinatura.objects.create(
+            usuario=usuario, plano='mensal', status='ativa', purchase_token='tok-1',
+            data_expiracao=timezone.now() + timedelta(days=30)
+        )
+    
+    def log(self, dias_atras, evento='renovacao', assinatura=None, payload=None):
+        log = LogPagamento.objects.create(assinatura=assinatura, evento=evento, payload=payload or {})
+        LogPagamento.objects.filter(pk=log.pk).update(created_at=timezone.now() - timedelta(days=dias_atras))
+        return log
+    
+    def arquivar(self, dias=90):
+        saida = StringIO()
+        call_command('arquivar_logs_pagamento', dias=dias, stdout=saida)
+        return saida.getvalue()
+    
+    def test_move_logs_antigos_e_busca(self):
+        antigo = self.log(200, assinatura=self.assinatura)
+        # Sem assinatura: o token sai do próprio payload da notificação
+        orfao = self.log(150, evento='webhook', payload=rtdn(2, token='tok-2'))
+        recente = self.log(10, assinatura=self.assinatura)
+        
+        self.assertIn('2 log(s) de 2 dia(s)', self.arquivar())
+        self.assertEqual(list(LogPagamento.objects.values_list('id', flat=True)), [recente.id])
+        
+        self.assertEqual([e['id'] for e in buscar(purchase_token='tok-1')], [antigo.id])
+        self.assertEqual([e['id'] for e in buscar(purchase_token='tok-2')], [orfao.id])
+        dia = timezone.localtime(timezone.now() - timedelta(days=150)).date()
+        self.assertEqual([e['evento'] for e in buscar(data=dia)], ['webhook'])
+        self.assertEqual(list(buscar(purchase_token='outro')), [])
+        
+        # Idempotente; nova rodada cria outro segmento para o mesmo dia
+        self.assertIn('0 log(s) de 0 dia(s)', self.arquivar())
+        mais_um = self.log(200, assinatura=self.assinatura)
+        self.arquivar()
+        self.assertEqual([e['id'] for e in buscar(purchase_token='tok-1')], [antigo.id, mais_um.id])
+    
+    def test_api_somente_staff(self):
+        self.log(200, assinatura=self.assinatura)
+        self.arquivar()
+        
+        client = APIClient()
+        client.force_authenticate(Usuario.objects.create(username='comum'))
+        self.assertEqual(client.get('/api/payment/arquivo/', {'purchase_token': 'tok-1'}).status_code, 403)
+        
+        client.force_authenticate(Usuario.objects.create(username='suporte', is_staff=True))
+        self.assertEqual(client.get('/api/payment/arquivo/').status_code, 400)
+        self.assertEqual(client.get('/api/payment/arquivo/', {'data': '31/12/2024'}).status_code, 400)
+        
+        response = client.get('/api/payment/arquivo/', {'purchase_token': 'tok-1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['assinatura_id'], self.assinatura.id)
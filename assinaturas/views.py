@@ -1,3 +1,39 @@
-from django.shortcuts import render
+from datetime import date
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .arquivo import buscar
 
-# Create your views here.
+
+class LogPagamentoArquivoView(APIView):
+    """
+    Consulta ao arquivo morto do LogPagamento (somente administradores/suporte).
+    Query params: purchase_token e/ou data (AAAA-MM-DD), limite (padrão 100, máx. 1000)
+    """
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        purchase_token = request.query_params.get('purchase_token') or None
+        
+        try:
+            data = date.fromisoformat(request.query_params['data']) if request.query_params.get('data') else None
+        except ValueError:
+            return Response(
+                {'error': 'Data deve estar no formato AAAA-MM-DD.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if purchase_token is None and data is None:
+            return Response(
+                {'error': 'Informe purchase_token ou data.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limite = min(max(int(request.query_params.get('limite', 100)), 1), 1000)
+        except ValueError:
+            limite = 100
+        
+        eventos = list(buscar(purchase_token=purchase_token, data=data, limite=limite))
+        return Response({'count': len(eventos), 'results': eventos})
@@ -70,10 +70,30 @@ TEMPLATES = [
 #     }
 # }
 
+# Ajustes do SQLite aplicados em cada conexão nova:
+# WAL deixa leitores lendo enquanto um escritor grava; synchronous=NORMAL é seguro em WAL;
+# cache_size negativo é em KiB; busy_timeout espera o lock em vez de falhar na hora.
+SQLITE_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f"PRAGMA cache_size={config('SQLITE_CACHE_KIB', default=-20000, cast=int)}",
+    f"PRAGMA mmap_size={config('SQLITE_MMAP_BYTES', default=134217728, cast=int)}",
+    f"PRAGMA busy_timeout={config('SQLITE_BUSY_TIMEOUT_MS', default=5000, cast=int)}",
+]
+# Repetições de escrita quando mesmo assim der "database is locked" (ver core.banco)
+SQLITE_TENTATIVAS_ESCRITA = config('SQLITE_TENTATIVAS_ESCRITA', default=5, cast=int)
+SQLITE_ESPERA_INICIAL = config('SQLITE_ESPERA_INICIAL', default=0.05, cast=float)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(SQLITE_PRAGMAS),
+            # Transações pegam o lock de escrita no BEGIN: sem deadlock de upgrade
+            # leitura->escrita, que o busy_timeout não resolve
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
@@ -100,10 +120,32 @@ STATICFILES_DIRS = [BASE_DIR / 'static']
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# CACHE
+# locmem é por processo. As respostas em cache ficam sob o ETag, que sai das versões
+# gravadas no banco (core.ContadorVersao): uma escrita em qualquer worker já muda a
+# chave em todos. Com vários workers, o backend em arquivo evita só o retrabalho.
+CACHE_BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKENDS[CACHE_BACKEND],
+        'LOCATION': config(
+            'CACHE_LOCATION',
+            default=str(BASE_DIR / 'cache') if CACHE_BACKEND == 'file' else 'quantogastei'
+        ),
+        'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=5000, cast=int)},
+    }
+}
+# Tempo de vida das respostas em cache (as entradas deixam de ser usadas quando a versão muda)
+CACHE_RESPOSTAS_TIMEOUT = config('CACHE_RESPOSTAS_TIMEOUT', default=300, cast=int)
+
 # REST FRAMEWORK
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.autenticacao.JWTUsuarioDoToken',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -112,6 +154,16 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# JWT: tokens carregam plano/data_expiracao_pro (core.tokens); o refresh revalida no banco
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'core.serializers.TokenComPlanoSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.serializers.TokenRefreshComPlanoSerializer',
+}
+
+# request.user montado das claims; linhas completas ficam em memória por este tempo (s)
+JWT_USUARIOS_CACHE_TTL = config('JWT_USUARIOS_CACHE_TTL', default=30, cast=int)
+JWT_USUARIOS_CACHE_MAX = config('JWT_USUARIOS_CACHE_MAX', default=1000, cast=int)
+
 # CORS (para desenvolvimento)
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:8000",
@@ -133,10 +185,30 @@ LOGOUT_REDIRECT_URL = '/'
 GOOGLE_CLIENT_ID = config('GOOGLE_CLIENT_ID', default='')
 GOOGLE_CLIENT_SECRET = config('GOOGLE_CLIENT_SECRET', default='')
 
+# Cliente HTTP do OAuth (core.google): conexões reaproveitadas, timeouts e novas tentativas
+GOOGLE_OAUTH_TOKEN_URL = config('GOOGLE_OAUTH_TOKEN_URL', default='https://oauth2.googleapis.com/token')
+GOOGLE_OAUTH_USERINFO_URL = config('GOOGLE_OAUTH_USERINFO_URL', default='https://www.googleapis.com/oauth2/v2/userinfo')
+GOOGLE_HTTP_TIMEOUT_CONEXAO = config('GOOGLE_HTTP_TIMEOUT_CONEXAO', default=3.05, cast=float)
+GOOGLE_HTTP_TIMEOUT_LEITURA = config('GOOGLE_HTTP_TIMEOUT_LEITURA', default=10, cast=float)
+GOOGLE_HTTP_TENTATIVAS = config('GOOGLE_HTTP_TENTATIVAS', default=2, cast=int)
+GOOGLE_HTTP_BACKOFF = config('GOOGLE_HTTP_BACKOFF', default=0.3, cast=float)
+GOOGLE_HTTP_POOL = config('GOOGLE_HTTP_POOL', default=10, cast=int)
+
 # ===== GOOGLE PLAY BILLING =====
 GOOGLE_PLAY_SERVICE_ACCOUNT_FILE = config('GOOGLE_PLAY_SERVICE_ACCOUNT_FILE', default='')
 GOOGLE_PLAY_PACKAGE_NAME = 'com.quantogastei.app'
 
+# Fila de notificações do Google Play (assinaturas.fila)
+WEBHOOK_LOTE = config('WEBHOOK_LOTE', default=100, cast=int)
+WEBHOOK_TENTATIVAS = config('WEBHOOK_TENTATIVAS', default=8, cast=int)
+WEBHOOK_BACKOFF_SEGUNDOS = config('WEBHOOK_BACKOFF_SEGUNDOS', default=30, cast=int)
+WEBHOOK_RESERVA_SEGUNDOS = config('WEBHOOK_RESERVA_SEGUNDOS', default=300, cast=int)
+GOOGLE_PLAY_DIAS_CARENCIA = config('GOOGLE_PLAY_DIAS_CARENCIA', default=7, cast=int)
+
+# Arquivo morto do LogPagamento (assinaturas.arquivo): segmentos .jsonl.gz por dia
+LOGS_PAGAMENTO_ARQUIVO_DIR = config('LOGS_PAGAMENTO_ARQUIVO_DIR', default=str(BASE_DIR / 'arquivo' / 'logs_pagamento'))
+LOGS_PAGAMENTO_RETENCAO_DIAS = config('LOGS_PAGAMENTO_RETENCAO_DIAS', default=90, cast=int)
+
 # ===== PRODUTOS PRO =====
 PRO_PRODUCTS = {
     'mensal': {
@@ -7,6 +7,8 @@ from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from core.views import (
     UsuarioViewSet,
+    DashboardView,
+    EstatisticasCacheView,
     login_view,
     registro_view,
     home_view,
@@ -25,6 +27,8 @@ from core.oauth_views import (
     check_subscription_status,
     google_play_webhook,
 )
+from core import async_views
+from assinaturas.views import LogPagamentoArquivoView
 from contas.views import ContaViewSet
 from transacoes.views import CategoriaViewSet, TransacaoViewSet
 
@@ -60,12 +64,22 @@ urlpatterns = [
     path('registro/', registro_view, name='registro'),
     
     # ===== API REST =====
+    path('api/dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('api/cache/estatisticas/', EstatisticasCacheView.as_view(), name='estatisticas-cache'),
+    
+    # Leituras assíncronas (ASGI)
+    path('api/async/contas/', async_views.contas, name='async-contas'),
+    path('api/async/transacoes/', async_views.transacoes, name='async-transacoes'),
+    path('api/async/transacoes/resumo_mensal/', async_views.resumo_mensal, name='async-resumo-mensal'),
+    path('api/async/usuarios/me/', async_views.me, name='async-me'),
+    
     path('api/', include(router.urls)),
     
     # ===== API DE PAGAMENTOS (NOVO) =====
     path('api/payment/verify/', verify_purchase, name='verify_purchase'),
     path('api/payment/status/', check_subscription_status, name='subscription_status'),
     path('api/payment/hooks/', google_play_webhook, name='google_play_webhook'),
+    path('api/payment/arquivo/', LogPagamentoArquivoView.as_view(), name='logs_pagamento_arquivo'),
     
     # ===== JWT AUTH =====
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
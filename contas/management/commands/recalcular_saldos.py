@@ -0,0 +1,94 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum, Q
+from contas.models import Conta, SaldoConta
+from core.versao import invalidar_dados_usuarios
+from transacoes.models import Transacao
+
+
+class Command(BaseCommand):
+    """
+    Reconstrói (ou apenas verifica) o ledger de saldos a partir do histórico de transações.
+    Uso: python manage.py recalcular_saldos [--verificar] [--usuario ID]
+    """
+    help = 'Reconstrói ou verifica o ledger de saldos das contas (SaldoConta).'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar',
+            action='store_true',
+            help='Só compara o ledger com o histórico, sem gravar nada.'
+        )
+        parser.add_argument(
+            '--usuario',
+            type=int,
+            help='Limita a operação às contas de um usuário.'
+        )
+    
+    def handle(self, *args, **options):
+        contas = Conta.objects.all()
+        if options['usuario']:
+            contas = contas.filter(usuario_id=options['usuario'])
+        
+        esperado = self.calcular_movimentacoes(contas)
+        atual = dict(
+            SaldoConta.objects.filter(conta__in=contas).values_list('conta_id', 'movimentacao')
+        )
+        
+        divergentes = [
+            conta_id for conta_id, movimentacao in esperado.items()
+            if atual.get(conta_id) != movimentacao
+        ]
+        
+        if options['verificar']:
+            for conta_id in divergentes:
+                self.stdout.write(
+                    f"Conta {conta_id}: ledger={atual.get(conta_id)} esperado={esperado[conta_id]}"
+                )
+            if divergentes:
+                raise CommandError(f"{len(divergentes)} conta(s) com saldo divergente.")
+            self.stdout.write(self.style.SUCCESS(f"{len(esperado)} conta(s) verificadas, ledger consistente."))
+            return
+        
+        with transaction.atomic():
+            for conta_id in divergentes:
+                SaldoConta.objects.update_or_create(
+                    conta_id=conta_id,
+                    defaults={'movimentacao': esperado[conta_id]}
+                )
+            
+            # Saldos mudaram sem passar pelos sinais: nova versão para os donos das contas
+            invalidar_dados_usuarios(
+                Conta.objects.filter(pk__in=divergentes).values_list('usuario_id', flat=True).distinct()
+            )
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(esperado)} conta(s) processadas, {len(divergentes)} corrigida(s)."
+        ))
+    
+    def calcular_movimentacoes(self, contas):
+        """Movimentação de todas as contas com duas consultas agrupadas."""
+        movimentacoes = {conta_id: 0 for conta_id in contas.values_list('id', flat=True)}
+        
+        saidas = Transacao.objects.filter(conta_origem__in=contas).values('conta_origem_id').annotate(
+            receitas=Sum('valor', filter=Q(tipo='receita')),
+            despesas=Sum('valor', filter=Q(tipo='despesa')),
+            transferencias=Sum('valor', filter=Q(tipo='transferencia')),
+        ).order_by()
+        
+        for linha in saidas:
+            movimentacoes[linha['conta_origem_id']] += (
+                (linha['receitas'] or 0)
+                - (linha['despesas'] or 0)
+                - (linha['transferencias'] or 0)
+            )
+        
+        entradas = Transacao.objects.filter(
+            conta_destino__in=contas,
+            tipo='transferencia'
+        ).values('conta_destino_id').annotate(total=Sum('valor')).order_by()
+        
+        for linha in entradas:
+            movimentacoes[linha['conta_destino_id']] += linha['total'] or 0
+        
+        return movimentacoes
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoConta',
+            fields=[
+                ('conta', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='saldo', serialize=False, to='contas.conta')),
+                ('movimentacao', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Saldo da Conta',
+                'verbose_name_plural': 'Saldos das Contas',
+            },
+        ),
+    ]
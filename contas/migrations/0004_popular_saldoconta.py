@@ -0,0 +1,48 @@
+from django.db import migrations
+from django.db.models import Q, Sum
+
+
+def popular_saldos(apps, schema_editor):
+    """Cria o ledger das contas já existentes a partir do histórico de transações."""
+    Conta = apps.get_model('contas', 'Conta')
+    SaldoConta = apps.get_model('contas', 'SaldoConta')
+    Transacao = apps.get_model('transacoes', 'Transacao')
+    
+    movimentacoes = {
+        conta_id: 0
+        for conta_id in Conta.objects.filter(saldo__isnull=True).values_list('id', flat=True)
+    }
+    
+    saidas = Transacao.objects.filter(conta_origem_id__in=movimentacoes).values('conta_origem_id').annotate(
+        receitas=Sum('valor', filter=Q(tipo='receita')),
+        despesas=Sum('valor', filter=Q(tipo='despesa')),
+        transferencias=Sum('valor', filter=Q(tipo='transferencia')),
+    ).order_by()
+    for linha in saidas.iterator():
+        movimentacoes[linha['conta_origem_id']] += (
+            (linha['receitas'] or 0) - (linha['despesas'] or 0) - (linha['transferencias'] or 0)
+        )
+    
+    entradas = Transacao.objects.filter(
+        conta_destino_id__in=movimentacoes,
+        tipo='transferencia'
+    ).values('conta_destino_id').annotate(total=Sum('valor')).order_by()
+    for linha in entradas.iterator():
+        movimentacoes[linha['conta_destino_id']] += linha['total'] or 0
+    
+    SaldoConta.objects.bulk_create(
+        (SaldoConta(conta_id=conta_id, movimentacao=movimentacao) for conta_id, movimentacao in movimentacoes.items()),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0003_saldoconta'),
+        ('transacoes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(popular_saldos, migrations.RunPython.noop),
+    ]
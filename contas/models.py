@@ -1,6 +1,52 @@
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.conf import settings
 
+
+class ContaQuerySet(models.QuerySet):
+    
+    def com_saldo(self):
+        """
+        Anota `saldo_anotado` em todas as contas com uma única consulta.
+        Lê o ledger (SaldoConta) e, para contas sem ledger, agrega o histórico
+        em subconsultas condicionais sobre transacoes_saida/transacoes_entrada.
+        """
+        from transacoes.models import Transacao
+        
+        decimal = models.DecimalField(max_digits=14, decimal_places=2)
+        
+        saida = Transacao.objects.filter(
+            conta_origem=models.OuterRef('pk')
+        ).order_by().values('conta_origem').annotate(
+            total=models.Sum(
+                models.Case(
+                    models.When(tipo='receita', then=models.F('valor')),
+                    default=-models.F('valor'),
+                    output_field=decimal
+                )
+            )
+        ).values('total')
+        
+        entrada = Transacao.objects.filter(
+            conta_destino=models.OuterRef('pk'),
+            tipo='transferencia'
+        ).order_by().values('conta_destino').annotate(
+            total=models.Sum('valor')
+        ).values('total')
+        
+        historico = (
+            Coalesce(models.Subquery(saida, output_field=decimal), 0, output_field=decimal)
+            + Coalesce(models.Subquery(entrada, output_field=decimal), 0, output_field=decimal)
+        )
+        
+        return self.annotate(
+            saldo_anotado=models.ExpressionWrapper(
+                models.F('saldo_inicial') + Coalesce('saldo__movimentacao', historico, output_field=decimal),
+                output_field=decimal
+            )
+        )
+
+
 class Conta(models.Model):
     """
     Representa uma conta financeira do usuário.
@@ -53,6 +99,8 @@ class Conta(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ContaQuerySet.as_manager()
+    
     class Meta:
         verbose_name = 'Conta'
         verbose_name_plural = 'Contas'
@@ -62,35 +110,97 @@ class Conta(models.Model):
     def __str__(self):
         return f"{self.nome}"
     
+    def save(self, *args, **kwargs):
+        criando = self._state.adding
+        super().save(*args, **kwargs)
+        
+        # Conta nova não tem histórico: ledger começa zerado
+        if criando:
+            SaldoConta.objects.get_or_create(conta=self)
+    
     @property
     def saldo_atual(self):
-        """Calcula saldo atual: saldo_inicial + receitas - despesas."""
-        from transacoes.models import Transacao
+        """
+        Saldo atual: saldo_inicial + movimentação acumulada.
+        A movimentação vem do ledger (SaldoConta), mantido a cada escrita de Transacao.
+        Sem linha no ledger, agrega o histórico (só leitura; a próxima escrita recria a linha).
+        """
+        try:
+            movimentacao = self.saldo.movimentacao
+        except SaldoConta.DoesNotExist:
+            movimentacao = self.calcular_movimentacao()
         
-        receitas = Transacao.objects.filter(
-            conta_origem=self,
-            tipo='receita'
-        ).aggregate(total=models.Sum('valor'))['total'] or 0
-        
-        despesas = Transacao.objects.filter(
-            conta_origem=self,
-            tipo='despesa'
-        ).aggregate(total=models.Sum('valor'))['total'] or 0
+        return self.saldo_inicial + movimentacao
+    
+    def calcular_movimentacao(self):
+        """Recalcula a movimentação (receitas - despesas +/- transferências) a partir do histórico."""
+        from transacoes.models import Transacao
         
-        transferencias_enviadas = Transacao.objects.filter(
-            conta_origem=self,
-            tipo='transferencia'
-        ).aggregate(total=models.Sum('valor'))['total'] or 0
+        saida = Transacao.objects.filter(conta_origem_id=self.pk).aggregate(
+            receitas=models.Sum('valor', filter=models.Q(tipo='receita')),
+            despesas=models.Sum('valor', filter=models.Q(tipo='despesa')),
+            transferencias_enviadas=models.Sum('valor', filter=models.Q(tipo='transferencia')),
+        )
         
         transferencias_recebidas = Transacao.objects.filter(
-            conta_destino=self,
+            conta_destino_id=self.pk,
             tipo='transferencia'
         ).aggregate(total=models.Sum('valor'))['total'] or 0
         
         return (
-            self.saldo_inicial 
-            + receitas 
-            - despesas 
-            - transferencias_enviadas 
+            (saida['receitas'] or 0)
+            - (saida['despesas'] or 0)
+            - (saida['transferencias_enviadas'] or 0)
             + transferencias_recebidas
-        )
\ No newline at end of file
+        )
+
+
+class SaldoConta(models.Model):
+    """
+    Ledger de saldo por conta.
+    Guarda a movimentação acumulada das transações, atualizada de forma
+    incremental na mesma transação de banco que grava a Transacao.
+    """
+    conta = models.OneToOneField(
+        Conta,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='saldo'
+    )
+    
+    movimentacao = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Saldo da Conta'
+        verbose_name_plural = 'Saldos das Contas'
+    
+    def __str__(self):
+        return f"{self.conta} ({self.movimentacao})"
+    
+    @classmethod
+    def reconstruir(cls, conta_id):
+        """Recalcula a movimentação da conta do zero e persiste no ledger."""
+        conta = Conta.objects.get(pk=conta_id)
+        saldo, _ = cls.objects.update_or_create(
+            conta=conta,
+            defaults={'movimentacao': conta.calcular_movimentacao()}
+        )
+        return saldo
+    
+    @classmethod
+    def aplicar(cls, deltas):
+        """
+        Aplica variações {conta_id: delta} no ledger.
+        Chamado depois da escrita da Transacao, na mesma transação: uma conta sem
+        linha no ledger é reconstruída do histórico, que já inclui a escrita atual.
+        """
+        for conta_id, delta in deltas.items():
+            if conta_id is None or not delta:
+                continue
+            atualizadas = cls.objects.filter(conta_id=conta_id).update(
+                movimentacao=models.F('movimentacao') + delta
+            )
+            if not atualizadas:
+                cls.reconstruir(conta_id)
@@ -1,10 +1,27 @@
 from rest_framework import serializers
 from .models import Conta
 
+
+class SaldoAtualField(serializers.ReadOnlyField):
+    """
+    Lê o saldo anotado por Conta.objects.com_saldo().
+    Só cai na property `saldo_atual` quando a anotação não existe.
+    """
+    
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        super().__init__(**kwargs)
+    
+    def to_representation(self, conta):
+        saldo = getattr(conta, 'saldo_anotado', None)
+        if saldo is None:
+            saldo = conta.saldo_atual
+        return saldo
+
 class ContaSerializer(serializers.ModelSerializer):
     """Serializer completo de Conta."""
     
-    saldo_atual = serializers.ReadOnlyField()
+    saldo_atual = SaldoAtualField()
     
     class Meta:
         model = Conta
@@ -25,13 +42,27 @@ class ContaSerializer(serializers.ModelSerializer):
         """Adiciona o usuário logado automaticamente."""
         validated_data['usuario'] = self.context['request'].user
         return super().create(validated_data)
+    
+    def update(self, instance, validated_data):
+        """Descarta o saldo anotado, que pode ter mudado com o saldo_inicial."""
+        instance = super().update(instance, validated_data)
+        instance.__dict__.pop('saldo_anotado', None)
+        return instance
 
 
 class ContaListSerializer(serializers.ModelSerializer):
     """Serializer simplificado para listagem rápida."""
     
-    saldo_atual = serializers.ReadOnlyField()
+    saldo_atual = SaldoAtualField()
+    
+    class Meta:
+        model = Conta
+        fields = ['id', 'nome', 'tipo', 'saldo_atual', 'icone', 'cor', 'ativa']
+
+
+class ContaResumoSerializer(serializers.ModelSerializer):
+    """Representação leve (sem saldo) para aninhar em outros payloads."""
     
     class Meta:
         model = Conta
-        fields = ['id', 'nome', 'tipo', 'saldo_atual', 'icone', 'cor', 'ativa']
\ No newline at end of file
+        fields = ['id', 'nome', 'tipo', 'icone', 'cor']
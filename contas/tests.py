@@ -1,3 +1,115 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command, CommandError
 from django.test import TestCase
+from core.models import Usuario
+from core.versao import chave_versao, versoes
+from transacoes.models import Transacao
+from .models import Conta, SaldoConta
 
-# Create your tests here.
+
+class SaldoContaTest(TestCase):
+    """Ledger de saldo mantido pelas escritas de Transacao."""
+    
+    def setUp(self):
+        self.usuario = Usuario.objects.create(username='maria')
+        self.carteira = Conta.objects.create(
+            usuario=self.usuario, nome='Carteira', tipo='dinheiro', saldo_inicial=Decimal('100')
+        )
+        self.banco = Conta.objects.create(
+            usuario=self.usuario, nome='Banco', tipo='conta_corrente'
+        )
+    
+    def criar(self, **kwargs):
+        dados = {
+            'usuario': self.usuario,
+            'conta_origem': self.carteira,
+            'descricao': 'Teste',
+            'data': '2025-01-10',
+        }
+        dados.update(kwargs)
+        return Transacao.objects.create(**dados)
+    
+    def saldo(self, conta):
+        return Conta.objects.get(pk=conta.pk).saldo_atual
+    
+    def test_ledger_acompanha_criacao_edicao_e_exclusao(self):
+        receita = self.criar(tipo='receita', valor=Decimal('50'))
+        self.criar(tipo='despesa', valor=Decimal('30'))
+        transferencia = self.criar(tipo='transferencia', valor=Decimal('20'), conta_destino=self.banco)
+        
+        self.assertEqual(self.saldo(self.carteira), Decimal('100'))
+        self.assertEqual(self.saldo(self.banco), Decimal('20'))
+        
+        # Muda o tipo e a conta
+        receita.tipo = 'despesa'
+        receita.conta_origem = self.banco
+        receita.save()
+        self.assertEqual(self.saldo(self.carteira), Decimal('50'))
+        self.assertEqual(self.saldo(self.banco), Decimal('-30'))
+        
+        transferencia.delete()
+        self.assertEqual(self.saldo(self.carteira), Decimal('70'))
+        self.assertEqual(self.saldo(self.banco), Decimal('-50'))
+        
+        for conta in (self.carteira, self.banco):
+            self.assertEqual(SaldoConta.objects.get(conta=conta).movimentacao, conta.calcular_movimentacao())
+    
+    def test_ledger_ausente(self):
+        self.criar(tipo='receita', valor=Decimal('10'))
+        SaldoConta.objects.all().delete()
+        
+        # Leitura agrega o histórico sem gravar
+        self.assertEqual(self.saldo(self.carteira), Decimal('110'))
+        self.assertFalse(SaldoConta.objects.exists())
+        
+        # A escrita seguinte recria a linha a partir do histórico
+        self.criar(tipo='despesa', valor=Decimal('4'))
+        self.assertEqual(SaldoConta.objects.get(conta=self.carteira).movimentacao, Decimal('6'))
+        self.assertEqual(self.saldo(self.carteira), Decimal('106'))
+    
+    def test_comando_verifica_e_corrige(self):
+        self.criar(tipo='receita', valor=Decimal('10'))
+        SaldoConta.objects.filter(conta=self.carteira).update(movimentacao=Decimal('999'))
+        
+        with self.assertRaises(CommandError):
+            call_command('recalcular_saldos', '--verificar', stdout=StringIO())
+        
+        versao = versoes([chave_versao(self.usuario.pk)])
+        call_command('recalcular_saldos', stdout=StringIO())
+        call_command('recalcular_saldos', '--verificar', stdout=StringIO())
+        self.assertEqual(self.saldo(self.carteira), Decimal('110'))
+        # Saldos corrigidos invalidam os ETags do dono
+        self.assertNotEqual(versoes([chave_versao(self.usuario.pk)]), versao)
+
+
+class ContaListagemTest(TestCase):
+    """Listagem de contas com saldos anotados."""
+    
+    def setUp(self):
+        from rest_framework.test import APIClient
+        
+        self.usuario = Usuario.objects.create(username='joao')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+    
+    def test_listagem_com_consultas_constantes(self):
+        for i in range(15):
+            conta = Conta.objects.create(
+                usuario=self.usuario, nome=f'Conta {i}', tipo='dinheiro', saldo_inicial=Decimal(i)
+            )
+            Transacao.objects.create(
+                usuario=self.usuario, conta_origem=conta, tipo='receita',
+                descricao='Salário', valor=Decimal('10'), data='2025-01-10'
+            )
+        # Conta sem ledger: saldo vem da agregação do histórico na mesma consulta
+        SaldoConta.objects.filter(conta__nome='Conta 0').delete()
+        
+        # versão (ETag) + COUNT + página
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/contas/')
+        
+        saldos = {c['nome']: Decimal(str(c['saldo_atual'])) for c in response.json()['results']}
+        self.assertEqual(len(saldos), 15)
+        for i in range(15):
+            self.assertEqual(saldos[f'Conta {i}'], Decimal(i) + 10)
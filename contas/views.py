@@ -1,17 +1,19 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
+from core.versao import VersaoDadosMixin
 from .models import Conta
 from .serializers import ContaSerializer, ContaListSerializer
 
-class ContaViewSet(viewsets.ModelViewSet):
+class ContaViewSet(VersaoDadosMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar contas financeiras.
     """
     permission_classes = [IsAuthenticated]
+    acoes_em_cache = ['list']
     
     def get_queryset(self):
-        """Retorna apenas contas do usuário logado."""
-        return Conta.objects.filter(usuario=self.request.user)
+        """Retorna apenas contas do usuário logado, com saldos anotados numa única consulta."""
+        return Conta.objects.filter(usuario=self.request.user).com_saldo()
     
     def get_serializer_class(self):
         """Usa serializer simplificado para listagem."""
@@ -0,0 +1,142 @@
+"""
+Versões assíncronas dos endpoints de leitura mais acessados, em /api/async/.
+Usam o ORM async (aget, acount, aaggregate, async for): sob ASGI a requisição não
+prende uma thread enquanto espera o banco. As respostas são as mesmas dos
+endpoints DRF correspondentes, com a mesma autenticação JWT, ETag e cache.
+"""
+import functools
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException, AuthenticationFailed, MethodNotAllowed, NotAuthenticated
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from contas.models import Conta
+from contas.serializers import ContaListSerializer
+from transacoes.models import ResumoMensal
+from transacoes.pagination import TransacaoCursorPagination
+from transacoes.views import TransacaoViewSet
+from .autenticacao import JWTUsuarioDoToken, acarregar_usuario, usuario_incompleto
+from .paginacao import PaginacaoAsync
+from .serializers import UsuarioSerializer
+from .versao import acalcular_etag, acontar, chave_resposta
+
+
+async def autenticar_jwt(request):
+    """Mesma validação do JWTUsuarioDoToken: usuário montado das claims, sem consulta."""
+    autenticacao = JWTUsuarioDoToken()
+    cabecalho = autenticacao.get_header(request)
+    token_bruto = autenticacao.get_raw_token(cabecalho) if cabecalho is not None else None
+    if token_bruto is None:
+        raise NotAuthenticated()
+    
+    return autenticacao.get_user(autenticacao.get_validated_token(token_bruto))
+
+
+def responder(dados, status_code=status.HTTP_200_OK, cabecalhos=None):
+    conteudo = b'' if dados is None else JSONRenderer().render(dados)
+    return HttpResponse(conteudo, status=status_code, headers=cabecalhos, content_type='application/json')
+
+
+def leitura_async(em_cache=False):
+    """
+    Envolve uma view async de leitura: GET, JWT, ETag/304 e, com `em_cache`,
+    o cache de respostas (mesmas chaves de versão do VersaoDadosMixin).
+    A view recebe um Request do DRF (query_params, user) e devolve os dados.
+    """
+    def decorador(view):
+        @functools.wraps(view)
+        async def envolvida(request, *args, **kwargs):
+            try:
+                if request.method != 'GET':
+                    raise MethodNotAllowed(request.method)
+                
+                usuario = await autenticar_jwt(request)
+                requisicao = Request(request)
+                requisicao.user = usuario
+                
+                etag = f'"{await acalcular_etag(usuario.pk, request.get_full_path(), JSONRenderer.media_type)}"'
+                cabecalhos = {'ETag': etag, 'Cache-Control': 'private, no-cache', 'Vary': 'Authorization'}
+                if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                    return responder(None, status.HTTP_304_NOT_MODIFIED, cabecalhos)
+                
+                chave = None
+                if em_cache:
+                    chave = chave_resposta(usuario.pk, etag)
+                    dados = await cache.aget(chave)
+                    await acontar('misses' if dados is None else 'hits')
+                    cabecalhos['X-Cache'] = 'MISS' if dados is None else 'HIT'
+                    if dados is not None:
+                        return responder(dados, cabecalhos=cabecalhos)
+                
+                dados = await view(requisicao, *args, **kwargs)
+            except APIException as exc:
+                return erro(request, exc)
+            
+            if chave:
+                await cache.aset(chave, dados, timeout=settings.CACHE_RESPOSTAS_TIMEOUT)
+            return responder(dados, cabecalhos=cabecalhos)
+        
+        return envolvida
+    return decorador
+
+
+def erro(request, exc):
+    """Mesmo formato e status do exception handler do DRF."""
+    cabecalhos = {}
+    status_code = exc.status_code
+    if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+        status_code = status.HTTP_401_UNAUTHORIZED
+        cabecalhos['WWW-Authenticate'] = JWTUsuarioDoToken().authenticate_header(request)
+    if isinstance(exc, MethodNotAllowed):
+        cabecalhos['Allow'] = 'GET'
+    
+    dados = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return responder(dados, status_code, cabecalhos)
+
+
+@leitura_async(em_cache=True)
+async def contas(request):
+    """Contas do usuário com saldo (mesma resposta de GET /api/contas/)."""
+    paginacao = PaginacaoAsync()
+    pagina = await paginacao.apaginate_queryset(
+        Conta.objects.filter(usuario=request.user).com_saldo(),
+        request
+    )
+    return paginacao.get_paginated_response(ContaListSerializer(pagina, many=True).data).data
+
+
+@leitura_async()
+async def transacoes(request):
+    """Listagem de transações com os mesmos filtros, busca, ordenação e paginação de GET /api/transacoes/."""
+    view = TransacaoViewSet(request=request, action='list', format_kwarg=None, args=(), kwargs={})
+    queryset = view.filter_queryset(view.get_queryset())
+    
+    if request.query_params.get('paginacao') == 'cursor':
+        paginacao = TransacaoCursorPagination()
+    else:
+        paginacao = PaginacaoAsync()
+    
+    pagina = await paginacao.apaginate_queryset(queryset, request)
+    return paginacao.get_paginated_response(view.get_serializer(pagina, many=True).data).data
+
+
+@leitura_async(em_cache=True)
+async def resumo_mensal(request):
+    """Resumo do mês (mesma resposta de GET /api/transacoes/resumo_mensal/)."""
+    mes = int(request.query_params.get('mes', timezone.now().month))
+    ano = int(request.query_params.get('ano', timezone.now().year))
+    view = TransacaoViewSet(request=request, action='resumo_mensal', format_kwarg=None, args=(), kwargs={})
+    
+    return await ResumoMensal.aresumo_do_mes(request.user, ano, mes, **view.filtros_resumo())
+
+
+@leitura_async()
+async def me(request):
+    """Dados do usuário logado (mesma resposta de GET /api/usuarios/me/)."""
+    if usuario_incompleto(request.user):
+        await acarregar_usuario(request.user)
+    return UsuarioSerializer(request.user, context={'request': request}).data
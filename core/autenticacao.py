@@ -0,0 +1,132 @@
+"""
+Autenticação JWT sem SELECT em core_usuario por requisição.
+O request.user é um Usuario montado das claims do token (id, plano,
+data_expiracao_pro); os demais campos ficam adiados (deferred) e o primeiro
+acesso a qualquer um deles carrega todos numa consulta só. Linhas carregadas
+ficam num cache em memória do processo com TTL curto, então usuários ativos
+costumam vir completos sem tocar no banco.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from .models import Usuario
+
+CLAIMS_USUARIO = ('plano', 'data_expiracao_pro')
+
+
+class CacheUsuarios:
+    """Linhas de Usuario por id, com TTL e tamanho máximo (descarta as mais antigas)."""
+    
+    def __init__(self):
+        self._linhas = OrderedDict()
+        self._trava = threading.Lock()
+    
+    def obter(self, usuario_id):
+        with self._trava:
+            item = self._linhas.get(usuario_id)
+            if item is None:
+                return None
+            expira_em, valores = item
+            if expira_em < time.monotonic():
+                del self._linhas[usuario_id]
+                return None
+            return valores
+    
+    def guardar(self, usuario_id, valores):
+        with self._trava:
+            self._linhas.pop(usuario_id, None)
+            self._linhas[usuario_id] = (time.monotonic() + settings.JWT_USUARIOS_CACHE_TTL, valores)
+            while len(self._linhas) > settings.JWT_USUARIOS_CACHE_MAX:
+                self._linhas.popitem(last=False)
+    
+    def remover(self, usuario_id):
+        with self._trava:
+            self._linhas.pop(usuario_id, None)
+    
+    def limpar(self):
+        with self._trava:
+            self._linhas.clear()
+
+
+usuarios_recentes = CacheUsuarios()
+
+
+def campos_usuario():
+    return [campo.attname for campo in Usuario._meta.concrete_fields]
+
+
+def usuario_do_token(token):
+    """
+    Usuario do token sem consulta: completo se estiver no cache, senão só com
+    id e as claims de plano. Sem consulta não dá para ver `is_active`: uma conta
+    desativada perde o acesso quando o token expira ou no refresh (que revalida).
+    """
+    try:
+        # O simplejwt grava o id como texto na claim
+        usuario_id = Usuario._meta.get_field(jwt_settings.USER_ID_FIELD).to_python(token[jwt_settings.USER_ID_CLAIM])
+    except (KeyError, ValidationError):
+        raise InvalidToken(_('Token contained no recognizable user identification'))
+    
+    banco = router.db_for_read(Usuario)
+    
+    linha = usuarios_recentes.obter(usuario_id)
+    if linha is not None:
+        campos = campos_usuario()
+        usuario = Usuario.from_db(banco, campos, [linha[campo] for campo in campos])
+        if not jwt_settings.USER_AUTHENTICATION_RULE(usuario):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return usuario
+    
+    valores = {jwt_settings.USER_ID_FIELD: usuario_id}
+    if 'plano' in token:
+        expira = token.get('data_expiracao_pro')
+        valores['plano'] = token['plano']
+        valores['data_expiracao_pro'] = (
+            datetime.fromtimestamp(expira, tz=dt_timezone.utc) if expira is not None else None
+        )
+    
+    campos = [campo for campo in campos_usuario() if campo in valores]
+    usuario = Usuario.from_db(banco, campos, [valores[campo] for campo in campos])
+    usuario._claims_do_token = {campo: valores[campo] for campo in CLAIMS_USUARIO if campo in valores}
+    return usuario
+
+
+def usuario_incompleto(usuario):
+    return '_claims_do_token' in usuario.__dict__
+
+
+def carregar_usuario(usuario):
+    """Completa o usuário do token com a linha do banco (uma consulta)."""
+    valores = Usuario.objects.using(usuario._state.db).filter(pk=usuario.pk).values(*campos_usuario()).get()
+    completar_usuario(usuario, valores)
+
+
+async def acarregar_usuario(usuario):
+    valores = await Usuario.objects.using(usuario._state.db).filter(pk=usuario.pk).values(*campos_usuario()).aget()
+    completar_usuario(usuario, valores)
+
+
+def completar_usuario(usuario, valores):
+    # Campos já alterados no objeto são mantidos; as claims não alteradas
+    # são substituídas pelo valor do banco (o token pode estar defasado)
+    claims = usuario.__dict__.pop('_claims_do_token', {})
+    for campo, valor in valores.items():
+        if campo not in usuario.__dict__ or (campo in claims and usuario.__dict__[campo] == claims[campo]):
+            setattr(usuario, campo, valor)
+    usuarios_recentes.guardar(usuario.pk, valores)
+
+
+class JWTUsuarioDoToken(JWTAuthentication):
+    """JWTAuthentication que monta o request.user das claims, sem consultar o banco."""
+    
+    def get_user(self, validated_token):
+        return usuario_do_token(validated_token)
@@ -0,0 +1,28 @@
+import time
+from django.conf import settings
+from django.db import OperationalError, connection
+
+MENSAGENS_OCUPADO = ('database is locked', 'database table is locked', 'database is busy')
+
+
+def banco_ocupado(erro):
+    return isinstance(erro, OperationalError) and any(m in str(erro) for m in MENSAGENS_OCUPADO)
+
+
+def repetir_se_ocupado(funcao, *args, **kwargs):
+    """
+    Executa `funcao` repetindo quando o SQLite responde "database is locked".
+    O busy_timeout já espera pelo lock; isto cobre o que sobra sob contenção forte,
+    com espera exponencial. Dentro de um atomic() externo não repete: a transação
+    inteira precisa ser refeita por quem a abriu.
+    """
+    tentativas = settings.SQLITE_TENTATIVAS_ESCRITA
+    espera = settings.SQLITE_ESPERA_INICIAL
+    
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return funcao(*args, **kwargs)
+        except OperationalError as erro:
+            if not banco_ocupado(erro) or connection.in_atomic_block or tentativa == tentativas:
+                raise
+            time.sleep(espera * 2 ** (tentativa - 1))
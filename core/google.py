@@ -0,0 +1,119 @@
+"""
+Cliente HTTP compartilhado para as chamadas ao Google (OAuth).
+Uma única requests.Session por processo: keep-alive (sem handshake TLS a cada
+login), timeouts de conexão/leitura e novas tentativas com backoff exponencial.
+Guarda métricas de tempo por operação, consultáveis em metricas_google().
+"""
+import threading
+import time
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_cliente = None
+_trava = threading.Lock()
+
+
+class ClienteGoogle:
+    
+    def __init__(self):
+        self.timeout = (settings.GOOGLE_HTTP_TIMEOUT_CONEXAO, settings.GOOGLE_HTTP_TIMEOUT_LEITURA)
+        
+        # GET repete em erro de leitura e em 429/5xx; POST (troca do código, que é
+        # de uso único) só repete falha de conexão, quando a requisição não saiu
+        tentativas = Retry(
+            total=settings.GOOGLE_HTTP_TENTATIVAS,
+            backoff_factor=settings.GOOGLE_HTTP_BACKOFF,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({'GET'}),
+            raise_on_status=False,
+        )
+        adaptador = HTTPAdapter(
+            pool_connections=settings.GOOGLE_HTTP_POOL,
+            pool_maxsize=settings.GOOGLE_HTTP_POOL,
+            max_retries=tentativas,
+        )
+        
+        self.sessao = requests.Session()
+        self.sessao.mount('https://', adaptador)
+        self.sessao.mount('http://', adaptador)
+        
+        self._metricas = {}
+        self._trava_metricas = threading.Lock()
+    
+    def requisitar(self, operacao, metodo, url, **kwargs):
+        """Faz a requisição, registra o tempo e levanta erro para status >= 400."""
+        kwargs.setdefault('timeout', self.timeout)
+        inicio = time.perf_counter()
+        try:
+            resposta = self.sessao.request(metodo, url, **kwargs)
+            resposta.raise_for_status()
+        except requests.RequestException:
+            self.registrar(operacao, time.perf_counter() - inicio, erro=True)
+            raise
+        
+        self.registrar(operacao, time.perf_counter() - inicio)
+        return resposta
+    
+    def trocar_codigo(self, dados):
+        """Troca o código de autorização pelos tokens."""
+        return self.requisitar('token', 'POST', settings.GOOGLE_OAUTH_TOKEN_URL, data=dados).json()
+    
+    def dados_usuario(self, access_token):
+        return self.requisitar(
+            'userinfo',
+            'GET',
+            settings.GOOGLE_OAUTH_USERINFO_URL,
+            headers={'Authorization': f'Bearer {access_token}'}
+        ).json()
+    
+    def registrar(self, operacao, duracao, erro=False):
+        with self._trava_metricas:
+            metrica = self._metricas.setdefault(
+                operacao,
+                {'chamadas': 0, 'erros': 0, 'tempo_total': 0.0, 'tempo_maximo': 0.0}
+            )
+            metrica['chamadas'] += 1
+            metrica['erros'] += int(erro)
+            metrica['tempo_total'] += duracao
+            metrica['tempo_maximo'] = max(metrica['tempo_maximo'], duracao)
+    
+    def metricas(self):
+        """Chamadas, erros e tempos (ms) por operação."""
+        with self._trava_metricas:
+            return {
+                operacao: {
+                    'chamadas': m['chamadas'],
+                    'erros': m['erros'],
+                    'tempo_medio_ms': round(m['tempo_total'] / m['chamadas'] * 1000, 1),
+                    'tempo_maximo_ms': round(m['tempo_maximo'] * 1000, 1),
+                }
+                for operacao, m in self._metricas.items()
+            }
+    
+    def fechar(self):
+        self.sessao.close()
+
+
+def cliente_google():
+    """Cliente do processo, criado no primeiro uso."""
+    global _cliente
+    if _cliente is None:
+        with _trava:
+            if _cliente is None:
+                _cliente = ClienteGoogle()
+    return _cliente
+
+
+def metricas_google():
+    return cliente_google().metricas()
+
+
+def fechar_cliente_google():
+    """Descarta o cliente (ex.: após mudar as configurações em testes)."""
+    global _cliente
+    with _trava:
+        if _cliente is not None:
+            _cliente.fechar()
+        _cliente = None
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:39
+
+import core.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='usuario',
+            managers=[
+                ('objects', core.models.UsuarioManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_usuario_manager'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorVersao',
+            fields=[
+                ('chave', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('numero', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Contador de versão',
+                'verbose_name_plural': 'Contadores de versão',
+            },
+        ),
+    ]
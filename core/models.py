@@ -1,5 +1,39 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+import re
+import secrets
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import IntegrityError, models, transaction
+
+
+class UsuarioManager(UserManager):
+    
+    TENTATIVAS_USERNAME = 8
+    
+    def criar_com_username_livre(self, email, **campos):
+        """
+        Cria o usuário com username derivado do e-mail ("ana" de ana@x.com).
+        Se já existir, tenta sufixos aleatórios ("ana4821", "ana70315"...).
+        Cada verificação é uma busca pelo índice único de username (nada de COUNT(*)),
+        e a corrida entre cadastros simultâneos é resolvida pela própria constraint:
+        quem perder recebe IntegrityError dentro de um savepoint e tenta outro nome.
+        """
+        max_length = self.model._meta.get_field('username').max_length
+        base = re.sub(r'[^\w.@+-]', '', email.split('@')[0])[:max_length - 10] or 'usuario'
+        
+        for tentativa in range(self.TENTATIVAS_USERNAME):
+            # Sufixo cresce a cada rodada: colisões repetidas ficam cada vez mais improváveis
+            username = base if tentativa == 0 else f'{base}{secrets.randbelow(10 ** (tentativa + 3))}'
+            if self.filter(username=username).exists():
+                continue
+            
+            try:
+                with transaction.atomic():
+                    return self.create(username=username, email=email, **campos)
+            except IntegrityError:
+                if not self.filter(username=username).exists():
+                    raise
+        
+        raise IntegrityError(f'Não foi possível gerar um username livre para {email}.')
+
 
 class Usuario(AbstractUser):
     """
@@ -24,6 +58,8 @@ class Usuario(AbstractUser):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UsuarioManager()
+    
     class Meta:
         verbose_name = 'Usuário'
         verbose_name_plural = 'Usuários'
@@ -32,6 +68,21 @@ class Usuario(AbstractUser):
     def __str__(self):
         return f"{self.username}"
     
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Usuário montado das claims do JWT (core.autenticacao): o primeiro campo
+        # adiado acessado carrega a linha inteira, não um campo por consulta
+        if fields is not None and '_claims_do_token' in self.__dict__:
+            from .autenticacao import carregar_usuario
+            return carregar_usuario(self)
+        return super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+    
+    def save(self, *args, **kwargs):
+        # Claims do token podem estar defasadas: completa com o banco antes de gravar
+        if '_claims_do_token' in self.__dict__:
+            from .autenticacao import carregar_usuario
+            carregar_usuario(self)
+        super().save(*args, **kwargs)
+    
     @property
     def is_pro(self):
         """Verifica se o usuário tem plano PRO ativo."""
@@ -42,4 +93,20 @@ class Usuario(AbstractUser):
             return False
         
         from django.utils import timezone
-        return timezone.now() < self.data_expiracao_pro
\ No newline at end of file
+        return timezone.now() < self.data_expiracao_pro
+
+class ContadorVersao(models.Model):
+    """
+    Contador de versão persistido no banco (dados de um usuário, categorias padrão...).
+    É incrementado na mesma transação da escrita, então todos os processos
+    enxergam a troca juntos com os dados; ETags e cache de respostas saem daqui.
+    """
+    chave = models.CharField(max_length=100, primary_key=True)
+    numero = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = 'Contador de versão'
+        verbose_name_plural = 'Contadores de versão'
+    
+    def __str__(self):
+        return f"{self.chave}={self.numero}"
@@ -6,11 +6,13 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
-import requests
 from datetime import datetime, timedelta
+from core.banco import repetir_se_ocupado
+from core.google import cliente_google
 from core.models import Usuario
-from assinaturas.models import Assinatura, LogPagamento
+from core.tokens import RefreshTokenComPlano
+from assinaturas.fila import enfileirar
+from assinaturas.models import Assinatura
 
 # ===== ONBOARDING VIEWS =====
 
@@ -101,7 +103,7 @@ def google_oauth_callback(request):
         return redirect('/?error=no_code')
     
     try:
-        token_url = 'https://oauth2.googleapis.com/token'
+        google = cliente_google()
         token_data = {
             'code': code,
             'client_id': settings.GOOGLE_CLIENT_ID,
@@ -110,17 +112,11 @@ def google_oauth_callback(request):
             'grant_type': 'authorization_code'
         }
         
-        token_response = requests.post(token_url, data=token_data)
-        token_response.raise_for_status()
-        tokens = token_response.json()
+        tokens = google.trocar_codigo(token_data)
         
         access_token = tokens.get('access_token')
         
-        user_info_url = 'https://www.googleapis.com/oauth2/v2/userinfo'
-        headers = {'Authorization': f'Bearer {access_token}'}
-        user_response = requests.get(user_info_url, headers=headers)
-        user_response.raise_for_status()
-        user_data = user_response.json()
+        user_data = google.dados_usuario(access_token)
         
         email = user_data.get('email')
         name = user_data.get('given_name', '')
@@ -164,7 +160,7 @@ def google_oauth_callback(request):
                 print(f"[GOOGLE AUTH] ✅ Login feito com sucesso")
                 
                 # Gerar JWT tokens
-                refresh = RefreshToken.for_user(usuario_existente)
+                refresh = RefreshTokenComPlano.for_user(usuario_existente)
                 
                 print(f"[GOOGLE AUTH] 🔑 JWT tokens gerados")
                 
@@ -183,9 +179,9 @@ def google_oauth_callback(request):
                 return response
             else:
                 # USUÁRIO NOVO - criar e ir para step2
-                usuario = Usuario.objects.create(
-                    email=email,
-                    username=email.split('@')[0] + str(Usuario.objects.count()),
+                usuario = repetir_se_ocupado(
+                    Usuario.objects.criar_com_username_livre,
+                    email,
                     first_name=name
                 )
                 
@@ -193,7 +189,7 @@ def google_oauth_callback(request):
                 login(request, usuario, backend='django.contrib.auth.backends.ModelBackend')
                 
                 # Gerar JWT tokens
-                refresh = RefreshToken.for_user(usuario)
+                refresh = RefreshTokenComPlano.for_user(usuario)
                 
                 # Salvar dados na session para o JavaScript ler
                 request.session['google_name'] = full_name
@@ -212,7 +208,7 @@ def google_oauth_callback(request):
                 login(request, usuario_existente, backend='django.contrib.auth.backends.ModelBackend')
                 
                 # Gerar JWT tokens
-                refresh = RefreshToken.for_user(usuario_existente)
+                refresh = RefreshTokenComPlano.for_user(usuario_existente)
                 
                 # Salvar tokens nos cookies
                 response = redirect('/home/')
@@ -227,9 +223,9 @@ def google_oauth_callback(request):
                 return response
             else:
                 # Usuário novo - criar
-                usuario = Usuario.objects.create(
-                    email=email,
-                    username=email.split('@')[0] + str(Usuario.objects.count()),
+                usuario = repetir_se_ocupado(
+                    Usuario.objects.criar_com_username_livre,
+                    email,
                     first_name=name
                 )
                 
@@ -324,9 +320,7 @@ def check_subscription_status(request):
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def google_play_webhook(request):
-    LogPagamento.objects.create(
-        evento='webhook_recebido',
-        payload=request.data
-    )
+    # Só enfileira: o processamento fica com `manage.py processar_webhooks`
+    enfileirar(request.data)
     
     return Response({'received': True})
\ No newline at end of file
@@ -0,0 +1,35 @@
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+
+
+class PaginacaoAsync(PageNumberPagination):
+    """
+    PageNumberPagination com `apaginate_queryset` para views assíncronas:
+    COUNT e página via ORM async (acount / async for), mesma resposta
+    (count, next, previous, results) e mesmos links da versão síncrona.
+    """
+    
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        
+        paginator = self.django_paginator_class(queryset, page_size)
+        # count é cached_property: preenchido aqui, o Paginator não consulta de novo
+        paginator.count = await queryset.acount()
+        
+        numero = self.get_page_number(request, paginator)
+        try:
+            numero = paginator.validate_number(numero)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=numero, message=str(exc)))
+        
+        inicio = (numero - 1) * page_size
+        resultados = [obj async for obj in queryset[inicio:inicio + page_size]]
+        self.page = paginator._get_page(resultados, numero, paginator)
+        
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return resultados
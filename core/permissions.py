@@ -0,0 +1,26 @@
+import time
+from rest_framework.permissions import BasePermission
+
+
+def pro_pelas_claims(claims):
+    """PRO ativo segundo as claims do token (mesma regra de Usuario.is_pro)."""
+    expira = claims.get('data_expiracao_pro')
+    return claims.get('plano') == 'pro' and expira is not None and time.time() < expira
+
+
+class PlanoPro(BasePermission):
+    """
+    Libera recursos PRO lendo as claims `plano`/`data_expiracao_pro` do access token,
+    sem consultar o banco. Sem essas claims (token antigo, sessão) usa Usuario.is_pro.
+    O token pode ficar defasado até o próximo refresh, que recarrega o plano do banco.
+    """
+    message = 'Recurso disponível apenas no plano PRO.'
+    
+    def has_permission(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            return False
+        
+        token = request.auth
+        if token is not None and hasattr(token, 'get') and 'plano' in token:
+            return pro_pelas_claims(token)
+        return request.user.is_pro
@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from .models import Usuario
+from .tokens import RefreshTokenComPlano, adicionar_claims_plano
 
 class UsuarioSerializer(serializers.ModelSerializer):
     """Serializer para listagem e atualização de usuário."""
@@ -58,4 +62,45 @@ class UsuarioCreateSerializer(serializers.ModelSerializer):
         usuario.set_password(password)
         usuario.save()
         
-        return usuario
\ No newline at end of file
+        return usuario
+
+
+class TokenComPlanoSerializer(TokenObtainPairSerializer):
+    """Login (/api/token/) emitindo tokens com as claims de plano."""
+    token_class = RefreshTokenComPlano
+
+
+class TokenRefreshComPlanoSerializer(TokenRefreshSerializer):
+    """
+    Refresh (/api/token/refresh/) revalidando o usuário no banco: conta removida
+    ou inativa é recusada, e o novo access token sai com o plano atual.
+    """
+    token_class = RefreshTokenComPlano
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        
+        usuario = Usuario.objects.filter(
+            **{jwt_settings.USER_ID_FIELD: refresh.payload.get(jwt_settings.USER_ID_CLAIM)}
+        ).first()
+        if usuario is None or not jwt_settings.USER_AUTHENTICATION_RULE(usuario):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        
+        adicionar_claims_plano(refresh, usuario)
+        data = {'access': str(refresh.access_token)}
+        
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # App de blacklist não instalado
+                    pass
+            
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data['refresh'] = str(refresh)
+        
+        return data
@@ -0,0 +1,25 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from contas.models import Conta
+from transacoes.models import Categoria, Transacao
+from .autenticacao import usuarios_recentes
+from .models import Usuario
+from .versao import invalidar_dados_usuario
+
+
+@receiver(post_save, sender=Conta)
+@receiver(post_delete, sender=Conta)
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+@receiver(post_save, sender=Transacao)
+@receiver(post_delete, sender=Transacao)
+def dados_alterados(sender, instance, **kwargs):
+    """Escrita em dados do usuário: nova versão (invalida ETags)."""
+    invalidar_dados_usuario(instance.usuario_id)
+
+
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+def usuario_alterado(sender, instance, **kwargs):
+    usuarios_recentes.remover(instance.pk)
+    invalidar_dados_usuario(instance.pk)
@@ -1,3 +1,586 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from decimal import Decimal
+import requests
+from django.db import OperationalError, connection
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+from rest_framework_simplejwt.tokens import AccessToken
+from contas.models import Conta
+from transacoes.categorias import invalidar_categorias_padrao
+from transacoes.models import Categoria, Transacao
+from . import async_views
+from .autenticacao import usuarios_recentes
+from .banco import repetir_se_ocupado
+from .google import cliente_google, fechar_cliente_google
+from .models import Usuario
+from .permissions import PlanoPro
+from .tokens import RefreshTokenComPlano
+from .versao import estatisticas_cache, zerar_estatisticas_cache
 
-# Create your tests here.
+
+class DashboardTest(TestCase):
+    
+    def setUp(self):
+        invalidar_categorias_padrao()
+        self.usuario = Usuario.objects.create(username='bia', first_name='Bia')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+    
+    def test_bootstrap_com_consultas_fixas(self):
+        Categoria.objects.create(nome='Lazer', tipo='despesa', padrao=True)
+        for i in range(5):
+            conta = Conta.objects.create(usuario=self.usuario, nome=f'Conta {i}', tipo='dinheiro')
+            for dia in range(1, 4):
+                Transacao.objects.create(
+                    usuario=self.usuario, conta_origem=conta, tipo='despesa',
+                    descricao='Café', valor=Decimal('3'), data=f'2025-05-0{dia}'
+                )
+        
+        # Aquece o cache de categorias padrão
+        self.client.get('/api/dashboard/?mes=5&ano=2025')
+        
+        # versões (ETag) + versão das categorias padrão + contas + categorias do usuário
+        # + resumo (2) + últimas transações
+        with self.assertNumQueries(7):
+            dados = self.client.get('/api/dashboard/?mes=5&ano=2025&limite=4').json()
+        
+        self.assertEqual(dados['usuario']['first_name'], 'Bia')
+        self.assertEqual(len(dados['contas']), 5)
+        self.assertEqual(dados['contas'][0]['saldo_atual'], -9)
+        self.assertEqual([c['nome'] for c in dados['categorias']], ['Lazer'])
+        self.assertEqual(dados['resumo_mensal']['despesas'], 45)
+        self.assertEqual(dados['resumo_mensal']['quantidade'], 15)
+        self.assertEqual(len(dados['ultimas_transacoes']), 4)
+        
+        conta = dados['contas'][0]['id']
+        dados = self.client.get(f'/api/dashboard/?mes=5&ano=2025&conta={conta}').json()
+        self.assertEqual(len(dados['ultimas_transacoes']), 3)
+        self.assertEqual(dados['resumo_mensal']['despesas'], 9)
+
+
+class EtagTest(TestCase):
+    
+    def setUp(self):
+        invalidar_categorias_padrao()
+        self.usuario = Usuario.objects.create(username='caio')
+        self.conta = Conta.objects.create(usuario=self.usuario, nome='Carteira', tipo='dinheiro')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+    
+    def test_get_condicional_responde_304_so_com_a_versao(self):
+        for url in ('/api/contas/', '/api/categorias/', '/api/transacoes/', '/api/usuarios/me/', '/api/dashboard/'):
+            resposta = self.client.get(url)
+            self.assertEqual(resposta.status_code, 200, url)
+            self.assertIn('ETag', resposta)
+            
+            with self.assertNumQueries(1):
+                resposta = self.client.get(url, HTTP_IF_NONE_MATCH=resposta['ETag'])
+            self.assertEqual(resposta.status_code, 304, url)
+    
+    def test_escrita_troca_etag(self):
+        etag = self.client.get('/api/contas/')['ETag']
+        
+        Transacao.objects.create(
+            usuario=self.usuario, conta_origem=self.conta, tipo='despesa',
+            descricao='Pão', valor=Decimal('5'), data='2025-05-01'
+        )
+        resposta = self.client.get('/api/contas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertNotEqual(resposta['ETag'], etag)
+        
+        # Versões são por usuário e por URL
+        outro = Usuario.objects.create(username='dani')
+        self.client.force_authenticate(outro)
+        self.assertNotEqual(self.client.get('/api/contas/')['ETag'], resposta['ETag'])
+        self.client.force_authenticate(self.usuario)
+        self.assertNotEqual(self.client.get('/api/contas/?page=1')['ETag'], resposta['ETag'])
+    
+    def test_usuarios_novos_tem_etags_diferentes(self):
+        # Sem nenhuma escrita, os dois estão na versão 0
+        primeiro, segundo = Usuario.objects.bulk_create([Usuario(username='ivo'), Usuario(username='juca')])
+        etags = []
+        for usuario in (primeiro, segundo):
+            self.client.force_authenticate(usuario)
+            etags.append(self.client.get('/api/contas/')['ETag'])
+        self.assertNotEqual(etags[0], etags[1])
+    
+    def test_versao_vale_entre_processos(self):
+        # Cada LOCATION do locmem é um cache separado, como em outro worker
+        processo_a = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'a'}}
+        processo_b = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'b'}}
+        
+        with override_settings(CACHES=processo_b):
+            etag = self.client.get('/api/contas/')['ETag']
+        
+        with override_settings(CACHES=processo_a):
+            self.client.post('/api/contas/', {'nome': 'Banco', 'tipo': 'conta_corrente'}, format='json')
+        
+        with override_settings(CACHES=processo_b):
+            resposta = self.client.get('/api/contas/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resposta.status_code, 200)
+        self.assertEqual(resposta.json()['count'], 2)
+    
+    def test_escritas_nao_usam_etag(self):
+        resposta = self.client.post('/api/contas/', {'nome': 'Banco', 'tipo': 'conta_corrente'}, format='json')
+        self.assertEqual(resposta.status_code, 201)
+        self.assertNotIn('ETag', resposta)
+
+
+class CacheRespostasTest(TestCase):
+    
+    def setUp(self):
+        invalidar_categorias_padrao()
+        zerar_estatisticas_cache()
+        self.usuario = Usuario.objects.create(username='edu')
+        self.conta = Conta.objects.create(usuario=self.usuario, nome='Carteira', tipo='dinheiro')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+    
+    def despesa(self, valor):
+        Transacao.objects.create(
+            usuario=self.usuario, conta_origem=self.conta, tipo='despesa',
+            descricao='Café', valor=Decimal(valor), data='2025-05-02'
+        )
+    
+    def test_leituras_repetidas_saem_do_cache(self):
+        url = '/api/transacoes/resumo_mensal/?mes=5&ano=2025'
+        self.despesa('4')
+        
+        resposta = self.client.get(url)
+        self.assertEqual(resposta['X-Cache'], 'MISS')
+        
+        # Só a leitura da versão
+        with self.assertNumQueries(1):
+            resposta = self.client.get(url)
+        self.assertEqual(resposta['X-Cache'], 'HIT')
+        self.assertEqual(resposta.json()['despesas'], 4)
+        
+        # Query string diferente é outra entrada
+        self.assertEqual(self.client.get(url + f'&conta={self.conta.pk}')['X-Cache'], 'MISS')
+        
+        # Escrita do usuário invalida; a de outro usuário não
+        outro = Usuario.objects.create(username='fabi')
+        Conta.objects.create(usuario=outro, nome='Banco', tipo='dinheiro')
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+        
+        self.despesa('6')
+        resposta = self.client.get(url)
+        self.assertEqual(resposta['X-Cache'], 'MISS')
+        self.assertEqual(resposta.json()['despesas'], 10)
+        
+        estatisticas = estatisticas_cache()
+        self.assertEqual((estatisticas['hits'], estatisticas['misses']), (2, 3))
+    
+    def test_listagens_e_estatisticas(self):
+        for url in ('/api/contas/', '/api/categorias/', '/api/dashboard/'):
+            self.client.get(url)
+            self.assertEqual(self.client.get(url)['X-Cache'], 'HIT', url)
+        
+        # Detalhe e listagem de transações não passam pelo cache
+        self.assertNotIn('X-Cache', self.client.get('/api/transacoes/'))
+        
+        self.assertEqual(self.client.get('/api/cache/estatisticas/').status_code, 403)
+        admin = Usuario.objects.create(username='admin', is_staff=True)
+        self.client.force_authenticate(admin)
+        dados = self.client.get('/api/cache/estatisticas/').json()
+        self.assertEqual((dados['hits'], dados['misses']), (3, 3))
+        self.assertEqual(dados['taxa_acerto'], 0.5)
+    
+    def test_invalidacao_vale_entre_processos(self):
+        # Dois caches locmem separados fazem o papel de dois workers
+        processo_a = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'a'}}
+        processo_b = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'b'}}
+        
+        with override_settings(CACHES=processo_b):
+            self.client.get('/api/contas/')
+            self.assertEqual(self.client.get('/api/contas/')['X-Cache'], 'HIT')
+        
+        with override_settings(CACHES=processo_a):
+            self.client.post('/api/contas/', {'nome': 'Banco', 'tipo': 'conta_corrente'}, format='json')
+        
+        with override_settings(CACHES=processo_b):
+            resposta = self.client.get('/api/contas/')
+        self.assertEqual(resposta['X-Cache'], 'MISS')
+        self.assertEqual(resposta.json()['count'], 2)
+    
+    def test_backend_em_arquivo(self):
+        with tempfile.TemporaryDirectory() as pasta:
+            backend = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': pasta}
+            with override_settings(CACHES={'default': backend}):
+                self.client.get('/api/contas/')
+                self.assertEqual(self.client.get('/api/contas/')['X-Cache'], 'HIT')
+                
+                Conta.objects.create(usuario=self.usuario, nome='Banco', tipo='dinheiro')
+                resposta = self.client.get('/api/contas/')
+                self.assertEqual(resposta['X-Cache'], 'MISS')
+                self.assertEqual(resposta.json()['count'], 2)
+
+
+class SqliteConcorrenciaTest(SimpleTestCase):
+    
+    def setUp(self):
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        self.caminho = os.path.join(pasta.name, 'banco.sqlite3')
+    
+    def conectar(self):
+        # Mesmas OPTIONS (pragmas) do banco configurado, num arquivo de verdade
+        conexao = DatabaseWrapper({**connection.settings_dict, 'NAME': self.caminho}, alias='concorrencia')
+        self.addCleanup(conexao.close)
+        return conexao.cursor()
+    
+    def test_leitura_nao_espera_escrita(self):
+        escritor = self.conectar()
+        leitor = self.conectar()
+        escritor.execute('CREATE TABLE t (x INTEGER)')
+        self.assertEqual(escritor.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertEqual(escritor.execute('PRAGMA synchronous').fetchone()[0], 1)
+        
+        # Leitor com transação aberta enquanto o escritor grava e faz commit
+        leitor.execute('BEGIN')
+        self.assertEqual(leitor.execute('SELECT COUNT(*) FROM t').fetchone()[0], 0)
+        
+        inicio = time.monotonic()
+        escritor.execute('BEGIN IMMEDIATE')
+        escritor.execute('INSERT INTO t VALUES (1)')
+        self.assertEqual(leitor.execute('SELECT COUNT(*) FROM t').fetchone()[0], 0)
+        escritor.execute('COMMIT')
+        self.assertLess(time.monotonic() - inicio, 1)
+        
+        leitor.execute('COMMIT')
+        self.assertEqual(leitor.execute('SELECT COUNT(*) FROM t').fetchone()[0], 1)
+    
+    @override_settings(SQLITE_ESPERA_INICIAL=0)
+    def test_repete_escrita_quando_ocupado(self):
+        chamadas = []
+        
+        def gravar():
+            chamadas.append(1)
+            if len(chamadas) < 3:
+                raise OperationalError('database is locked')
+            return 'ok'
+        
+        self.assertEqual(repetir_se_ocupado(gravar), 'ok')
+        self.assertEqual(len(chamadas), 3)
+        
+        def quebrar():
+            raise OperationalError('no such table: x')
+        
+        with self.assertRaises(OperationalError):
+            repetir_se_ocupado(quebrar)
+
+
+class LeituraAsyncTest(TestCase):
+    
+    def setUp(self):
+        invalidar_categorias_padrao()
+        usuarios_recentes.limpar()
+        self.usuario = Usuario.objects.create(username='gabi', first_name='Gabi')
+        conta = Conta.objects.create(usuario=self.usuario, nome='Carteira', tipo='dinheiro')
+        mercado = Categoria.objects.create(nome='Mercado', tipo='despesa', usuario=self.usuario)
+        for dia in range(1, 26):
+            Transacao.objects.create(
+                usuario=self.usuario, conta_origem=conta, tipo='despesa', categoria=mercado,
+                descricao=f'Compra {dia}', valor=Decimal(dia), data=f'2025-05-{dia:02d}'
+            )
+        
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.usuario)}')
+    
+    def test_views_sao_assincronas(self):
+        for view in (async_views.contas, async_views.transacoes, async_views.resumo_mensal, async_views.me):
+            self.assertTrue(asyncio.iscoroutinefunction(view))
+    
+    def test_mesmas_respostas_dos_endpoints_sincronos(self):
+        pares = [
+            ('/api/contas/', '/api/async/contas/'),
+            ('/api/transacoes/?page=2', '/api/async/transacoes/?page=2'),
+            ('/api/transacoes/?search=compra&ordering=valor', '/api/async/transacoes/?search=compra&ordering=valor'),
+            ('/api/transacoes/resumo_mensal/?mes=5&ano=2025', '/api/async/transacoes/resumo_mensal/?mes=5&ano=2025'),
+            (
+                '/api/transacoes/resumo_mensal/?mes=5&ano=2025&search=compra&data_fim=2025-05-10',
+                '/api/async/transacoes/resumo_mensal/?mes=5&ano=2025&search=compra&data_fim=2025-05-10',
+            ),
+            ('/api/usuarios/me/', '/api/async/usuarios/me/'),
+        ]
+        for sincrono, assincrono in pares:
+            esperado = self.client.get(sincrono).json()
+            resposta = self.client.get(assincrono)
+            self.assertEqual(resposta.status_code, 200, assincrono)
+            dados = resposta.json()
+            for chave in ('next', 'previous'):
+                if dados.get(chave):
+                    dados[chave] = dados[chave].replace('/api/async/', '/api/')
+            self.assertEqual(dados, esperado, assincrono)
+    
+    def test_cache_de_respostas_pela_api_async_do_cache(self):
+        zerar_estatisticas_cache()
+        self.assertEqual(self.client.get('/api/async/contas/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/api/async/contas/')['X-Cache'], 'HIT')
+        estatisticas = estatisticas_cache()
+        self.assertEqual((estatisticas['hits'], estatisticas['misses']), (1, 1))
+    
+    def test_paginacao_por_cursor(self):
+        dados = self.client.get('/api/async/transacoes/?paginacao=cursor&page_size=10').json()
+        self.assertEqual(len(dados['results']), 10)
+        seguinte = self.client.get(dados['next']).json()
+        self.assertEqual(seguinte['results'][0]['descricao'], 'Compra 15')
+    
+    def test_jwt_e_etag(self):
+        self.assertEqual(self.client.get('/api/async/transacoes/?page=9').status_code, 404)
+        self.assertEqual(self.client.post('/api/async/usuarios/me/').status_code, 405)
+        
+        resposta = self.client.get('/api/async/usuarios/me/')
+        with self.assertNumQueries(1):
+            repetida = self.client.get('/api/async/usuarios/me/', HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(repetida.status_code, 304)
+        
+        anonimo = APIClient().get('/api/async/contas/')
+        self.assertEqual(anonimo.status_code, 401)
+        self.assertIn('Bearer', anonimo['WWW-Authenticate'])
+        
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalido')
+        resposta = self.client.get('/api/async/contas/')
+        self.assertEqual(resposta.status_code, 401)
+        self.assertEqual(resposta.json()['code'], 'token_not_valid')
+
+
+class GoogleStub(BaseHTTPRequestHandler):
+    """Servidor local no lugar do Google: token, userinfo e falhas programadas."""
+    protocol_version = 'HTTP/1.1'
+    
+    def responder(self, dados, status=200):
+        corpo = json.dumps(dados).encode('utf-8')
+        try:
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # cliente desistiu (timeout)
+    
+    def do_POST(self):
+        self.server.conexoes.add(self.client_address)
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.responder({'access_token': 'token-google'})
+    
+    def do_GET(self):
+        self.server.conexoes.add(self.client_address)
+        if self.server.falhas:
+            self.server.falhas -= 1
+            return self.responder({'error': 'indisponivel'}, status=503)
+        time.sleep(self.server.atraso)
+        self.responder({'email': 'helo@exemplo.com', 'given_name': 'Helo', 'name': 'Helo Lima'})
+    
+    def log_message(self, *args):
+        pass
+
+
+class ClienteGoogleTest(TestCase):
+    
+    def setUp(self):
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', 0), GoogleStub)
+        self.servidor.daemon_threads = True
+        self.servidor.conexoes, self.servidor.falhas, self.servidor.atraso = set(), 0, 0
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+        self.addCleanup(self.servidor.server_close)
+        self.addCleanup(self.servidor.shutdown)
+        
+        base = f'http://127.0.0.1:{self.servidor.server_port}'
+        configuracao = override_settings(
+            GOOGLE_OAUTH_TOKEN_URL=f'{base}/token',
+            GOOGLE_OAUTH_USERINFO_URL=f'{base}/userinfo',
+            GOOGLE_HTTP_TIMEOUT_LEITURA=0.3,
+            GOOGLE_HTTP_BACKOFF=0,
+        )
+        configuracao.enable()
+        self.addCleanup(configuracao.disable)
+        
+        fechar_cliente_google()
+        self.addCleanup(fechar_cliente_google)
+    
+    def test_login_reaproveita_conexao(self):
+        for _ in range(2):
+            resposta = self.client.get('/auth/google/callback/?code=abc&state=login')
+        
+        self.assertRedirects(resposta, '/home/', fetch_redirect_response=False)
+        self.assertEqual(Usuario.objects.get(email='helo@exemplo.com').first_name, 'Helo')
+        # Quatro chamadas (2 logins) numa única conexão keep-alive
+        self.assertEqual(len(self.servidor.conexoes), 1)
+        
+        metricas = cliente_google().metricas()
+        self.assertEqual(metricas['token']['chamadas'], 2)
+        self.assertEqual(metricas['userinfo']['erros'], 0)
+    
+    def test_repete_get_em_erro_do_servidor(self):
+        self.servidor.falhas = 2
+        self.assertEqual(cliente_google().dados_usuario('tk')['email'], 'helo@exemplo.com')
+        self.assertEqual(cliente_google().metricas()['userinfo']['chamadas'], 1)
+        
+        self.servidor.falhas = 5
+        with self.assertRaises(requests.HTTPError):
+            cliente_google().dados_usuario('tk')
+    
+    def test_timeout_de_leitura(self):
+        self.servidor.atraso = 2
+        inicio = time.monotonic()
+        with override_settings(GOOGLE_HTTP_TENTATIVAS=0):
+            fechar_cliente_google()
+            with self.assertRaises(requests.RequestException):
+                cliente_google().dados_usuario('tk')
+        
+        self.assertLess(time.monotonic() - inicio, 1.5)
+        self.assertEqual(cliente_google().metricas()['userinfo']['erros'], 1)
+        
+        # Falha no OAuth volta para o login em vez de prender a requisição
+        resposta = self.client.get('/auth/google/callback/?code=abc&state=login')
+        self.assertRedirects(resposta, '/?error=oauth_failed', fetch_redirect_response=False)
+
+
+class UsernameLivreTest(TestCase):
+    
+    def test_username_do_email_e_sufixo_na_colisao(self):
+        with CaptureQueriesContext(connection) as consultas:
+            primeiro = Usuario.objects.criar_com_username_livre('ivo@exemplo.com', first_name='Ivo')
+        self.assertEqual(primeiro.username, 'ivo')
+        self.assertFalse([q for q in consultas if 'COUNT(' in q['sql']])
+        
+        segundo = Usuario.objects.criar_com_username_livre('ivo@outro.com')
+        self.assertRegex(segundo.username, r'^ivo\d+$')
+        self.assertEqual(segundo.email, 'ivo@outro.com')
+        
+        self.assertEqual(Usuario.objects.criar_com_username_livre('+!#@x.com').username, '+')
+    
+    def test_cadastro_concorrente_tenta_outro_nome(self):
+        Usuario.objects.create(username='juca')
+        
+        # Outro cadastro grava "juca" entre a verificação e o INSERT
+        with mock.patch.object(QuerySet, 'exists', side_effect=[False, True, False]):
+            usuario = Usuario.objects.criar_com_username_livre('juca@exemplo.com')
+        
+        self.assertRegex(usuario.username, r'^juca\d+$')
+        self.assertEqual(Usuario.objects.filter(email='juca@exemplo.com').count(), 1)
+
+
+class RecursoPro(APIView):
+    permission_classes = [PlanoPro]
+    
+    def get(self, request):
+        return Response({'ok': True})
+
+
+class ClaimsPlanoTest(TestCase):
+    
+    def setUp(self):
+        usuarios_recentes.limpar()
+        self.usuario = Usuario.objects.create(
+            username='mel', plano='pro', data_expiracao_pro=timezone.now() + timedelta(days=30)
+        )
+        self.usuario.set_password('senha-segura-123')
+        self.usuario.save()
+    
+    def tokens(self):
+        resposta = APIClient().post('/api/token/', {'username': 'mel', 'password': 'senha-segura-123'}, format='json')
+        return resposta.json()
+    
+    def acessar_recurso_pro(self, access):
+        requisicao = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        return RecursoPro.as_view()(requisicao)
+    
+    def test_login_emite_claims_de_plano(self):
+        access = AccessToken(self.tokens()['access'])
+        self.assertEqual(access['plano'], 'pro')
+        self.assertEqual(access['data_expiracao_pro'], int(self.usuario.data_expiracao_pro.timestamp()))
+    
+    def test_permissao_pro_pelo_token(self):
+        tokens = self.tokens()
+        self.assertEqual(self.acessar_recurso_pro(tokens['access']).status_code, 200)
+        
+        # O token vale até o refresh, que relê o plano do banco
+        Usuario.objects.filter(pk=self.usuario.pk).update(plano='free')
+        self.assertEqual(self.acessar_recurso_pro(tokens['access']).status_code, 200)
+        
+        novo = APIClient().post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json').json()
+        self.assertEqual(AccessToken(novo['access'])['plano'], 'free')
+        resposta = self.acessar_recurso_pro(novo['access'])
+        self.assertEqual(resposta.status_code, 403)
+        self.assertEqual(resposta.data['detail'], PlanoPro.message)
+    
+    def test_pro_vencido_no_token(self):
+        Usuario.objects.filter(pk=self.usuario.pk).update(data_expiracao_pro=timezone.now() - timedelta(days=1))
+        self.assertEqual(self.acessar_recurso_pro(self.tokens()['access']).status_code, 403)
+    
+    def test_refresh_recusa_usuario_inativo(self):
+        tokens = self.tokens()
+        Usuario.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        resposta = APIClient().post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(resposta.status_code, 401)
+        
+        Usuario.objects.filter(pk=self.usuario.pk).delete()
+        resposta = APIClient().post('/api/token/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(resposta.status_code, 401)
+
+
+class UsuarioDoTokenTest(TestCase):
+    
+    def setUp(self):
+        usuarios_recentes.limpar()
+        self.usuario = Usuario.objects.create(
+            username='nina', plano='pro', data_expiracao_pro=timezone.now() + timedelta(days=30)
+        )
+        Conta.objects.create(usuario=self.usuario, nome='Carteira', tipo='dinheiro')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshTokenComPlano.for_user(self.usuario).access_token}')
+    
+    def consultas_usuario(self, url, metodo='get', **kwargs):
+        with CaptureQueriesContext(connection) as consultas:
+            resposta = getattr(self.client, metodo)(url, **kwargs)
+        self.assertLess(resposta.status_code, 300, url)
+        return [q['sql'] for q in consultas if 'FROM "core_usuario"' in q['sql']]
+    
+    def test_endpoints_sem_consulta_de_usuario(self):
+        self.assertEqual(self.consultas_usuario('/api/contas/'), [])
+        self.assertEqual(self.consultas_usuario('/api/transacoes/'), [])
+    
+    def test_campos_fora_das_claims_carregam_uma_vez(self):
+        self.assertEqual(len(self.consultas_usuario('/api/usuarios/me/')), 1)
+        # Linha completa fica no cache do processo
+        self.assertEqual(self.consultas_usuario('/api/usuarios/me/?x=1'), [])
+        self.assertEqual(self.consultas_usuario('/api/async/usuarios/me/'), [])
+        
+        # Escrita no usuário descarta o cache
+        Usuario.objects.filter(pk=self.usuario.pk).update(first_name='Nina')
+        self.usuario.save()
+        self.assertEqual(len(self.consultas_usuario('/api/usuarios/me/?x=2')), 1)
+    
+    def test_claims_defasadas_nao_sao_gravadas(self):
+        Usuario.objects.filter(pk=self.usuario.pk).update(plano='free')
+        self.client.patch('/api/usuarios/update_preferences/', {'dark_mode': True}, format='json')
+        
+        self.usuario.refresh_from_db()
+        self.assertEqual((self.usuario.plano, self.usuario.dark_mode), ('free', True))
+    
+    def test_usuario_inativo_no_cache(self):
+        self.client.get('/api/usuarios/me/')
+        Usuario.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        usuarios_recentes.guardar(
+            self.usuario.pk,
+            Usuario.objects.filter(pk=self.usuario.pk).values(*[c.attname for c in Usuario._meta.concrete_fields]).get()
+        )
+        self.assertEqual(self.client.get('/api/contas/').status_code, 401)
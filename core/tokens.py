@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def adicionar_claims_plano(token, usuario):
+    """Grava plano e data_expiracao_pro (epoch em segundos ou None) no token."""
+    token['plano'] = usuario.plano
+    token['data_expiracao_pro'] = (
+        int(usuario.data_expiracao_pro.timestamp()) if usuario.data_expiracao_pro else None
+    )
+    return token
+
+
+class RefreshTokenComPlano(RefreshToken):
+    """
+    Refresh token com as claims de plano; o access token herda as claims
+    (RefreshToken.access_token copia tudo menos exp/jti/iat/token_type).
+    """
+    
+    @classmethod
+    def for_user(cls, usuario):
+        return adicionar_claims_plano(super().for_user(usuario), usuario)
@@ -0,0 +1,201 @@
+import hashlib
+import secrets
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+from .models import ContadorVersao
+
+
+def chave_versao(usuario_id):
+    return f'dados_usuario:{usuario_id}:versao'
+
+
+def versoes(chaves):
+    """
+    Números atuais dos contadores (0 para quem nunca mudou), numa consulta pela PK.
+    Ficam no banco, não no cache do Django: uma escrita feita por um processo
+    vale para todos os outros, qualquer que seja o backend de cache.
+    """
+    numeros = dict(ContadorVersao.objects.filter(chave__in=chaves).values_list('chave', 'numero'))
+    return [numeros.get(chave, 0) for chave in chaves]
+
+
+async def aversoes(chaves):
+    numeros = {
+        chave: numero
+        async for chave, numero in ContadorVersao.objects.filter(chave__in=chaves).values_list('chave', 'numero')
+    }
+    return [numeros.get(chave, 0) for chave in chaves]
+
+
+def incrementar_versoes(chaves):
+    """
+    UPDATE numero = numero + 1 na transação corrente: a versão muda no commit,
+    junto com os dados. Contadores novos começam num número aleatório, para que
+    um banco recriado não reaproveite entradas antigas do cache de respostas.
+    """
+    chaves = list(dict.fromkeys(chaves))
+    if not chaves:
+        return
+    
+    contadores = ContadorVersao.objects.filter(chave__in=chaves)
+    if contadores.update(numero=F('numero') + 1) < len(chaves):
+        ContadorVersao.objects.bulk_create(
+            [ContadorVersao(chave=chave, numero=secrets.randbits(48)) for chave in chaves],
+            ignore_conflicts=True
+        )
+        # Outro processo pode ter criado a linha ao mesmo tempo: incrementa de novo
+        contadores.update(numero=F('numero') + 1)
+
+
+def chaves_etag(usuario_id):
+    from transacoes.categorias import CHAVE_VERSAO as VERSAO_CATEGORIAS_PADRAO
+    return [chave_versao(usuario_id), VERSAO_CATEGORIAS_PADRAO]
+
+
+def montar_etag(usuario_id, numeros, caminho, tipo_midia=''):
+    # O id entra no hash: usuários sem contador ficam todos na versão 0
+    partes = [str(usuario_id)] + [str(numero) for numero in numeros] + [caminho, tipo_midia]
+    return hashlib.md5(':'.join(partes).encode('utf-8')).hexdigest()
+
+
+def calcular_etag(usuario_id, caminho, tipo_midia=''):
+    """Hash do usuário, da versão dele, da versão das categorias padrão, da URL e do formato."""
+    return montar_etag(usuario_id, versoes(chaves_etag(usuario_id)), caminho, tipo_midia)
+
+
+async def acalcular_etag(usuario_id, caminho, tipo_midia=''):
+    return montar_etag(usuario_id, await aversoes(chaves_etag(usuario_id)), caminho, tipo_midia)
+
+
+def chave_resposta(usuario_id, etag):
+    return f'resposta:{usuario_id}:{etag}'
+
+
+def invalidar_dados_usuarios(usuario_ids):
+    """Nova versão dos dados de cada usuário (invalida ETags e respostas em cache)."""
+    incrementar_versoes(chave_versao(usuario_id) for usuario_id in usuario_ids if usuario_id is not None)
+
+
+def invalidar_dados_usuario(usuario_id):
+    invalidar_dados_usuarios([usuario_id])
+
+
+CHAVES_ESTATISTICAS = {
+    'hits': 'cache_respostas:hits',
+    'misses': 'cache_respostas:misses',
+}
+
+
+def contar(evento):
+    chave = CHAVES_ESTATISTICAS[evento]
+    cache.add(chave, 0, timeout=None)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        # Entrada despejada entre o add e o incr
+        cache.set(chave, 1, timeout=None)
+
+
+async def acontar(evento):
+    """Versão assíncrona de contar (API async do cache: não prende o event loop)."""
+    chave = CHAVES_ESTATISTICAS[evento]
+    await cache.aadd(chave, 0, timeout=None)
+    try:
+        await cache.aincr(chave)
+    except ValueError:
+        await cache.aset(chave, 1, timeout=None)
+
+
+def estatisticas_cache():
+    """Contadores de hit/miss do cache de respostas (somados entre processos se o cache for compartilhado)."""
+    valores = cache.get_many(CHAVES_ESTATISTICAS.values())
+    dados = {evento: valores.get(chave, 0) for evento, chave in CHAVES_ESTATISTICAS.items()}
+    total = dados['hits'] + dados['misses']
+    dados['taxa_acerto'] = round(dados['hits'] / total, 4) if total else None
+    dados['backend'] = settings.CACHES['default']['BACKEND']
+    return dados
+
+
+def zerar_estatisticas_cache():
+    cache.delete_many(CHAVES_ESTATISTICAS.values())
+
+
+class NaoModificado(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = ''
+
+
+class RespostaEmCache(APIException):
+    """Interrompe a view antes das consultas quando a resposta já está no cache."""
+    status_code = status.HTTP_200_OK
+    
+    def __init__(self, dados):
+        self.dados = dados
+
+
+class VersaoDadosMixin:
+    """
+    ETag / GET condicional para views de leitura.
+    O ETag sai da versão dos dados do usuário (+ categorias padrão) e da URL,
+    então um If-None-Match igual responde 304 só com a leitura das versões.
+    `acoes_com_etag` limita as actions (None = todos os GET).
+    
+    `acoes_em_cache` lista as actions (ou 'get' em APIViews) cujo corpo fica no cache
+    do Django sob o próprio ETag: como a versão do usuário (no banco) entra na chave,
+    qualquer escrita dele, em qualquer processo, invalida só as entradas dele.
+    """
+    acoes_com_etag = None
+    acoes_em_cache = ()
+    
+    def calcular_etag(self, request):
+        return calcular_etag(request.user.pk, request.get_full_path(), getattr(request, 'accepted_media_type', ''))
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        
+        self.etag = self.chave_cache = self.status_cache = None
+        if request.method not in ('GET', 'HEAD') or not request.user.is_authenticated:
+            return
+        if self.acoes_com_etag is not None and getattr(self, 'action', None) not in self.acoes_com_etag:
+            return
+        
+        self.etag = f'"{self.calcular_etag(request)}"'
+        if self.etag in parse_etags(request.headers.get('If-None-Match', '')):
+            raise NaoModificado()
+        
+        if request.method == 'GET' and getattr(self, 'action', 'get') in self.acoes_em_cache:
+            self.chave_cache = chave_resposta(request.user.pk, self.etag)
+            dados = cache.get(self.chave_cache)
+            self.status_cache = 'MISS' if dados is None else 'HIT'
+            contar('misses' if dados is None else 'hits')
+            if dados is not None:
+                raise RespostaEmCache(dados)
+    
+    def handle_exception(self, exc):
+        if isinstance(exc, NaoModificado):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        if isinstance(exc, RespostaEmCache):
+            self.chave_cache = None
+            return Response(exc.dados)
+        return super().handle_exception(exc)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            # Navegador revalida sempre (If-None-Match) e reaproveita o corpo no 304
+            response['Cache-Control'] = 'private, no-cache'
+            response['Vary'] = 'Authorization'
+        
+        if getattr(self, 'status_cache', None):
+            response['X-Cache'] = self.status_cache
+        if getattr(self, 'chave_cache', None) and response.status_code == 200:
+            cache.set(self.chave_cache, response.data, timeout=settings.CACHE_RESPOSTAS_TIMEOUT)
+        
+        return response
@@ -1,18 +1,28 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
+from rest_framework.views import APIView
 from .models import Usuario
 from .serializers import UsuarioSerializer, UsuarioCreateSerializer
+from django.db.models import F, Q
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.utils import timezone
+from contas.models import Conta
+from contas.serializers import ContaListSerializer
+from transacoes.categorias import listar_categorias
+from transacoes.models import Transacao, ResumoMensal
+from transacoes.serializers import CategoriaSerializer, TransacaoListSerializer
+from .versao import VersaoDadosMixin, estatisticas_cache
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(VersaoDadosMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar usuários.
     """
     queryset = Usuario.objects.all()
     serializer_class = UsuarioSerializer
+    acoes_com_etag = ['me']
     
     def get_permissions(self):
         """Apenas 'create' é público, resto precisa autenticação."""
@@ -47,6 +57,56 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(usuario)
         return Response(serializer.data)
     
+class DashboardView(VersaoDadosMixin, APIView):
+    """
+    Tudo que o dashboard precisa em uma chamada, com número fixo de consultas:
+    usuário, contas com saldo, categorias, resumo do mês e últimas transações.
+    Query params: mes, ano, conta (opcional), limite (últimas transações, padrão 10)
+    """
+    permission_classes = [IsAuthenticated]
+    acoes_em_cache = ['get']
+    
+    def get(self, request):
+        usuario = request.user
+        mes = int(request.query_params.get('mes', timezone.now().month))
+        ano = int(request.query_params.get('ano', timezone.now().year))
+        conta = request.query_params.get('conta')
+        
+        try:
+            limite = min(max(int(request.query_params.get('limite', 10)), 1), 50)
+        except ValueError:
+            limite = 10
+        
+        contas = Conta.objects.filter(usuario=usuario).com_saldo()
+        
+        ultimas = Transacao.objects.filter(usuario=usuario)
+        if conta:
+            ultimas = ultimas.filter(Q(conta_origem_id=conta) | Q(conta_destino_id=conta))
+        ultimas = ultimas.values(
+            'id', 'tipo', 'descricao', 'valor', 'data',
+            **{
+                nome: F(caminho)
+                for nome, caminho in TransacaoListSerializer.CAMPOS_CONSULTA.items()
+            }
+        )[:limite]
+        
+        return Response({
+            'usuario': UsuarioSerializer(usuario, context={'request': request}).data,
+            'contas': ContaListSerializer(contas, many=True).data,
+            'categorias': CategoriaSerializer(listar_categorias(usuario), many=True).data,
+            'resumo_mensal': ResumoMensal.resumo_do_mes(usuario, ano, mes, conta_id=conta),
+            'ultimas_transacoes': TransacaoListSerializer(ultimas, many=True).data,
+        })
+
+
+class EstatisticasCacheView(APIView):
+    """Hits/misses do cache de respostas (somente administradores)."""
+    permission_classes = [IsAdminUser]
+    
+    def get(self, request):
+        return Response(estatisticas_cache())
+
+
 # Views para servir templates
 def login_view(request):
     """Página de login."""
@@ -287,8 +287,45 @@ const TransacoesAPI = {
         return response && response.ok;
     },
     
-    async resumoMensal(mes, ano) {
-        const response = await fetchAPI(`/transacoes/resumo_mensal/?mes=${mes}&ano=${ano}`);
+    async resumoMensal(mes, ano, conta = null) {
+        let url = `/transacoes/resumo_mensal/?mes=${mes}&ano=${ano}`;
+        if (conta) {
+            url += `&conta=${conta}`;
+        }
+        
+        const response = await fetchAPI(url);
+        if (response && response.ok) {
+            return await response.json();
+        }
+        return null;
+    },
+    
+    async serieTemporal(filtros = {}) {
+        let url = '/transacoes/serie_temporal/?';
+        
+        Object.keys(filtros).forEach(key => {
+            if (filtros[key]) {
+                url += `${key}=${filtros[key]}&`;
+            }
+        });
+        
+        const response = await fetchAPI(url);
+        if (response && response.ok) {
+            return await response.json();
+        }
+        return null;
+    }
+};
+
+// API do Dashboard
+const DashboardAPI = {
+    async carregar(mes, ano, conta = null) {
+        let url = `/dashboard/?mes=${mes}&ano=${ano}`;
+        if (conta) {
+            url += `&conta=${conta}`;
+        }
+        
+        const response = await fetchAPI(url);
         if (response && response.ok) {
             return await response.json();
         }
@@ -45,93 +45,35 @@ function showToast(message, type = 'success') {
 // ===== INICIALIZAÇÃO =====
 async function init() {
     console.log('[DASHBOARD] Inicializando...');
-    await carregarUsuario();
-    await carregarContas();
-    await carregarCategorias();
-    await carregarTodasTransacoes();
-    await carregarResumoMensal();
-    await carregarUltimasTransacoes();
+    await carregarDashboard();
 }
 
 // ===== CARREGAR DADOS =====
-async function carregarUsuario() {
-    const usuario = await AuthAPI.getMe();
-    if (usuario) {
-        state.usuario = usuario;
-        const userName = document.getElementById('user-name');
-        if (userName) {
-            userName.textContent = usuario.first_name || usuario.username;
-        }
+// Uma única chamada traz usuário, contas, categorias, resumo do mês e últimas transações
+async function carregarDashboard() {
+    const contaId = state.contaSelecionada ? state.contaSelecionada.id : null;
+    const dados = await DashboardAPI.carregar(state.mesAtual, state.anoAtual, contaId);
+    if (!dados) return;
+    
+    state.usuario = dados.usuario;
+    state.contas = dados.contas || [];
+    state.categorias = dados.categorias || [];
+    state.resumoMensal = dados.resumo_mensal;
+    state.transacoes = dados.ultimas_transacoes || [];
+    
+    if (contaId) {
+        state.contaSelecionada = state.contas.find(c => c.id === contaId) || null;
     }
-}
-
-async function carregarContas() {
-    const response = await ContasAPI.listar();
-    state.contas = Array.isArray(response) ? response : (response.results || []);
-    state.contaSelecionada = null;
-    renderizarContas();
-}
-
-async function carregarCategorias() {
-    const response = await CategoriasAPI.listar();
-    state.categorias = Array.isArray(response) ? response : (response.results || []);
-}
-
-async function carregarTodasTransacoes() {
-    const response = await TransacoesAPI.listar({
-        ordering: '-data,-created_at'
-    });
-    state.transacoes = Array.isArray(response) ? response : (response.results || []);
-}
-
-async function carregarResumoMensal() {
-    let resumo;
-    
-    if (state.contaSelecionada) {
-        const transacoesDoMes = state.transacoes.filter(t => {
-            const data = new Date(t.data);
-            return data.getMonth() + 1 === state.mesAtual && 
-                   data.getFullYear() === state.anoAtual;
-        });
-        
-        const transacoesDaConta = transacoesDoMes.filter(t => 
-            t.conta_origem === state.contaSelecionada.id || 
-            t.conta_destino === state.contaSelecionada.id
-        );
-        
-        const receitas = transacoesDaConta
-            .filter(t => t.tipo === 'receita' && t.conta_origem === state.contaSelecionada.id)
-            .reduce((acc, t) => acc + parseFloat(t.valor), 0);
-        
-        const despesas = transacoesDaConta
-            .filter(t => t.tipo === 'despesa' && t.conta_origem === state.contaSelecionada.id)
-            .reduce((acc, t) => acc + parseFloat(t.valor), 0);
-        
-        const transferenciasRecebidas = transacoesDaConta
-            .filter(t => t.tipo === 'transferencia' && t.conta_destino === state.contaSelecionada.id)
-            .reduce((acc, t) => acc + parseFloat(t.valor), 0);
-        
-        const transferenciasEnviadas = transacoesDaConta
-            .filter(t => t.tipo === 'transferencia' && t.conta_origem === state.contaSelecionada.id)
-            .reduce((acc, t) => acc + parseFloat(t.valor), 0);
-        
-        const saldo = receitas - despesas + transferenciasRecebidas - transferenciasEnviadas;
-        
-        resumo = {
-            mes: state.mesAtual,
-            ano: state.anoAtual,
-            receitas: receitas,
-            despesas: despesas,
-            saldo: saldo,
-            gastos_por_categoria: []
-        };
-    } else {
-        resumo = await TransacoesAPI.resumoMensal(state.mesAtual, state.anoAtual);
+    
+    const userName = document.getElementById('user-name');
+    if (userName && state.usuario) {
+        userName.textContent = state.usuario.first_name || state.usuario.username;
     }
     
-    state.resumoMensal = resumo;
+    renderizarContas();
     renderizarResumoMensal();
     renderizarGrafico();
+    await carregarUltimasTransacoes();
 }
 
 async function carregarUltimasTransacoes() {
@@ -188,8 +130,7 @@ function calcularSaldoTotal() {
 async function selecionarConta(contaId) {
     state.contaSelecionada = contaId ? state.contas.find(c => c.id === contaId) : null;
     renderizarContas();
-    await carregarResumoMensal();
-    carregarUltimasTransacoes();
+    await carregarDashboard();
 }
 
 function renderizarResumoMensal() {
@@ -218,12 +159,7 @@ function renderizarResumoMensal() {
         saldoMes.textContent = Formatters.moeda(state.resumoMensal.saldo);
     }
     
-    const totalTransacoes = state.contaSelecionada 
-        ? state.transacoes.filter(t => 
-            t.conta_origem === state.contaSelecionada.id || 
-            t.conta_destino === state.contaSelecionada.id
-          ).length
-        : state.transacoes.length;
+    const totalTransacoes = state.resumoMensal.quantidade || 0;
     
     const contador = document.getElementById('contadorTransacoes');
     if (contador) {
@@ -294,14 +230,8 @@ function renderizarUltimasTransacoes() {
     const container = document.getElementById('ultimasTransacoes');
     if (!container) return;
     
-    let transacoesFiltradas = state.transacoes;
-    
-    if (state.contaSelecionada) {
-        transacoesFiltradas = state.transacoes.filter(t => 
-            t.conta_origem === state.contaSelecionada.id || 
-            t.conta_destino === state.contaSelecionada.id
-        );
-    }
+    // O servidor já filtra pela conta selecionada
+    const transacoesFiltradas = state.transacoes;
     
     if (transacoesFiltradas.length === 0) {
         container.innerHTML = '<p style="text-align: center; color: #666;">Nenhuma transação registrada</p>';
@@ -476,10 +406,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 showToast('Transação criada com sucesso!', 'success');
                 
                 // Recarregar dados
-                await carregarContas();
-                await carregarTodasTransacoes();
-                await carregarResumoMensal();
-                carregarUltimasTransacoes();
+                await carregarDashboard();
             } else {
                 showToast('Erro ao criar transação', 'error');
                 console.error('Erro:', result.error);
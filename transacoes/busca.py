@@ -0,0 +1,80 @@
+import re
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+
+def termos_busca(texto):
+    """Quebra o texto de busca em palavras (letras/dígitos, com acentos)."""
+    return re.findall(r'\w+', texto or '')
+
+
+class BuscaTransacaoFilter(filters.SearchFilter):
+    """
+    Busca textual em descricao/observacoes usando índice full-text.
+    - SQLite: tabela FTS5 `transacoes_transacao_fts` (migração 0003), ranking bm25.
+    - PostgreSQL: índice GIN sobre tsvector 'pt_unaccent', ranking ts_rank.
+    Prefixo em todos os termos ("merc" encontra "Mercado") e sem diferenciar acentos.
+    Outros bancos caem no SearchFilter padrão (icontains).
+    Sem `ordering` explícito, os resultados vêm ordenados por relevância.
+    """
+    
+    def filter_queryset(self, request, queryset, view):
+        termos = termos_busca(request.query_params.get(self.search_param, ''))
+        if not termos:
+            return queryset
+        
+        vendor = connection.vendor
+        if vendor == 'sqlite':
+            queryset, relevancia = self.buscar_sqlite(queryset, termos)
+        elif vendor == 'postgresql':
+            queryset, relevancia = self.buscar_postgres(queryset, termos)
+        else:
+            return super().filter_queryset(request, queryset, view)
+        
+        if not request.query_params.get(filters.OrderingFilter.ordering_param):
+            queryset = queryset.annotate(relevancia=relevancia).order_by('-relevancia', '-data', '-created_at')
+        
+        return queryset
+    
+    def buscar_sqlite(self, queryset, termos):
+        # "termo"* = prefixo; aspas evitam que a entrada seja lida como sintaxe FTS5
+        consulta = ' '.join('"%s"*' % termo.replace('"', '""') for termo in termos)
+        tabela = queryset.model._meta.db_table
+        
+        queryset = queryset.filter(
+            id__in=RawSQL(
+                'SELECT rowid FROM transacoes_transacao_fts WHERE transacoes_transacao_fts MATCH %s',
+                [consulta]
+            )
+        )
+        
+        # bm25 é menor quanto mais relevante: inverte o sinal
+        relevancia = RawSQL(
+            'SELECT -bm25(transacoes_transacao_fts) FROM transacoes_transacao_fts '
+            'WHERE transacoes_transacao_fts MATCH %%s AND rowid = "%s"."id"' % tabela,
+            [consulta],
+            output_field=FloatField()
+        )
+        return queryset, relevancia
+    
+    def buscar_postgres(self, queryset, termos):
+        # Mesma expressão do índice GIN para que ele seja usado
+        documento = (
+            "to_tsvector('pt_unaccent'::regconfig, "
+            "coalesce(descricao, '') || ' ' || coalesce(observacoes, ''))"
+        )
+        tsquery = "to_tsquery('pt_unaccent'::regconfig, %s)"
+        consulta = ' & '.join('%s:*' % termo for termo in termos)
+        
+        queryset = queryset.alias(
+            encontrada=RawSQL('%s @@ %s' % (documento, tsquery), [consulta], output_field=BooleanField())
+        ).filter(encontrada=True)
+        
+        relevancia = RawSQL(
+            'ts_rank(%s, %s)' % (documento, tsquery),
+            [consulta],
+            output_field=FloatField()
+        )
+        return queryset, relevancia
@@ -0,0 +1,45 @@
+import threading
+from core.versao import incrementar_versoes, versoes
+from .models import Categoria
+
+
+# Contador no banco (core.ContadorVersao), incrementado na transação da escrita:
+# todos os processos veem a troca junto com os dados
+CHAVE_VERSAO = 'categorias_padrao:versao'
+
+_lock = threading.Lock()
+_cache_local = {
+    'versao': None,
+    'categorias': (),
+}
+
+
+def categorias_padrao():
+    """
+    Categorias padrão do sistema, guardadas em memória no processo.
+    Cada chamada lê a versão uma única vez (consulta pela PK); a lista é
+    recarregada do banco quando ela muda.
+    """
+    versao, = versoes([CHAVE_VERSAO])
+    
+    if _cache_local['versao'] != versao:
+        with _lock:
+            if _cache_local['versao'] != versao:
+                # Grava a versão lida antes da carga (sem reler): se ela mudar
+                # durante a consulta, a próxima chamada recarrega
+                _cache_local['categorias'] = tuple(Categoria.objects.filter(padrao=True))
+                _cache_local['versao'] = versao
+    
+    return _cache_local['categorias']
+
+
+def invalidar_categorias_padrao():
+    incrementar_versoes([CHAVE_VERSAO])
+
+
+def listar_categorias(usuario):
+    """Categorias padrão (da memória) + categorias do usuário (uma consulta), ordenadas."""
+    categorias = list(categorias_padrao())
+    categorias += Categoria.objects.filter(usuario=usuario, padrao=False)
+    categorias.sort(key=lambda categoria: (categoria.tipo, categoria.nome))
+    return categorias
@@ -0,0 +1,263 @@
+import codecs
+import csv
+import io
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.db.models import Q
+from contas.models import Conta
+from core.versao import invalidar_dados_usuario
+from .models import Categoria, Transacao
+
+
+TAMANHO_LOTE = 500
+
+OFX_TAG = re.compile(r'<(/?)(\w+)>([^<\r\n]*)')
+
+# Milhar no formato brasileiro sem centavos: 1.000, 12.345.678
+MILHAR_SEM_CENTAVOS = re.compile(r'[+-]?\d{1,3}(\.\d{3})+')
+
+
+class ErroLinha(Exception):
+    """Erro de validação de uma linha do extrato."""
+    
+    def __init__(self, erros):
+        super().__init__(erros)
+        self.erros = erros
+
+
+# ===== LEITURA (STREAMING) =====
+
+def abrir_texto(arquivo):
+    """Abre o upload como texto sem carregar tudo na memória (UTF-8 com fallback latin-1)."""
+    arquivo = getattr(arquivo, 'file', arquivo)
+    arquivo.seek(0)
+    inicio = arquivo.read(4096)
+    arquivo.seek(0)
+    
+    try:
+        # Decodificador incremental: um caractere cortado no fim da amostra não é erro
+        codecs.getincrementaldecoder('utf-8-sig')().decode(inicio, final=False)
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError:
+        encoding = 'latin-1'
+    
+    return io.TextIOWrapper(arquivo, encoding=encoding, newline='')
+
+
+def ler_csv(texto):
+    """
+    Gera (numero_linha, dados) de um CSV com cabeçalho.
+    Colunas: data, descricao, valor, tipo, categoria, conta, conta_destino, observacoes.
+    """
+    amostra = texto.read(4096)
+    texto.seek(0)
+    
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+    except csv.Error:
+        dialeto = csv.excel
+    
+    leitor = csv.DictReader(texto, dialect=dialeto)
+    leitor.fieldnames = [(campo or '').strip().lower() for campo in leitor.fieldnames or []]
+    
+    for linha in leitor:
+        yield leitor.line_num, {
+            chave: (valor or '').strip()
+            for chave, valor in linha.items()
+            if chave
+        }
+
+
+def ler_ofx(texto):
+    """Gera (numero_transacao, dados) de cada <STMTTRN> de um extrato OFX (SGML ou XML)."""
+    atual = None
+    numero = 0
+    
+    for linha in texto:
+        for fechamento, tag, valor in OFX_TAG.findall(linha):
+            tag = tag.upper()
+            
+            if tag == 'STMTTRN':
+                if fechamento and atual is not None:
+                    yield numero, atual
+                    atual = None
+                elif not fechamento:
+                    numero += 1
+                    atual = {}
+            elif atual is not None and not fechamento:
+                atual[tag] = valor.strip()
+    
+    if atual:
+        yield numero, atual
+
+
+def dados_ofx(registro):
+    """Converte um <STMTTRN> para o formato de linha do CSV."""
+    data = registro.get('DTPOSTED', '')[:8]
+    if len(data) == 8:
+        data = f"{data[:4]}-{data[4:6]}-{data[6:]}"
+    
+    return {
+        'data': data,
+        'descricao': registro.get('MEMO') or registro.get('NAME', ''),
+        # OFX usa ponto decimal: com vírgula, '1.000' não vira milhar em converter_valor
+        'valor': registro.get('TRNAMT', '').replace('.', ','),
+    }
+
+
+# ===== VALIDAÇÃO =====
+
+def converter_data(texto):
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%d/%m/%y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValueError(texto)
+
+
+def converter_valor(texto):
+    texto = texto.replace('R$', '').replace(' ', '')
+    if ',' in texto:
+        # Formato brasileiro: 1.234,56
+        texto = texto.replace('.', '').replace(',', '.')
+    elif MILHAR_SEM_CENTAVOS.fullmatch(texto):
+        texto = texto.replace('.', '')
+    valor = Decimal(texto)
+    # Decimal aceita 'NaN' e 'Infinity', que quebram as comparações da validação
+    if not valor.is_finite():
+        raise InvalidOperation(texto)
+    return valor
+
+
+class ImportadorTransacoes:
+    """
+    Importa linhas de extrato para um usuário.
+    Contas e categorias são carregadas uma única vez; as linhas são validadas
+    em memória e gravadas com bulk_create em lotes de TAMANHO_LOTE, todas
+    numa única transação: ou o extrato entra inteiro, ou nada entra.
+    """
+    
+    def __init__(self, usuario, conta_padrao=None):
+        self.usuario = usuario
+        self.conta_padrao = conta_padrao
+        
+        contas = list(Conta.objects.filter(usuario=usuario))
+        self.contas_por_id = {str(conta.id): conta for conta in contas}
+        self.contas_por_nome = {conta.nome.lower(): conta for conta in contas}
+        
+        self.categorias = {}
+        categorias = Categoria.objects.filter(Q(usuario=usuario) | Q(padrao=True))
+        for categoria in categorias:
+            self.categorias[(str(categoria.id), categoria.tipo)] = categoria
+            # Categoria do usuário tem prioridade sobre a padrão de mesmo nome
+            chave = (categoria.nome.lower(), categoria.tipo)
+            if chave not in self.categorias or categoria.usuario_id:
+                self.categorias[chave] = categoria
+        
+        self.importadas = 0
+        self.erros = []
+    
+    def resolver_conta(self, referencia):
+        if not referencia:
+            return self.conta_padrao
+        return self.contas_por_id.get(referencia) or self.contas_por_nome.get(referencia.lower())
+    
+    def validar(self, dados):
+        erros = {}
+        
+        try:
+            data = converter_data(dados.get('data', ''))
+        except ValueError:
+            erros['data'] = 'Data inválida.'
+            data = None
+        
+        try:
+            valor = converter_valor(dados.get('valor', ''))
+        except InvalidOperation:
+            erros['valor'] = 'Valor inválido.'
+            valor = None
+        
+        tipo = (dados.get('tipo') or '').lower()
+        if not tipo and valor is not None:
+            tipo = 'despesa' if valor < 0 else 'receita'
+        if tipo not in dict(Transacao.TIPO_CHOICES):
+            erros['tipo'] = 'Tipo inválido.'
+        
+        if valor is not None:
+            valor = abs(valor)
+            if valor == 0 or valor.as_tuple().exponent < -2 or valor >= Decimal('1e10'):
+                erros['valor'] = 'Valor inválido.'
+        
+        descricao = dados.get('descricao', '')
+        if not descricao:
+            erros['descricao'] = 'Descrição obrigatória.'
+        elif len(descricao) > 200:
+            erros['descricao'] = 'Descrição com mais de 200 caracteres.'
+        
+        conta_origem = self.resolver_conta(dados.get('conta'))
+        if conta_origem is None:
+            erros['conta'] = 'Conta não encontrada.'
+        
+        conta_destino = None
+        categoria = None
+        if tipo == 'transferencia':
+            conta_destino = self.resolver_conta(dados.get('conta_destino')) if dados.get('conta_destino') else None
+            if conta_destino is None:
+                erros['conta_destino'] = 'Transferência precisa de conta de destino.'
+            elif conta_destino == conta_origem:
+                erros['conta_destino'] = 'Não pode transferir para a mesma conta.'
+        elif dados.get('categoria'):
+            categoria = self.categorias.get((dados['categoria'].lower(), tipo))
+            if categoria is None:
+                erros['categoria'] = 'Categoria não encontrada.'
+        
+        if erros:
+            raise ErroLinha(erros)
+        
+        return Transacao(
+            usuario=self.usuario,
+            tipo=tipo,
+            conta_origem=conta_origem,
+            conta_destino=conta_destino,
+            categoria=categoria,
+            descricao=descricao,
+            valor=valor,
+            data=data,
+            observacoes=dados.get('observacoes', ''),
+        )
+    
+    def gravar(self, lote):
+        criadas = Transacao.objects.bulk_create(lote)
+        Transacao.atualizar_agregados_em_lote(criadas)
+        self.importadas += len(criadas)
+    
+    def importar(self, linhas):
+        """Processa um iterável de (numero, dados). Retorna o relatório."""
+        lote = []
+        
+        with transaction.atomic():
+            for numero, dados in linhas:
+                try:
+                    lote.append(self.validar(dados))
+                except ErroLinha as erro:
+                    self.erros.append({'linha': numero, 'erros': erro.erros})
+                    continue
+                
+                if len(lote) >= TAMANHO_LOTE:
+                    self.gravar(lote)
+                    lote = []
+            
+            if lote:
+                self.gravar(lote)
+            
+            # bulk_create não dispara sinais: invalida os ETags no mesmo commit
+            if self.importadas:
+                invalidar_dados_usuario(self.usuario.pk)
+        
+        return {
+            'importadas': self.importadas,
+            'erros': self.erros,
+        }
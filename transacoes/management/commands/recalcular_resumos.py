@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from transacoes.models import ResumoMensal
+
+
+class Command(BaseCommand):
+    """
+    Reconstrói o resumo mensal (ResumoMensal) a partir das transações.
+    Uso: python manage.py recalcular_resumos [--usuario ID]
+    """
+    help = 'Reconstrói o resumo mensal das transações.'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--usuario',
+            type=int,
+            help='Limita a reconstrução a um usuário.'
+        )
+    
+    def handle(self, *args, **options):
+        linhas = ResumoMensal.reconstruir(usuario_id=options['usuario'])
+        self.stdout.write(self.style.SUCCESS(f"Resumo mensal reconstruído: {linhas} linha(s)."))
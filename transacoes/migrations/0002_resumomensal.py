@@ -0,0 +1,62 @@
+# Generated by Django 5.2.8 on 2026-10-18 16:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def popular_resumos(apps, schema_editor):
+    """Preenche o resumo mensal com as transações já existentes."""
+    Transacao = apps.get_model('transacoes', 'Transacao')
+    ResumoMensal = apps.get_model('transacoes', 'ResumoMensal')
+    
+    grupos = Transacao.objects.annotate(
+        ano=ExtractYear('data'),
+        mes=ExtractMonth('data')
+    ).values(
+        'usuario_id', 'ano', 'mes', 'tipo', 'categoria_id', 'conta_origem_id', 'conta_destino_id'
+    ).annotate(
+        soma=Sum('valor'),
+        quantidade=Count('id')
+    ).order_by()
+    
+    ResumoMensal.objects.bulk_create(
+        (ResumoMensal(valor=grupo.pop('soma'), **grupo) for grupo in grupos.iterator()),
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contas', '0003_saldoconta'),
+        ('transacoes', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumoMensal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ano', models.PositiveSmallIntegerField()),
+                ('mes', models.PositiveSmallIntegerField()),
+                ('tipo', models.CharField(choices=[('receita', 'Receita'), ('despesa', 'Despesa'), ('transferencia', 'Transferência')], max_length=15)),
+                ('valor', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantidade', models.IntegerField(default=0)),
+                ('categoria', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resumos_mensais', to='transacoes.categoria')),
+                ('conta_destino', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='resumos_entrada', to='contas.conta')),
+                ('conta_origem', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_saida', to='contas.conta')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumos_mensais', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal',
+                'verbose_name_plural': 'Resumos Mensais',
+                'ordering': ['-ano', '-mes'],
+                'indexes': [models.Index(fields=['usuario', 'ano', 'mes'], name='transacoes__usuario_ab2b57_idx')],
+            },
+        ),
+        migrations.RunPython(popular_resumos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,97 @@
+from django.db import migrations
+
+
+# SQLite: tabela FTS5 com conteúdo externo, sincronizada por triggers.
+# Atenção: migrações que recriam transacoes_transacao no SQLite descartam os
+# triggers; nesse caso, reexecute SQLITE_CRIAR na nova migração.
+SQLITE_CRIAR = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS transacoes_transacao_fts USING fts5(
+        descricao,
+        observacoes,
+        content='transacoes_transacao',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transacoes_transacao_fts_ai
+    AFTER INSERT ON transacoes_transacao BEGIN
+        INSERT INTO transacoes_transacao_fts(rowid, descricao, observacoes)
+        VALUES (new.id, new.descricao, new.observacoes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transacoes_transacao_fts_ad
+    AFTER DELETE ON transacoes_transacao BEGIN
+        INSERT INTO transacoes_transacao_fts(transacoes_transacao_fts, rowid, descricao, observacoes)
+        VALUES ('delete', old.id, old.descricao, old.observacoes);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS transacoes_transacao_fts_au
+    AFTER UPDATE OF descricao, observacoes ON transacoes_transacao BEGIN
+        INSERT INTO transacoes_transacao_fts(transacoes_transacao_fts, rowid, descricao, observacoes)
+        VALUES ('delete', old.id, old.descricao, old.observacoes);
+        INSERT INTO transacoes_transacao_fts(rowid, descricao, observacoes)
+        VALUES (new.id, new.descricao, new.observacoes);
+    END
+    """,
+    "INSERT INTO transacoes_transacao_fts(transacoes_transacao_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REMOVER = [
+    "DROP TRIGGER IF EXISTS transacoes_transacao_fts_ai",
+    "DROP TRIGGER IF EXISTS transacoes_transacao_fts_ad",
+    "DROP TRIGGER IF EXISTS transacoes_transacao_fts_au",
+    "DROP TABLE IF EXISTS transacoes_transacao_fts",
+]
+
+# PostgreSQL: índice GIN sobre o tsvector (português, sem acentos)
+POSTGRES_CRIAR = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'pt_unaccent') THEN
+            CREATE TEXT SEARCH CONFIGURATION pt_unaccent (COPY = portuguese);
+            ALTER TEXT SEARCH CONFIGURATION pt_unaccent
+                ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+        END IF;
+    END
+    $$
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS transacoes_transacao_busca_idx
+    ON transacoes_transacao USING GIN (
+        to_tsvector('pt_unaccent'::regconfig, coalesce(descricao, '') || ' ' || coalesce(observacoes, ''))
+    )
+    """,
+]
+
+POSTGRES_REMOVER = [
+    "DROP INDEX IF EXISTS transacoes_transacao_busca_idx",
+]
+
+
+def executar(comandos_por_banco):
+    def operacao(apps, schema_editor):
+        comandos = comandos_por_banco.get(schema_editor.connection.vendor, [])
+        for sql in comandos:
+            schema_editor.execute(sql)
+    return operacao
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transacoes', '0002_resumomensal'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            executar({'sqlite': SQLITE_CRIAR, 'postgresql': POSTGRES_CRIAR}),
+            executar({'sqlite': SQLITE_REMOVER, 'postgresql': POSTGRES_REMOVER}),
+        ),
+    ]
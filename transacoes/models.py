@@ -1,5 +1,7 @@
-from django.db import models
+from datetime import date
+from django.db import models, transaction
 from django.conf import settings
+from core.banco import repetir_se_ocupado
 
 class Categoria(models.Model):
     """
@@ -121,18 +123,347 @@ class Transacao(models.Model):
         """Validações customizadas."""
         from django.core.exceptions import ValidationError
         
+        # Compara pelos *_id para não carregar as contas do banco
+        
         # Transferência deve ter conta destino
-        if self.tipo == 'transferencia' and not self.conta_destino:
+        if self.tipo == 'transferencia' and not self.conta_destino_id:
             raise ValidationError('Transferência precisa ter conta de destino.')
         
         # Transferência não pode ser da mesma conta
-        if self.tipo == 'transferencia' and self.conta_origem == self.conta_destino:
+        if self.tipo == 'transferencia' and self.conta_origem_id == self.conta_destino_id:
             raise ValidationError('Não pode transferir para a mesma conta.')
         
         # Receita e Despesa não devem ter conta destino
-        if self.tipo in ['receita', 'despesa'] and self.conta_destino:
+        if self.tipo in ['receita', 'despesa'] and self.conta_destino_id:
             raise ValidationError(f'{self.get_tipo_display()} não deve ter conta de destino.')
     
+    # Campos que alimentam os agregados (ledger de saldo e resumo mensal)
+    CAMPOS_AGREGADOS = [
+        'usuario_id',
+        'tipo',
+        'conta_origem_id',
+        'conta_destino_id',
+        'categoria_id',
+        'valor',
+        'data',
+    ]
+    
+    @staticmethod
+    def efeitos_saldo(tipo, conta_origem_id, conta_destino_id, valor, **kwargs):
+        """Retorna o impacto de uma transação no saldo das contas: {conta_id: delta}."""
+        if tipo == 'receita':
+            return {conta_origem_id: valor}
+        
+        if tipo == 'despesa':
+            return {conta_origem_id: -valor}
+        
+        if tipo == 'transferencia':
+            efeitos = {conta_origem_id: -valor}
+            if conta_destino_id is not None:
+                efeitos[conta_destino_id] = efeitos.get(conta_destino_id, 0) + valor
+            return efeitos
+        
+        return {}
+    
+    @staticmethod
+    def atualizar_agregados(anterior=None, atual=None):
+        """
+        Atualiza ledger de saldo e resumo mensal ao trocar a versão `anterior`
+        de uma transação pela `atual` (dicts com CAMPOS_AGREGADOS; None = não existe).
+        """
+        from contas.models import SaldoConta
+        
+        deltas = {}
+        if anterior:
+            for conta_id, delta in Transacao.efeitos_saldo(**anterior).items():
+                deltas[conta_id] = deltas.get(conta_id, 0) - delta
+        if atual:
+            for conta_id, delta in Transacao.efeitos_saldo(**atual).items():
+                deltas[conta_id] = deltas.get(conta_id, 0) + delta
+        
+        SaldoConta.aplicar(deltas)
+        
+        if anterior:
+            ResumoMensal.aplicar(anterior, -anterior['valor'], -1)
+        if atual:
+            ResumoMensal.aplicar(atual, atual['valor'], 1)
+    
+    @staticmethod
+    def atualizar_agregados_em_lote(transacoes):
+        """
+        Versão em lote de atualizar_agregados para transações recém-criadas
+        via bulk_create: soma os deltas e aplica uma vez por conta e por chave do resumo.
+        """
+        from contas.models import SaldoConta
+        
+        deltas = {}
+        resumos = {}
+        for transacao in transacoes:
+            campos = transacao._campos_agregados()
+            
+            for conta_id, delta in Transacao.efeitos_saldo(**campos).items():
+                deltas[conta_id] = deltas.get(conta_id, 0) + delta
+            
+            chave = tuple(campos[campo] for campo in ResumoMensal.CAMPOS_CHAVE) + (
+                campos['data'].year,
+                campos['data'].month,
+            )
+            valor, quantidade = resumos.get(chave, (0, 0))
+            resumos[chave] = (valor + campos['valor'], quantidade + 1)
+        
+        SaldoConta.aplicar(deltas)
+        
+        for chave, (valor, quantidade) in resumos.items():
+            *campos_chave, ano, mes = chave
+            campos = dict(zip(ResumoMensal.CAMPOS_CHAVE, campos_chave))
+            campos['data'] = date(ano, mes, 1)
+            ResumoMensal.aplicar(campos, valor, quantidade)
+    
+    def _campos_agregados(self):
+        return {campo: getattr(self, campo) for campo in self.CAMPOS_AGREGADOS}
+    
+    def _versao_gravada(self):
+        """Campos agregados da versão gravada no banco (None se ainda não existe)."""
+        if self.pk is None:
+            return None
+        
+        return Transacao.objects.filter(pk=self.pk).values(*self.CAMPOS_AGREGADOS).first()
+    
     def save(self, *args, **kwargs):
+        # Normaliza valores atribuídos como texto/float antes de agregar
+        self.valor = self._meta.get_field('valor').to_python(self.valor)
+        self.data = self._meta.get_field('data').to_python(self.data)
+        
         self.clean()
-        super().save(*args, **kwargs)
\ No newline at end of file
+        
+        pk, adicionando = self.pk, self._state.adding
+        
+        def gravar():
+            # Uma tentativa anterior desfeita pode ter deixado o pk atribuído
+            self.pk, self._state.adding = pk, adicionando
+            with transaction.atomic():
+                anterior = self._versao_gravada()
+                super(Transacao, self).save(*args, **kwargs)
+                self.atualizar_agregados(anterior, self._campos_agregados())
+        
+        repetir_se_ocupado(gravar)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            anterior = self._versao_gravada()
+            resultado = super().delete(*args, **kwargs)
+            self.atualizar_agregados(anterior, None)
+        
+        return resultado
+
+
+class ResumoMensal(models.Model):
+    """
+    Agregado mensal das transações do usuário.
+    Uma linha por (usuario, ano, mes, tipo, categoria, conta_origem, conta_destino)
+    com a soma de `valor` e a quantidade de transações, mantida a cada escrita de Transacao.
+    """
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='resumos_mensais'
+    )
+    
+    ano = models.PositiveSmallIntegerField()
+    mes = models.PositiveSmallIntegerField()
+    tipo = models.CharField(max_length=15, choices=Transacao.TIPO_CHOICES)
+    
+    categoria = models.ForeignKey(
+        Categoria,
+        on_delete=models.SET_NULL,
+        related_name='resumos_mensais',
+        null=True,
+        blank=True
+    )
+    
+    conta_origem = models.ForeignKey(
+        'contas.Conta',
+        on_delete=models.CASCADE,
+        related_name='resumos_saida'
+    )
+    
+    conta_destino = models.ForeignKey(
+        'contas.Conta',
+        on_delete=models.CASCADE,
+        related_name='resumos_entrada',
+        null=True,
+        blank=True
+    )
+    
+    valor = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantidade = models.IntegerField(default=0)
+    
+    # Campos da Transacao que, junto com ano/mês, formam a chave do resumo
+    CAMPOS_CHAVE = ['usuario_id', 'tipo', 'categoria_id', 'conta_origem_id', 'conta_destino_id']
+    
+    class Meta:
+        verbose_name = 'Resumo Mensal'
+        verbose_name_plural = 'Resumos Mensais'
+        ordering = ['-ano', '-mes']
+        indexes = [
+            models.Index(fields=['usuario', 'ano', 'mes']),
+        ]
+    
+    def __str__(self):
+        return f"{self.usuario} {self.mes:02d}/{self.ano} {self.tipo}: {self.valor}"
+    
+    @classmethod
+    def aplicar(cls, campos, valor, quantidade):
+        """
+        Soma `valor`/`quantidade` na linha da chave correspondente, criando-a se preciso.
+        Sem restrição de unicidade: ao excluir uma categoria, o SET_NULL pode
+        juntar duas chaves; as leituras somam as linhas e cada delta vai para uma só.
+        """
+        chave = {campo: campos[campo] for campo in cls.CAMPOS_CHAVE}
+        chave['ano'] = campos['data'].year
+        chave['mes'] = campos['data'].month
+        
+        linha = cls.objects.filter(**chave).order_by('pk').values_list('pk', flat=True).first()
+        
+        if linha is None:
+            cls.objects.create(valor=valor, quantidade=quantidade, **chave)
+        else:
+            cls.objects.filter(pk=linha).update(
+                valor=models.F('valor') + valor,
+                quantidade=models.F('quantidade') + quantidade
+            )
+    
+    @classmethod
+    def resumo_do_mes(cls, usuario, ano, mes, conta_id=None, tipo=None, categoria_id=None, transacoes=None):
+        """
+        Receitas, despesas, transferências e gastos por categoria de um mês.
+        Com `conta_id`, considera só a conta (transferências enviadas e recebidas);
+        `tipo` e `categoria_id` filtram o próprio agregado.
+        Recortes que o agregado não guarda (intervalo de datas, busca) vêm em
+        `transacoes`, um queryset de Transacao já filtrado, somado direto.
+        Duas consultas: totais em um único aggregate condicional + agrupamento por categoria.
+        """
+        resumos, totais, gastos_por_categoria = cls._consultas_do_mes(
+            usuario, ano, mes, conta_id, tipo, categoria_id, transacoes
+        )
+        return cls._montar_resumo(ano, mes, resumos.aggregate(**totais), list(gastos_por_categoria))
+    
+    @classmethod
+    async def aresumo_do_mes(cls, usuario, ano, mes, conta_id=None, tipo=None, categoria_id=None, transacoes=None):
+        """Versão assíncrona de resumo_do_mes (mesmas duas consultas)."""
+        resumos, totais, gastos_por_categoria = cls._consultas_do_mes(
+            usuario, ano, mes, conta_id, tipo, categoria_id, transacoes
+        )
+        return cls._montar_resumo(
+            ano, mes,
+            await resumos.aaggregate(**totais),
+            [gasto async for gasto in gastos_por_categoria]
+        )
+    
+    @classmethod
+    def _consultas_do_mes(cls, usuario, ano, mes, conta_id, tipo=None, categoria_id=None, transacoes=None):
+        if transacoes is None:
+            resumos = cls.objects.filter(
+                usuario=usuario,
+                ano=ano,
+                mes=mes,
+                quantidade__gt=0
+            )
+            quantidade = models.Sum('quantidade')
+        else:
+            # Mesmos campos (tipo, valor, contas, categoria) direto nas transações;
+            # intervalo em `data` (não __year/__month) para usar o índice
+            resumos = transacoes.filter(
+                usuario=usuario,
+                data__gte=date(ano, mes, 1),
+                data__lt=date(ano + mes // 12, mes % 12 + 1, 1)
+            ).order_by()
+            quantidade = models.Count('id')
+        
+        if tipo:
+            resumos = resumos.filter(tipo=tipo)
+        if categoria_id:
+            resumos = resumos.filter(categoria_id=categoria_id)
+        
+        if conta_id:
+            saida = models.Q(conta_origem_id=conta_id)
+            entrada = models.Q(conta_destino_id=conta_id)
+            resumos = resumos.filter(saida | entrada)
+        else:
+            saida = entrada = models.Q()
+        
+        totais = {
+            'receitas': models.Sum('valor', filter=saida & models.Q(tipo='receita')),
+            'despesas': models.Sum('valor', filter=saida & models.Q(tipo='despesa')),
+            'transferencias_enviadas': models.Sum('valor', filter=saida & models.Q(tipo='transferencia')),
+            'transferencias_recebidas': models.Sum('valor', filter=entrada & models.Q(tipo='transferencia')),
+            'quantidade': quantidade,
+        }
+        
+        # Gastos por categoria
+        gastos_por_categoria = resumos.filter(
+            saida,
+            tipo='despesa',
+            categoria__isnull=False
+        ).values(
+            'categoria__nome',
+            'categoria__icone',
+            'categoria__cor'
+        ).annotate(
+            total=models.Sum('valor')
+        ).order_by('-total')
+        
+        return resumos, totais, gastos_por_categoria
+    
+    @staticmethod
+    def _montar_resumo(ano, mes, totais, gastos_por_categoria):
+        totais = {chave: valor or 0 for chave, valor in totais.items()}
+        
+        saldo = (
+            totais['receitas']
+            - totais['despesas']
+            + totais['transferencias_recebidas']
+            - totais['transferencias_enviadas']
+        )
+        
+        return {
+            'mes': mes,
+            'ano': ano,
+            'receitas': float(totais['receitas']),
+            'despesas': float(totais['despesas']),
+            'transferencias_enviadas': float(totais['transferencias_enviadas']),
+            'transferencias_recebidas': float(totais['transferencias_recebidas']),
+            'saldo': float(saldo),
+            'quantidade': totais['quantidade'],
+            'gastos_por_categoria': gastos_por_categoria
+        }
+    
+    @classmethod
+    def reconstruir(cls, usuario_id=None):
+        """Apaga e recalcula o resumo a partir das transações. Retorna o nº de linhas."""
+        from django.db.models.functions import ExtractYear, ExtractMonth
+        
+        transacoes = Transacao.objects.all()
+        resumos = cls.objects.all()
+        if usuario_id is not None:
+            transacoes = transacoes.filter(usuario_id=usuario_id)
+            resumos = resumos.filter(usuario_id=usuario_id)
+        
+        grupos = transacoes.annotate(
+            ano=ExtractYear('data'),
+            mes=ExtractMonth('data')
+        ).values(
+            'usuario_id', 'ano', 'mes', 'tipo', 'categoria_id', 'conta_origem_id', 'conta_destino_id'
+        ).annotate(
+            soma=models.Sum('valor'),
+            quantidade=models.Count('id')
+        ).order_by()
+        
+        with transaction.atomic():
+            resumos.delete()
+            linhas = cls.objects.bulk_create(
+                (cls(valor=grupo.pop('soma'), **grupo) for grupo in grupos.iterator()),
+                batch_size=500
+            )
+        
+        return len(linhas)
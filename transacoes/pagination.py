@@ -0,0 +1,132 @@
+import base64
+import json
+from datetime import date, datetime
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class TransacaoCursorPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) sobre (data, created_at, id), decrescente.
+    O cursor guarda a chave da última linha entregue, então cada página é um
+    `WHERE (data, created_at, id) < cursor ... LIMIT n`: custo constante em
+    qualquer profundidade, sem COUNT(*) e estável com inserções concorrentes.
+    Apenas avança (rolagem infinita): a resposta traz `next` e `results`.
+    Só aceita `ordering=-data` (padrão) ou `ordering=data`; outras ordenações
+    e a busca (ordenada por relevância) respondem 400.
+    """
+    ordering = ('-data', '-created_at', '-id')
+    ordenacoes = {
+        '-data': ('-data', '-created_at', '-id'),
+        'data': ('data', 'created_at', 'id'),
+    }
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Cursor inválido.'
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.filtrar_pelo_cursor(queryset, request)
+        # Busca uma linha a mais para saber se existe próxima página
+        return self.fechar_pagina(list(queryset[:self.page_size + 1]))
+    
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self.filtrar_pelo_cursor(queryset, request)
+        return self.fechar_pagina([linha async for linha in queryset[:self.page_size + 1]])
+    
+    def filtrar_pelo_cursor(self, queryset, request):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        
+        ordering = self.get_ordering(request)
+        queryset = queryset.order_by(*ordering)
+        
+        cursor = self.decode_cursor(request)
+        if cursor is not None:
+            data, created_at, pk = cursor
+            depois = 'lt' if ordering[0].startswith('-') else 'gt'
+            queryset = queryset.filter(
+                Q(**{f'data__{depois}': data})
+                | Q(data=data, **{f'created_at__{depois}': created_at})
+                | Q(data=data, created_at=created_at, **{f'id__{depois}': pk})
+            )
+        return queryset
+    
+    def get_ordering(self, request):
+        if request.query_params.get(api_settings.SEARCH_PARAM, '').strip():
+            raise ValidationError({'search': 'Busca não é suportada com paginacao=cursor.'})
+        
+        ordenacao = request.query_params.get(api_settings.ORDERING_PARAM, '').strip()
+        if not ordenacao:
+            return self.ordering
+        if ordenacao not in self.ordenacoes:
+            raise ValidationError({
+                api_settings.ORDERING_PARAM: 'Com paginacao=cursor, use ordering=-data ou ordering=data.'
+            })
+        return self.ordenacoes[ordenacao]
+    
+    def fechar_pagina(self, resultados):
+        self.has_next = len(resultados) > self.page_size
+        resultados = resultados[:self.page_size]
+        
+        self.ultimo = resultados[-1] if resultados else None
+        return resultados
+    
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        
+        if page_size <= 0:
+            return api_settings.PAGE_SIZE
+        return min(page_size, self.max_page_size)
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        
+        ultimo = self.ultimo
+        if isinstance(ultimo, dict):
+            chave = (ultimo['data'], ultimo['created_at'], ultimo['id'])
+        else:
+            chave = (ultimo.data, ultimo.created_at, ultimo.id)
+        
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(chave))
+    
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+    
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+    
+    def encode_cursor(self, chave):
+        data, created_at, pk = chave
+        bruto = json.dumps([data.isoformat(), created_at.isoformat(), pk])
+        return base64.urlsafe_b64encode(bruto.encode('utf-8')).decode('ascii')
+    
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        
+        try:
+            data, created_at, pk = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            return date.fromisoformat(data), datetime.fromisoformat(created_at), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
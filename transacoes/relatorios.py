@@ -0,0 +1,167 @@
+from datetime import date, timedelta
+from django.db.models import Q, Sum
+from django.db.models.functions import TruncWeek
+from .models import ResumoMensal, Transacao
+
+
+AGRUPAMENTOS = ('mes', 'semana')
+
+# Limites aceitos para inicio/fim: longe de date.min/date.max, onde os
+# períodos (início da semana, mês seguinte) sairiam do intervalo de datetime.date
+DATA_MINIMA = date(1900, 1, 1)
+DATA_MAXIMA = date(2999, 12, 31)
+
+# Máximo de períodos por resposta (10 anos por mês, 5 anos por semana)
+MAXIMO_PERIODOS = {'mes': 120, 'semana': 260}
+
+
+def somar_mes(data, meses):
+    total = data.year * 12 + data.month - 1 + meses
+    return date(total // 12, total % 12 + 1, 1)
+
+
+def contar_periodos(inicio, fim, agrupamento):
+    """Quantos períodos _periodos geraria, sem gerá-los."""
+    if agrupamento == 'mes':
+        return (fim.year * 12 + fim.month) - (inicio.year * 12 + inicio.month) + 1
+    return (fim - (inicio - timedelta(days=inicio.weekday()))).days // 7 + 1
+
+
+def _periodos(inicio, fim, agrupamento):
+    """Todos os períodos do intervalo (inclusive os sem movimento)."""
+    if agrupamento == 'mes':
+        atual = inicio.replace(day=1)
+        while atual <= fim:
+            yield atual
+            atual = somar_mes(atual, 1)
+    else:
+        atual = inicio - timedelta(days=inicio.weekday())
+        while atual <= fim:
+            yield atual
+            atual += timedelta(days=7)
+
+
+def _filtros_conta(conta_id):
+    """Q de saída/entrada da conta; sem conta, transferências se anulam no saldo."""
+    if conta_id:
+        return Q(conta_origem_id=conta_id), Q(conta_destino_id=conta_id)
+    return Q(), Q(tipo='transferencia')
+
+
+def serie_temporal(usuario, inicio, fim, agrupamento='mes', conta_id=None, categoria_id=None):
+    """
+    Receitas, despesas, transferências e saldo por mês ou semana, com totais por categoria.
+    Uma única consulta agrupada:
+    - mes: sobre o resumo mensal pré-calculado (meses inteiros);
+    - semana: sobre as transações, com TruncWeek e filtro por intervalo de datas.
+    """
+    saida, entrada = _filtros_conta(conta_id)
+    
+    if agrupamento == 'mes':
+        inicio = inicio.replace(day=1)
+        fim = somar_mes(fim, 1) - timedelta(days=1)
+        
+        # (ano, mes) entre os limites, comparando como ano * 12 + mes
+        base = ResumoMensal.objects.filter(usuario=usuario, quantidade__gt=0).filter(
+            Q(ano__gt=inicio.year) | Q(ano=inicio.year, mes__gte=inicio.month),
+            Q(ano__lt=fim.year) | Q(ano=fim.year, mes__lte=fim.month),
+        )
+        campos_periodo = ['ano', 'mes']
+    else:
+        base = Transacao.objects.filter(usuario=usuario, data__gte=inicio, data__lte=fim).annotate(
+            periodo=TruncWeek('data')
+        )
+        campos_periodo = ['periodo']
+    
+    if conta_id:
+        base = base.filter(saida | entrada)
+    if categoria_id:
+        base = base.filter(categoria_id=categoria_id)
+    
+    grupos = base.values(
+        *campos_periodo,
+        'tipo',
+        'categoria_id',
+        'categoria__nome',
+        'categoria__icone',
+        'categoria__cor',
+    ).annotate(
+        total_saida=Sum('valor', filter=saida),
+        total_entrada=Sum('valor', filter=entrada),
+    ).order_by()
+    
+    periodos = {
+        periodo: {
+            'periodo': periodo.isoformat(),
+            'receitas': 0,
+            'despesas': 0,
+            'transferencias_enviadas': 0,
+            'transferencias_recebidas': 0,
+            'por_categoria': [],
+        }
+        for periodo in _periodos(inicio, fim, agrupamento)
+    }
+    categorias = {}
+    
+    for grupo in grupos:
+        if agrupamento == 'mes':
+            periodo = date(grupo['ano'], grupo['mes'], 1)
+        else:
+            periodo = grupo['periodo']
+        
+        linha = periodos.get(periodo)
+        if linha is None:
+            continue
+        
+        total_saida = grupo['total_saida'] or 0
+        total_entrada = grupo['total_entrada'] or 0
+        
+        if grupo['tipo'] == 'transferencia':
+            linha['transferencias_enviadas'] += total_saida
+            linha['transferencias_recebidas'] += total_entrada
+            continue
+        
+        chave_tipo = 'receitas' if grupo['tipo'] == 'receita' else 'despesas'
+        linha[chave_tipo] += total_saida
+        
+        if grupo['categoria_id'] is None or not total_saida:
+            continue
+        
+        linha['por_categoria'].append({
+            'categoria': grupo['categoria_id'],
+            'tipo': grupo['tipo'],
+            'total': float(total_saida),
+        })
+        
+        categoria = categorias.setdefault(grupo['categoria_id'], {
+            'categoria': grupo['categoria_id'],
+            'nome': grupo['categoria__nome'],
+            'icone': grupo['categoria__icone'],
+            'cor': grupo['categoria__cor'],
+            'tipo': grupo['tipo'],
+            'total': 0,
+        })
+        categoria['total'] += total_saida
+    
+    serie = []
+    for linha in periodos.values():
+        linha['saldo'] = (
+            linha['receitas']
+            - linha['despesas']
+            + linha['transferencias_recebidas']
+            - linha['transferencias_enviadas']
+        )
+        for chave in ('receitas', 'despesas', 'transferencias_enviadas', 'transferencias_recebidas', 'saldo'):
+            linha[chave] = float(linha[chave])
+        serie.append(linha)
+    
+    for categoria in categorias.values():
+        categoria['total'] = float(categoria['total'])
+    
+    return {
+        'agrupamento': agrupamento,
+        'inicio': inicio.isoformat(),
+        'fim': fim.isoformat(),
+        'periodos': serie,
+        'categorias': sorted(categorias.values(), key=lambda c: -c['total']),
+    }
@@ -1,6 +1,28 @@
+from django.db.models import Q
 from rest_framework import serializers
 from .models import Categoria, Transacao
-from contas.serializers import ContaListSerializer
+from contas.models import Conta
+from contas.serializers import ContaListSerializer, ContaResumoSerializer
+
+
+def contas_do_usuario(request):
+    """IDs das contas do usuário, carregados uma única vez por request."""
+    if not hasattr(request, '_contas_do_usuario'):
+        request._contas_do_usuario = set(
+            Conta.objects.filter(usuario=request.user).order_by().values_list('id', flat=True)
+        )
+    return request._contas_do_usuario
+
+
+def categorias_do_usuario(request):
+    """IDs das categorias do usuário + padrão (sem dono), carregados uma única vez por request."""
+    if not hasattr(request, '_categorias_do_usuario'):
+        request._categorias_do_usuario = set(
+            Categoria.objects.filter(
+                Q(usuario=request.user) | Q(usuario__isnull=True)
+            ).order_by().values_list('id', flat=True)
+        )
+    return request._categorias_do_usuario
 
 class CategoriaSerializer(serializers.ModelSerializer):
     """Serializer de Categoria."""
@@ -29,9 +51,9 @@ class CategoriaSerializer(serializers.ModelSerializer):
 class TransacaoSerializer(serializers.ModelSerializer):
     """Serializer completo de Transação."""
     
-    # Para exibição (nested) - campos extras
-    conta_origem_detalhes = ContaListSerializer(source='conta_origem', read_only=True)
-    conta_destino_detalhes = ContaListSerializer(source='conta_destino', read_only=True)
+    # Para exibição (nested) - campos extras. Saldo só com ?incluir_saldo=true
+    conta_origem_detalhes = ContaResumoSerializer(source='conta_origem', read_only=True)
+    conta_destino_detalhes = ContaResumoSerializer(source='conta_destino', read_only=True)
     categoria_detalhes = CategoriaSerializer(source='categoria', read_only=True)
     
     class Meta:
@@ -53,24 +75,33 @@ class TransacaoSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at']
     
+    def get_fields(self):
+        """Troca a conta resumida pela conta com saldo quando pedido explicitamente."""
+        fields = super().get_fields()
+        
+        request = self.context.get('request')
+        if request and request.query_params.get('incluir_saldo') in ('1', 'true'):
+            fields['conta_origem_detalhes'] = ContaListSerializer(source='conta_origem', read_only=True)
+            fields['conta_destino_detalhes'] = ContaListSerializer(source='conta_destino', read_only=True)
+        
+        return fields
+    
     def validate_conta_origem(self, value):
         """Valida se a conta pertence ao usuário."""
-        if value.usuario != self.context['request'].user:
+        if value.pk not in contas_do_usuario(self.context['request']):
             raise serializers.ValidationError("Conta não pertence ao usuário.")
         return value
     
     def validate_conta_destino(self, value):
         """Valida se a conta destino pertence ao usuário."""
-        if value and value.usuario != self.context['request'].user:
+        if value and value.pk not in contas_do_usuario(self.context['request']):
             raise serializers.ValidationError("Conta destino não pertence ao usuário.")
         return value
     
     def validate_categoria(self, value):
         """Valida se a categoria pertence ao usuário ou é padrão."""
-        if value:
-            request = self.context.get('request')
-            if value.usuario and value.usuario != request.user:
-                raise serializers.ValidationError("Categoria não pertence ao usuário.")
+        if value and value.pk not in categorias_do_usuario(self.context['request']):
+            raise serializers.ValidationError("Categoria não pertence ao usuário.")
         return value
     
     def validate(self, data):
@@ -104,22 +135,25 @@ class TransacaoSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class TransacaoListSerializer(serializers.ModelSerializer):
-    """Serializer simplificado para listagem."""
+class TransacaoListSerializer(serializers.Serializer):
+    """
+    Serializer simplificado para listagem.
+    Lê dicts vindos de .values() (ver TransacaoViewSet.get_queryset), sem
+    instanciar modelos nem acessar relacionamentos linha a linha.
+    """
     
-    conta_origem_nome = serializers.CharField(source='conta_origem.nome', read_only=True)
-    categoria_nome = serializers.CharField(source='categoria.nome', read_only=True)
-    categoria_icone = serializers.CharField(source='categoria.icone', read_only=True)
+    # Colunas buscadas para a listagem: {nome no dict: caminho no ORM}
+    CAMPOS_CONSULTA = {
+        'conta_origem_nome': 'conta_origem__nome',
+        'categoria_nome': 'categoria__nome',
+        'categoria_icone': 'categoria__icone',
+    }
     
-    class Meta:
-        model = Transacao
-        fields = [
-            'id',
-            'tipo',
-            'descricao',
-            'valor',
-            'data',
-            'conta_origem_nome',
-            'categoria_nome',
-            'categoria_icone',
-        ]
\ No newline at end of file
+    id = serializers.IntegerField(read_only=True)
+    tipo = serializers.CharField(read_only=True)
+    descricao = serializers.CharField(read_only=True)
+    valor = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    data = serializers.DateField(read_only=True)
+    conta_origem_nome = serializers.CharField(read_only=True)
+    categoria_nome = serializers.CharField(read_only=True)
+    categoria_icone = serializers.CharField(read_only=True)
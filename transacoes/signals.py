@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .categorias import invalidar_categorias_padrao
+from .models import Categoria
+
+
+@receiver(post_save, sender=Categoria)
+@receiver(post_delete, sender=Categoria)
+def categoria_alterada(sender, **kwargs):
+    """Qualquer escrita em Categoria invalida o cache das categorias padrão."""
+    invalidar_categorias_padrao()
@@ -1,3 +1,487 @@
+import json
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from core.models import ContadorVersao, Usuario
+from core.versao import chave_versao, versoes
+from contas.models import Conta
+from .categorias import CHAVE_VERSAO, categorias_padrao, invalidar_categorias_padrao
+from .importacao import abrir_texto, converter_valor
+from .models import Categoria, Transacao, ResumoMensal
 
-# Create your tests here.
+
+class TransacaoTestCase(TestCase):
+    """Base com usuário autenticado, duas contas e categorias."""
+    
+    def setUp(self):
+        self.usuario = Usuario.objects.create(username='ana')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        
+        self.carteira = Conta.objects.create(usuario=self.usuario, nome='Carteira', tipo='dinheiro')
+        self.banco = Conta.objects.create(usuario=self.usuario, nome='Banco', tipo='conta_corrente')
+        
+        self.mercado = Categoria.objects.create(
+            usuario=self.usuario, nome='Mercado', tipo='despesa', icone='shopping_cart'
+        )
+        self.salario = Categoria.objects.create(
+            usuario=self.usuario, nome='Salário', tipo='receita', icone='attach_money'
+        )
+    
+    def criar(self, **kwargs):
+        dados = {
+            'usuario': self.usuario,
+            'conta_origem': self.carteira,
+            'descricao': 'Teste',
+            'data': '2025-03-10',
+        }
+        dados.update(kwargs)
+        return Transacao.objects.create(**dados)
+
+
+class ResumoMensalTest(TransacaoTestCase):
+    
+    def test_resumo_mensal_le_agregado(self):
+        self.criar(tipo='receita', valor=Decimal('1000'), categoria=self.salario)
+        despesa = self.criar(tipo='despesa', valor=Decimal('200'), categoria=self.mercado)
+        self.criar(tipo='despesa', valor=Decimal('50'), categoria=self.mercado, data='2025-04-01')
+        
+        # Edição desfaz o valor antigo no agregado
+        despesa.valor = Decimal('250')
+        despesa.save()
+        
+        response = self.client.get('/api/transacoes/resumo_mensal/?mes=3&ano=2025')
+        dados = response.json()
+        
+        self.assertEqual(dados['receitas'], 1000)
+        self.assertEqual(dados['despesas'], 250)
+        self.assertEqual(dados['saldo'], 750)
+        self.assertEqual(len(dados['gastos_por_categoria']), 1)
+        self.assertEqual(Decimal(str(dados['gastos_por_categoria'][0]['total'])), Decimal('250'))
+    
+    def test_comando_reconstroi_resumo(self):
+        self.criar(tipo='despesa', valor=Decimal('10'), categoria=self.mercado)
+        self.criar(tipo='despesa', valor=Decimal('15'), categoria=self.mercado)
+        ResumoMensal.objects.all().delete()
+        
+        call_command('recalcular_resumos', stdout=StringIO())
+        
+        resumo = ResumoMensal.objects.get()
+        self.assertEqual(resumo.valor, Decimal('25'))
+        self.assertEqual(resumo.quantidade, 2)
+    
+    def test_resumo_mensal_por_conta(self):
+        self.criar(tipo='receita', valor=Decimal('1000'), categoria=self.salario)
+        self.criar(tipo='despesa', valor=Decimal('100'), conta_origem=self.banco, categoria=self.mercado)
+        self.criar(tipo='transferencia', valor=Decimal('300'), conta_destino=self.banco)
+        
+        # versão (ETag) + 2 do resumo
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/transacoes/resumo_mensal/?mes=3&ano=2025&conta={self.banco.id}')
+        dados = response.json()
+        
+        self.assertEqual(dados['receitas'], 0)
+        self.assertEqual(dados['despesas'], 100)
+        self.assertEqual(dados['transferencias_recebidas'], 300)
+        self.assertEqual(dados['transferencias_enviadas'], 0)
+        self.assertEqual(dados['saldo'], 200)
+        self.assertEqual(dados['gastos_por_categoria'][0]['categoria__nome'], 'Mercado')
+    
+    def test_resumo_mensal_respeita_filtros_da_listagem(self):
+        self.criar(tipo='receita', valor=Decimal('1000'), categoria=self.salario, data='2025-03-05')
+        self.criar(tipo='despesa', valor=Decimal('100'), categoria=self.mercado, descricao='Feira', data='2025-03-10')
+        self.criar(tipo='despesa', valor=Decimal('40'), descricao='Ônibus', data='2025-03-20')
+        url = '/api/transacoes/resumo_mensal/?mes=3&ano=2025'
+        
+        # tipo e categoria vêm do agregado
+        dados = self.client.get(url + '&tipo=despesa').json()
+        self.assertEqual((dados['receitas'], dados['despesas'], dados['quantidade']), (0, 140, 2))
+        dados = self.client.get(url + f'&categoria={self.mercado.id}').json()
+        self.assertEqual((dados['despesas'], dados['quantidade']), (100, 1))
+        
+        # Intervalo de datas e busca somam as transações filtradas
+        dados = self.client.get(url + '&data_inicio=2025-03-08&data_fim=2025-03-15').json()
+        self.assertEqual((dados['receitas'], dados['despesas'], dados['quantidade']), (0, 100, 1))
+        self.assertEqual(dados['gastos_por_categoria'][0]['categoria__nome'], 'Mercado')
+        dados = self.client.get(url + '&search=onibus').json()
+        self.assertEqual((dados['despesas'], dados['quantidade']), (40, 1))
+        
+        # Mês como intervalo em `data`, sem extrair ano/mês linha a linha
+        with CaptureQueriesContext(connection) as consultas:
+            dados = self.client.get('/api/transacoes/resumo_mensal/?mes=12&ano=2025&data_inicio=2025-01-01').json()
+        self.assertEqual(dados['quantidade'], 0)
+        self.assertFalse([q['sql'] for q in consultas if 'extract' in q['sql'].lower()])
+
+
+class CursorPaginationTest(TransacaoTestCase):
+    
+    def test_percorre_paginas_sem_repetir_com_insercoes(self):
+        criadas = [
+            self.criar(tipo='despesa', valor=Decimal(i + 1), data=f'2025-03-0{1 + i % 3}')
+            for i in range(7)
+        ]
+        esperado = [
+            t.id for t in sorted(criadas, key=lambda t: (t.data, t.created_at, t.id), reverse=True)
+        ]
+        
+        vistos = []
+        url = '/api/transacoes/?paginacao=cursor&page_size=3'
+        while url:
+            dados = self.client.get(url).json()
+            self.assertNotIn('count', dados)
+            vistos += [t['id'] for t in dados['results']]
+            url = dados['next']
+            # Inserção concorrente no topo da lista não desloca as próximas páginas
+            self.criar(tipo='receita', valor=Decimal('1'), data='2025-12-31')
+        
+        self.assertEqual(vistos, esperado)
+    
+    def test_cursor_invalido(self):
+        response = self.client.get('/api/transacoes/?paginacao=cursor&cursor=invalido')
+        self.assertEqual(response.status_code, 404)
+    
+    def test_ordenacao_crescente_e_combinacoes_nao_suportadas(self):
+        for dia in (3, 1, 2):
+            self.criar(tipo='despesa', valor=Decimal(dia), data=f'2025-03-0{dia}')
+        
+        datas = []
+        url = '/api/transacoes/?paginacao=cursor&page_size=2&ordering=data'
+        while url:
+            dados = self.client.get(url).json()
+            datas += [t['data'] for t in dados['results']]
+            url = dados['next']
+        self.assertEqual(datas, ['2025-03-01', '2025-03-02', '2025-03-03'])
+        
+        for query in ('ordering=valor', 'ordering=-created_at', 'search=teste'):
+            response = self.client.get(f'/api/transacoes/?paginacao=cursor&{query}')
+            self.assertEqual(response.status_code, 400, query)
+
+
+class BuscaTextualTest(TransacaoTestCase):
+    
+    def test_busca_por_prefixo_sem_acento_e_ordenada_por_relevancia(self):
+        self.criar(tipo='despesa', valor=Decimal('10'), descricao='Padaria', observacoes='café da manhã')
+        self.criar(tipo='despesa', valor=Decimal('20'), descricao='Café Café', observacoes='')
+        self.criar(tipo='despesa', valor=Decimal('30'), descricao='Mercado')
+        
+        dados = self.client.get('/api/transacoes/?search=cafe').json()
+        self.assertEqual([t['descricao'] for t in dados['results']], ['Café Café', 'Padaria'])
+        
+        dados = self.client.get('/api/transacoes/?search=merc').json()
+        self.assertEqual([t['descricao'] for t in dados['results']], ['Mercado'])
+    
+    def test_indice_acompanha_edicao_e_exclusao(self):
+        transacao = self.criar(tipo='despesa', valor=Decimal('10'), descricao='Farmácia')
+        transacao.descricao = 'Academia'
+        transacao.save()
+        
+        self.assertEqual(self.client.get('/api/transacoes/?search=farmacia').json()['count'], 0)
+        self.assertEqual(self.client.get('/api/transacoes/?search=academia').json()['count'], 1)
+        
+        transacao.delete()
+        self.assertEqual(self.client.get('/api/transacoes/?search=academia').json()['count'], 0)
+    
+    def test_entrada_com_sintaxe_fts_nao_quebra(self):
+        self.criar(tipo='despesa', valor=Decimal('10'), descricao='Uber "noite"')
+        response = self.client.get('/api/transacoes/?search="ub* (')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+
+class ImportacaoTest(TransacaoTestCase):
+    
+    def enviar(self, nome, conteudo, **dados):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        
+        dados['arquivo'] = SimpleUploadedFile(nome, conteudo.encode('utf-8'))
+        return self.client.post('/api/transacoes/importar/', dados, format='multipart')
+    
+    def test_importa_csv_em_lote_com_relatorio_de_erros(self):
+        linhas = ['data;descricao;valor;categoria']
+        linhas += [f'0{1 + i % 9}/03/2025;Compra {i};-{i + 1},50;mercado' for i in range(1200)]
+        linhas += ['32/03/2025;Data ruim;-1,00;', '2025-03-05;;10;', '2025-03-05;Sem categoria;-5;Inexistente']
+        linhas += ['2025-03-05;Não número;NaN;', '2025-03-05;Infinito;-Infinity;']
+        
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.enviar('extrato.csv', '\n'.join(linhas), conta=self.carteira.id)
+        # Poucas consultas por lote (INSERTs multi-linha), nunca por linha
+        self.assertLess(len(consultas), 60)
+        
+        dados = response.json()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(dados['importadas'], 1200)
+        self.assertEqual([erro['linha'] for erro in dados['erros']], [1202, 1203, 1204, 1205, 1206])
+        self.assertIn('data', dados['erros'][0]['erros'])
+        self.assertEqual(dados['erros'][3]['erros']['valor'], 'Valor inválido.')
+        self.assertEqual(dados['erros'][4]['erros']['valor'], 'Valor inválido.')
+        
+        total = sum(Decimal(i + 1) + Decimal('0.5') for i in range(1200))
+        self.assertEqual(Conta.objects.get(pk=self.carteira.pk).saldo_atual, -total)
+        resumo = self.client.get('/api/transacoes/resumo_mensal/?mes=3&ano=2025').json()
+        self.assertEqual(Decimal(str(resumo['despesas'])), total)
+    
+    def test_valor_com_milhar_brasileiro(self):
+        self.assertEqual(converter_valor('1.000'), Decimal('1000'))
+        self.assertEqual(converter_valor('-R$ 12.345.678'), Decimal('-12345678'))
+        self.assertEqual(converter_valor('1.234,56'), Decimal('1234.56'))
+        self.assertEqual(converter_valor('42.90'), Decimal('42.90'))
+        self.assertEqual(converter_valor('1.5'), Decimal('1.5'))
+        
+        response = self.enviar('extrato.csv', 'data;descricao;valor\n2025-03-05;Aluguel;-1.000', conta=self.carteira.id)
+        self.assertEqual(response.json(), {'importadas': 1, 'erros': []})
+        self.assertEqual(Transacao.objects.get(descricao='Aluguel').valor, Decimal('1000'))
+    
+    def test_falha_no_meio_desfaz_a_importacao_inteira(self):
+        linhas = ['data;descricao;valor'] + [f'2025-03-05;Compra {i};-1' for i in range(600)]
+        versao = versoes([chave_versao(self.usuario.pk)])
+        chamadas = []
+        
+        def agregados(criadas):
+            # Primeiro lote grava, o segundo falha
+            chamadas.append(len(criadas))
+            if len(chamadas) == 2:
+                raise RuntimeError('falha no banco')
+        
+        with mock.patch.object(Transacao, 'atualizar_agregados_em_lote', agregados):
+            with self.assertRaises(RuntimeError):
+                self.enviar('extrato.csv', '\n'.join(linhas), conta=self.carteira.id)
+        
+        self.assertEqual(chamadas, [500, 100])
+        self.assertFalse(Transacao.objects.exists())
+        self.assertEqual(versoes([chave_versao(self.usuario.pk)]), versao)
+    
+    def test_importa_ofx(self):
+        ofx = """OFXHEADER:100
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20250310120000[-3:BRT]
+<TRNAMT>-42.90
+<FITID>1
+<MEMO>Padaria
+</STMTTRN>
+<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20250305<TRNAMT>3000.00<FITID>2<MEMO>Salário</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>"""
+        
+        response = self.enviar('extrato.ofx', ofx, conta=self.banco.id)
+        
+        self.assertEqual(response.json(), {'importadas': 2, 'erros': []})
+        transacoes = Transacao.objects.filter(conta_origem=self.banco).order_by('data')
+        self.assertEqual(
+            [(t.tipo, t.valor, t.descricao) for t in transacoes],
+            [('receita', Decimal('3000.00'), 'Salário'), ('despesa', Decimal('42.90'), 'Padaria')]
+        )
+    
+    def test_utf8_com_caractere_cortado_na_amostra(self):
+        # 'ã' ocupa os bytes 4096 e 4097 (contando de 1): a amostra de 4096 o corta
+        conteudo = 'x' * 4094 + 'São Paulo\n'
+        texto = abrir_texto(BytesIO(conteudo.encode('utf-8')))
+        self.assertEqual(texto.read(), conteudo)
+    
+    def test_ofx_exige_conta(self):
+        response = self.enviar('extrato.ofx', '<OFX></OFX>')
+        self.assertEqual(response.status_code, 400)
+
+
+class ExportacaoTest(TransacaoTestCase):
+    
+    def test_exporta_csv_e_ndjson_com_filtros(self):
+        self.criar(tipo='despesa', valor=Decimal('12.50'), descricao='Pão, leite', categoria=self.mercado)
+        self.criar(tipo='receita', valor=Decimal('100'), descricao='Pix')
+        
+        response = self.client.get('/api/transacoes/exportar/?formato=csv')
+        conteudo = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(conteudo[0], 'id,data,tipo,descricao,valor,conta,conta_destino,categoria,observacoes')
+        self.assertEqual(len(conteudo), 3)
+        self.assertIn('"Pão, leite",12.50,Carteira,,Mercado', conteudo[2])
+        
+        response = self.client.get('/api/transacoes/exportar/?formato=ndjson&tipo=despesa')
+        registros = [json.loads(linha) for linha in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual(len(registros), 1)
+        self.assertEqual(registros[0]['valor'], '12.50')
+        self.assertEqual(registros[0]['categoria'], 'Mercado')
+
+
+class ListagemTest(TransacaoTestCase):
+    
+    def test_listagem_sem_n_mais_1(self):
+        for i in range(25):
+            self.criar(
+                tipo='despesa', valor=Decimal('1.5'), descricao=f'Compra {i}',
+                categoria=self.mercado if i % 2 else None
+            )
+        
+        # versão (ETag) + COUNT + página, independente do tamanho da página
+        with self.assertNumQueries(3):
+            dados = self.client.get('/api/transacoes/').json()
+        
+        self.assertEqual(dados['count'], 25)
+        self.assertEqual(len(dados['results']), 20)
+        self.assertEqual(set(dados['results'][0]), {
+            'id', 'tipo', 'descricao', 'valor', 'data',
+            'conta_origem_nome', 'categoria_nome', 'categoria_icone',
+        })
+        
+        com_categoria = next(t for t in dados['results'] if t['categoria_nome'])
+        self.assertEqual(com_categoria['valor'], '1.50')
+        self.assertEqual(com_categoria['data'], '2025-03-10')
+        self.assertEqual(com_categoria['conta_origem_nome'], 'Carteira')
+        self.assertEqual(com_categoria['categoria_icone'], 'shopping_cart')
+        sem_categoria = next(t for t in dados['results'] if not t['categoria_nome'])
+        self.assertIsNone(sem_categoria['categoria_icone'])
+        
+        with self.assertNumQueries(2):
+            self.client.get('/api/transacoes/?paginacao=cursor')
+
+
+class DetalheTransacaoTest(TransacaoTestCase):
+    
+    def test_detalhe_sem_saldo_por_padrao(self):
+        transacao = self.criar(tipo='transferencia', valor=Decimal('10'), conta_destino=self.banco)
+        
+        with self.assertNumQueries(2):
+            dados = self.client.get(f'/api/transacoes/{transacao.id}/').json()
+        self.assertNotIn('saldo_atual', dados['conta_origem_detalhes'])
+        self.assertEqual(dados['conta_destino_detalhes']['nome'], 'Banco')
+        
+        dados = self.client.get(f'/api/transacoes/{transacao.id}/?incluir_saldo=true').json()
+        self.assertEqual(dados['conta_origem_detalhes']['saldo_atual'], -10)
+        self.assertEqual(dados['conta_destino_detalhes']['saldo_atual'], 10)
+
+
+class ValidacaoPosseTest(TransacaoTestCase):
+    
+    def test_rejeita_conta_e_categoria_de_outro_usuario(self):
+        outro = Usuario.objects.create(username='intruso')
+        conta_alheia = Conta.objects.create(usuario=outro, nome='Alheia', tipo='dinheiro')
+        categoria_alheia = Categoria.objects.create(usuario=outro, nome='Alheia', tipo='despesa')
+        
+        response = self.client.post('/api/transacoes/', {
+            'tipo': 'despesa', 'descricao': 'x', 'valor': '1.00', 'data': '2025-03-01',
+            'conta_origem': conta_alheia.id, 'categoria': categoria_alheia.id,
+        })
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()), {'conta_origem', 'categoria'})
+    
+    def test_posse_verificada_sem_carregar_usuarios(self):
+        dados = {
+            'tipo': 'transferencia', 'descricao': 'x', 'valor': '1.00', 'data': '2025-03-01',
+            'conta_origem': self.carteira.id, 'conta_destino': self.banco.id,
+        }
+        
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.post('/api/transacoes/', dados)
+        
+        self.assertEqual(response.status_code, 201)
+        tabelas_usuario = [q['sql'] for q in consultas if 'FROM "core_usuario"' in q['sql']]
+        self.assertEqual(tabelas_usuario, [])
+        # Um único SELECT de IDs para checar as duas contas
+        ids_conta = [q['sql'] for q in consultas if q['sql'].startswith('SELECT "contas_conta"."id" AS "id"')]
+        self.assertEqual(len(ids_conta), 1)
+
+
+class CategoriasPadraoTest(TransacaoTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        invalidar_categorias_padrao()
+        Categoria.objects.create(nome='Alimentação', tipo='despesa', padrao=True)
+    
+    def nomes(self, url='/api/categorias/'):
+        return [c['nome'] for c in self.client.get(url).json()['results']]
+    
+    def test_padrao_servidas_da_memoria_e_invalidadas_na_escrita(self):
+        self.assertEqual(self.nomes(), ['Alimentação', 'Mercado', 'Salário'])
+        
+        # Versões (ETag) + versão das padrão + categorias do usuário
+        # (URL nova para não cair no cache de respostas)
+        with self.assertNumQueries(3):
+            self.nomes('/api/categorias/?page=1')
+        
+        Categoria.objects.create(nome='Transporte', tipo='despesa', padrao=True)
+        self.assertEqual(self.nomes(), ['Alimentação', 'Mercado', 'Transporte', 'Salário'])
+        
+        Categoria.objects.filter(nome='Alimentação').delete()
+        self.assertEqual(self.nomes(), ['Mercado', 'Transporte', 'Salário'])
+    
+    def test_invalidacao_pelo_contador_no_banco(self):
+        self.assertEqual(categorias_padrao()[0].nome, 'Alimentação')
+        versao = ContadorVersao.objects.get(chave=CHAVE_VERSAO).numero
+        
+        # Versão inalterada: só a leitura do contador
+        with self.assertNumQueries(1):
+            categorias_padrao()
+        
+        # Escrita "de outro worker": update() não dispara sinais, só o contador avisa
+        Categoria.objects.filter(nome='Alimentação').update(nome='Comida')
+        invalidar_categorias_padrao()
+        self.assertEqual(ContadorVersao.objects.get(chave=CHAVE_VERSAO).numero, versao + 1)
+        
+        # Contador + recarga das categorias
+        with self.assertNumQueries(2):
+            self.assertEqual(categorias_padrao()[0].nome, 'Comida')
+
+
+class SerieTemporalTest(TransacaoTestCase):
+    
+    def setUp(self):
+        super().setUp()
+        self.criar(tipo='receita', valor=Decimal('1000'), categoria=self.salario, data='2025-01-05')
+        self.criar(tipo='despesa', valor=Decimal('100'), categoria=self.mercado, data='2025-01-06')
+        self.criar(tipo='despesa', valor=Decimal('40'), categoria=self.mercado, data='2025-03-20')
+        self.criar(tipo='transferencia', valor=Decimal('300'), conta_destino=self.banco, data='2025-03-21')
+    
+    def test_serie_mensal_em_uma_consulta(self):
+        # versão (ETag) + série
+        with self.assertNumQueries(2):
+            dados = self.client.get(
+                '/api/transacoes/serie_temporal/?inicio=2025-01-01&fim=2025-03-31'
+            ).json()
+        
+        self.assertEqual([p['periodo'] for p in dados['periodos']], ['2025-01-01', '2025-02-01', '2025-03-01'])
+        janeiro, fevereiro, marco = dados['periodos']
+        self.assertEqual((janeiro['receitas'], janeiro['despesas'], janeiro['saldo']), (1000, 100, 900))
+        self.assertEqual(fevereiro['saldo'], 0)
+        self.assertEqual(marco['saldo'], -40)
+        self.assertEqual(
+            [(c['nome'], c['total']) for c in dados['categorias']],
+            [('Salário', 1000), ('Mercado', 140)]
+        )
+    
+    def test_serie_semanal_por_conta(self):
+        dados = self.client.get(
+            f'/api/transacoes/serie_temporal/?agrupamento=semana&inicio=2025-03-17&fim=2025-03-23&conta={self.banco.id}'
+        ).json()
+        
+        self.assertEqual(len(dados['periodos']), 1)
+        self.assertEqual(dados['periodos'][0]['periodo'], '2025-03-17')
+        self.assertEqual(dados['periodos'][0]['transferencias_recebidas'], 300)
+        self.assertEqual(dados['periodos'][0]['saldo'], 300)
+    
+    def test_limite_de_periodos(self):
+        dados = self.client.get('/api/transacoes/serie_temporal/?inicio=2015-01-01&fim=2024-12-31').json()
+        self.assertEqual(len(dados['periodos']), 120)
+        
+        url = '/api/transacoes/serie_temporal/?agrupamento=semana&inicio=2020-01-06&fim=2024-12-29'
+        self.assertEqual(len(self.client.get(url).json()['periodos']), 260)
+    
+    def test_padrao_sao_12_meses(self):
+        dados = self.client.get('/api/transacoes/serie_temporal/?fim=2025-03-31').json()
+        self.assertEqual(len(dados['periodos']), 12)
+        self.assertEqual(dados['periodos'][0]['periodo'], '2024-04-01')
+    
+    def test_parametros_invalidos(self):
+        for query in (
+            'agrupamento=dia', 'inicio=ontem', 'inicio=2025-02-01&fim=2025-01-01',
+            'fim=9999-12-31', 'inicio=0001-01-01&agrupamento=semana',
+            'agrupamento=semana&inicio=1900-01-01&fim=2999-12-31',
+            'inicio=2015-01-01&fim=2025-01-31', 'agrupamento=semana&inicio=2020-01-01&fim=2025-01-31',
+        ):
+            response = self.client.get(f'/api/transacoes/serie_temporal/?{query}')
+            self.assertEqual(response.status_code, 400)
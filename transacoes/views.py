@@ -1,39 +1,90 @@
-from rest_framework import viewsets, filters
+from rest_framework import viewsets, filters, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.response import Response
-from django.db.models import Sum, Q
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
 from django.utils import timezone
-from datetime import datetime
-from .models import Categoria, Transacao
+from datetime import date, datetime
+import csv
+import json
+from .models import Categoria, Transacao, ResumoMensal
+from contas.models import Conta
+from core.versao import VersaoDadosMixin
+from .busca import BuscaTransacaoFilter
+from .categorias import listar_categorias
+from .importacao import ImportadorTransacoes, abrir_texto, ler_csv, ler_ofx, dados_ofx
+from .pagination import TransacaoCursorPagination
+from .relatorios import (
+    AGRUPAMENTOS,
+    DATA_MAXIMA,
+    DATA_MINIMA,
+    MAXIMO_PERIODOS,
+    contar_periodos,
+    serie_temporal,
+    somar_mes,
+)
 from .serializers import (
     CategoriaSerializer,
     TransacaoSerializer,
     TransacaoListSerializer
 )
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(VersaoDadosMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar categorias.
     """
     permission_classes = [IsAuthenticated]
     serializer_class = CategoriaSerializer
+    acoes_em_cache = ['list']
     
     def get_queryset(self):
         """Retorna categorias do usuário + categorias padrão do sistema."""
         return Categoria.objects.filter(
             Q(usuario=self.request.user) | Q(padrao=True)
-        ).distinct()
+        )
+    
+    def list(self, request, *args, **kwargs):
+        """
+        Lista categorias padrão (cache em memória) + categorias do usuário.
+        Só as do usuário vão ao banco.
+        """
+        categorias = listar_categorias(request.user)
+        
+        page = self.paginate_queryset(categorias)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        serializer = self.get_serializer(categorias, many=True)
+        return Response(serializer.data)
 
 
-class TransacaoViewSet(viewsets.ModelViewSet):
+class TransacaoViewSet(VersaoDadosMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar transações.
     """
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.OrderingFilter, filters.SearchFilter]
+    filter_backends = [filters.OrderingFilter, BuscaTransacaoFilter]
     ordering_fields = ['data', 'valor', 'created_at']
     search_fields = ['descricao', 'observacoes']
+    acoes_em_cache = ['resumo_mensal', 'serie_temporal']
+    
+    @property
+    def paginator(self):
+        """
+        Paginação por página (padrão) ou por cursor com `?paginacao=cursor`.
+        O modo cursor não faz COUNT(*) e tem custo constante por página; só ordena
+        por data (`ordering=-data` ou `ordering=data`) e não aceita `search`:
+        outras ordenações ou busca junto com o cursor respondem 400.
+        """
+        if not hasattr(self, '_paginator'):
+            if self.request.query_params.get('paginacao') == 'cursor':
+                self._paginator = TransacaoCursorPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
     
     def get_queryset(self):
         """Retorna apenas transações do usuário logado."""
@@ -63,7 +114,17 @@ class TransacaoViewSet(viewsets.ModelViewSet):
         if data_fim:
             queryset = queryset.filter(data__lte=data_fim)
         
-        return queryset
+        if self.action == 'list':
+            # Só as colunas exibidas, numa única consulta com JOIN
+            return queryset.values(
+                'id', 'tipo', 'descricao', 'valor', 'data', 'created_at',
+                **{
+                    nome: F(caminho)
+                    for nome, caminho in TransacaoListSerializer.CAMPOS_CONSULTA.items()
+                }
+            )
+        
+        return queryset.select_related('conta_origem', 'conta_destino', 'categoria')
     
     def get_serializer_class(self):
         """Usa serializer simplificado para listagem."""
@@ -75,43 +136,197 @@ class TransacaoViewSet(viewsets.ModelViewSet):
     def resumo_mensal(self, request):
         """
         Retorna resumo financeiro do mês.
-        Query params: mes (1-12), ano (ex: 2024)
+        Query params: mes (1-12), ano (ex: 2024), conta, tipo, categoria,
+        data_inicio, data_fim, search (opcionais, os mesmos filtros da listagem)
         """
         mes = int(request.query_params.get('mes', timezone.now().month))
         ano = int(request.query_params.get('ano', timezone.now().year))
         
-        transacoes = self.get_queryset().filter(
-            data__year=ano,
-            data__month=mes
+        return Response(ResumoMensal.resumo_do_mes(request.user, ano, mes, **self.filtros_resumo()))
+    
+    # Filtros que o resumo mensal pré-calculado não consegue aplicar
+    FILTROS_SO_NAS_TRANSACOES = ('data_inicio', 'data_fim', 'search')
+    
+    def filtros_resumo(self):
+        """
+        Filtros do resumo_mensal: conta, tipo e categoria saem do agregado;
+        com data_inicio/data_fim/search, soma as transações filtradas como a listagem.
+        """
+        params = self.request.query_params
+        filtros = {
+            'conta_id': params.get('conta'),
+            'tipo': params.get('tipo'),
+            'categoria_id': params.get('categoria'),
+        }
+        if any(params.get(nome) for nome in self.FILTROS_SO_NAS_TRANSACOES):
+            filtros['transacoes'] = self.filter_queryset(self.get_queryset())
+        return filtros
+    
+    @action(detail=False, methods=['get'])
+    def serie_temporal(self, request):
+        """
+        Evolução de receitas/despesas/saldo por mês ou semana, com totais por categoria.
+        Query params: inicio, fim (YYYY-MM-DD; padrão: últimos 12 meses),
+        agrupamento (mes | semana), conta, categoria
+        """
+        hoje = timezone.localdate()
+        agrupamento = request.query_params.get('agrupamento', 'mes')
+        
+        try:
+            fim = date.fromisoformat(request.query_params['fim']) if request.query_params.get('fim') else hoje
+            if request.query_params.get('inicio'):
+                inicio = date.fromisoformat(request.query_params['inicio'])
+            else:
+                # 12 meses contando o de `fim`
+                inicio = somar_mes(fim, -11)
+        except ValueError:
+            return Response(
+                {'error': 'Datas devem estar no formato AAAA-MM-DD.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if agrupamento not in AGRUPAMENTOS:
+            return Response(
+                {'error': 'Agrupamento deve ser mes ou semana.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if inicio > fim:
+            return Response(
+                {'error': 'Data inicial posterior à final.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if inicio < DATA_MINIMA or fim > DATA_MAXIMA:
+            return Response(
+                {'error': f'Datas devem estar entre {DATA_MINIMA.isoformat()} e {DATA_MAXIMA.isoformat()}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if contar_periodos(inicio, fim, agrupamento) > MAXIMO_PERIODOS[agrupamento]:
+            return Response(
+                {'error': f'Intervalo longo demais: no máximo {MAXIMO_PERIODOS[agrupamento]} períodos ({agrupamento}).'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response(serie_temporal(
+            request.user,
+            inicio,
+            fim,
+            agrupamento=agrupamento,
+            conta_id=request.query_params.get('conta'),
+            categoria_id=request.query_params.get('categoria'),
+        ))
+    
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser, FormParser])
+    def importar(self, request):
+        """
+        Importa extrato bancário (CSV ou OFX) em lote.
+        Form data: arquivo, conta (obrigatória para OFX; padrão para linhas CSV sem conta)
+        Retorna quantas transações foram importadas e os erros por linha.
+        """
+        arquivo = request.FILES.get('arquivo')
+        if not arquivo:
+            return Response(
+                {'error': 'Envie o arquivo do extrato.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        conta = None
+        if request.data.get('conta'):
+            conta_id = str(request.data['conta'])
+            if conta_id.isdigit():
+                conta = Conta.objects.filter(usuario=request.user, pk=conta_id).first()
+            if conta is None:
+                return Response(
+                    {'error': 'Conta não pertence ao usuário.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        
+        nome = arquivo.name.lower()
+        texto = abrir_texto(arquivo)
+        
+        if nome.endswith('.ofx'):
+            if conta is None:
+                return Response(
+                    {'error': 'Informe a conta do extrato OFX.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            linhas = ((numero, dados_ofx(registro)) for numero, registro in ler_ofx(texto))
+        elif nome.endswith('.csv') or nome.endswith('.txt'):
+            linhas = ler_csv(texto)
+        else:
+            return Response(
+                {'error': 'Formato não suportado. Use CSV ou OFX.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        relatorio = ImportadorTransacoes(request.user, conta_padrao=conta).importar(linhas)
+        
+        return Response(
+            relatorio,
+            status=status.HTTP_201_CREATED if relatorio['importadas'] else status.HTTP_400_BAD_REQUEST
         )
+    
+    # Colunas da exportação: (cabeçalho, campo)
+    COLUNAS_EXPORTACAO = [
+        ('id', 'id'),
+        ('data', 'data'),
+        ('tipo', 'tipo'),
+        ('descricao', 'descricao'),
+        ('valor', 'valor'),
+        ('conta', 'conta_origem__nome'),
+        ('conta_destino', 'conta_destino__nome'),
+        ('categoria', 'categoria__nome'),
+        ('observacoes', 'observacoes'),
+    ]
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exporta as transações em streaming, com memória constante.
+        Query params: formato (csv | ndjson), mais os filtros da listagem
+        (tipo, conta, categoria, data_inicio, data_fim).
+        """
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in ('csv', 'ndjson'):
+            return Response(
+                {'error': 'Formato não suportado. Use csv ou ndjson.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        cabecalho = [coluna for coluna, _ in self.COLUNAS_EXPORTACAO]
+        linhas = self.get_queryset().order_by('-data', '-created_at', '-id').values_list(
+            *[campo for _, campo in self.COLUNAS_EXPORTACAO]
+        ).iterator(chunk_size=2000)
+        
+        if formato == 'csv':
+            conteudo = self._exportar_csv(cabecalho, linhas)
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            conteudo = self._exportar_ndjson(cabecalho, linhas)
+            content_type = 'application/x-ndjson'
         
-        receitas = transacoes.filter(tipo='receita').aggregate(
-            total=Sum('valor')
-        )['total'] or 0
-        
-        despesas = transacoes.filter(tipo='despesa').aggregate(
-            total=Sum('valor')
-        )['total'] or 0
-        
-        saldo = receitas - despesas
-        
-        # Gastos por categoria
-        gastos_por_categoria = transacoes.filter(
-            tipo='despesa',
-            categoria__isnull=False
-        ).values(
-            'categoria__nome',
-            'categoria__icone',
-            'categoria__cor'
-        ).annotate(
-            total=Sum('valor')
-        ).order_by('-total')
-        
-        return Response({
-            'mes': mes,
-            'ano': ano,
-            'receitas': float(receitas),
-            'despesas': float(despesas),
-            'saldo': float(saldo),
-            'gastos_por_categoria': list(gastos_por_categoria)
-        })
\ No newline at end of file
+        response = StreamingHttpResponse(conteudo, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="transacoes.{formato}"'
+        return response
+    
+    @staticmethod
+    def _exportar_csv(cabecalho, linhas):
+        class Eco:
+            """Pseudo-arquivo: devolve a linha em vez de guardá-la."""
+            def write(self, valor):
+                return valor
+        
+        escritor = csv.writer(Eco())
+        yield '\ufeff' + escritor.writerow(cabecalho)  # BOM para o Excel reconhecer UTF-8
+        for linha in linhas:
+            yield escritor.writerow(linha)
+    
+    @staticmethod
+    def _exportar_ndjson(cabecalho, linhas):
+        for linha in linhas:
+            registro = dict(zip(cabecalho, linha))
+            registro['data'] = registro['data'].isoformat()
+            registro['valor'] = str(registro['valor'])
+            yield json.dumps(registro, ensure_ascii=False) + '\n'